@@ -0,0 +1,152 @@
+import math
+from datetime import date
+
+# Achievement rules: (key, name, description, stat, threshold). A rule
+# unlocks once its stat reaches the threshold.
+RULES = [
+    ("first_test", "First Test", "Complete your first typing test", "tests", 1),
+    ("speed_demon", "Speed Demon", "Achieve a WPM of 100 or more", "best_wpm", 100),
+    ("accuracy_master", "Accuracy Master", "Achieve an accuracy of 95% or more", "best_accuracy", 95),
+    ("regular", "Regular", "Complete 10 typing tests", "tests", 10),
+    ("centurion", "Centurion", "Complete 100 typing tests", "tests", 100),
+    ("hour", "Hour of Practice", "Spend an hour on typing tests", "seconds", 3600),
+    ("on_a_roll", "On a Roll", "Practise three days in a row", "day_streak", 3),
+    ("week_streak", "Week Streak", "Practise every day for a week", "day_streak", 7),
+    ("sprinter", "Sprinter", "Reach 60 WPM in a 30-second test", "best_wpm_30", 60),
+    ("marathoner", "Marathoner", "Reach 60 WPM in a 5-minute test", "best_wpm_300", 60),
+    ("sharpshooter", "Sharpshooter", "Score 95% accuracy or more in 10 tests in a row", "accurate_run", 10),
+    ("steady_hands", "Steady Hands", "Keep your WPM within 10% of your recent average", "consistency", 0.9),
+]
+
+RULES_BY_STAT = {}
+for rule in RULES:
+    RULES_BY_STAT.setdefault(rule[3], []).append(rule)
+
+# A test at or above this accuracy extends the accurate run
+ACCURATE = 95
+
+# Modes whose results count towards totals and best WPM only. Word Rain
+# saves a fixed accuracy and a score-based WPM, and has no set duration.
+UNSCORED_MODES = {"Word Rain"}
+
+# Consistency follows an exponentially weighted mean and variance of WPM,
+# and is only scored once there are enough tests for them to settle
+CONSISTENCY_WEIGHT = 0.2
+CONSISTENCY_MIN_TESTS = 10
+
+
+def apply_result(stats, wpm, accuracy, day, duration=None, mode=None, elapsed=None):
+    # Folds one result into the running stats in place and returns the
+    # stats that changed with their new values. Cost does not depend on how
+    # many results came before. duration is the test length that was set,
+    # elapsed the seconds actually typed; results saved before that was
+    # measured count their set duration.
+    updated = {}
+
+    def put(stat, value):
+        if stats.get(stat) != value:
+            stats[stat] = updated[stat] = value
+
+    tests = stats.get("tests", 0) + 1
+    put("tests", tests)
+    put("seconds", stats.get("seconds", 0) + (elapsed if elapsed is not None else duration or 0))
+    put("best_wpm", max(stats.get("best_wpm", 0), wpm))
+
+    # Results older than the last practice day (imports) leave the streak alone
+    today = date.fromisoformat(str(day)[:10]).toordinal()
+    last_day = stats.get("last_day")
+    if last_day is None or today > last_day:
+        put("day_streak", stats.get("day_streak", 0) + 1 if last_day == today - 1 else 1)
+        put("last_day", today)
+
+    if mode in UNSCORED_MODES:
+        return updated
+    put("best_accuracy", max(stats.get("best_accuracy", 0), accuracy))
+    if duration:
+        put(f"best_wpm_{duration}", max(stats.get(f"best_wpm_{duration}", 0), wpm))
+    put("accurate_run", stats.get("accurate_run", 0) + 1 if accuracy >= ACCURATE else 0)
+
+    # Stats saved before Word Rain was left out have no count of their own
+    scored = stats.get("scored_tests", tests - 1 if "wpm_mean" in stats else 0) + 1
+    put("scored_tests", scored)
+    if scored == 1:
+        mean, variance = wpm, 0.0
+    else:
+        mean, variance = stats["wpm_mean"], stats["wpm_var"]
+        difference = wpm - mean
+        step = CONSISTENCY_WEIGHT * difference
+        mean += step
+        variance = (1 - CONSISTENCY_WEIGHT) * (variance + difference * step)
+    put("wpm_mean", mean)
+    put("wpm_var", variance)
+    if scored >= CONSISTENCY_MIN_TESTS and mean > 0:
+        put("consistency", max(0.0, 1 - math.sqrt(variance) / mean))
+    return updated
+
+
+# One user's running stats and unlocked achievements. Recording a result
+# only checks the rules on stats that changed, so the cost per test stays
+# the same however many rules or results there are.
+class AchievementTracker:
+    def __init__(self, stats=None, unlocked=()):
+        self.stats = dict(stats or {})
+        self.unlocked = set(unlocked)
+
+    def record(self, wpm, accuracy, day, duration=None, mode=None, elapsed=None):
+        updated = apply_result(self.stats, wpm, accuracy, day, duration, mode, elapsed)
+        unlocked = [key for stat, value in updated.items() for key, _, _, _, threshold in RULES_BY_STAT.get(stat, ())
+                    if key not in self.unlocked and value >= threshold]
+        self.unlocked.update(unlocked)
+        return updated, unlocked
+
+    def achievements(self):
+        return [{"key": key, "name": name, "description": description, "achieved": key in self.unlocked}
+                for key, name, description, _, _ in RULES]
+
+
+def achievement_names(keys):
+    names = {rule[0]: rule[1] for rule in RULES}
+    return [names[key] for key in keys if key in names]
+
+
+def load_user_stats(db_conn, user_id):
+    stats = dict(db_conn.execute('SELECT stat, value FROM user_stats WHERE user_id = ?', (user_id,)))
+    unlocked = [row[0] for row in db_conn.execute('SELECT achievement FROM achievements WHERE user_id = ?', (user_id,))]
+    return stats, unlocked
+
+
+def record_result(db_conn, user_id, wpm, accuracy, day, duration, mode, progress_id, elapsed=None):
+    # Runs in the transaction that saves the result. The stats are read back
+    # and updated here, not written from the app's own copy, so copies of
+    # the app saving for the same user do not overwrite each other.
+    tracker = AchievementTracker(*load_user_stats(db_conn, user_id))
+    updated, unlocked = tracker.record(wpm, accuracy, day, duration, mode, elapsed)
+    save_user_stats(db_conn, user_id, updated, unlocked, progress_id, day)
+    return tracker
+
+
+def save_user_stats(db_conn, user_id, updated, unlocked, progress_id, day):
+    # Only the stats a result changed are written; an unlock is kept once
+    db_conn.executemany('''INSERT INTO user_stats (user_id, stat, value) VALUES (?, ?, ?)
+        ON CONFLICT (user_id, stat) DO UPDATE SET value = excluded.value''',
+                        [(user_id, stat, value) for stat, value in updated.items()])
+    db_conn.executemany('INSERT OR IGNORE INTO achievements (user_id, achievement, progress_id, date) VALUES (?, ?, ?, ?)',
+                        [(user_id, key, progress_id, day) for key in unlocked])
+
+
+def backfill_achievements(db_conn):
+    # Replays every stored result once, oldest first, to seed the stats
+    trackers = {}
+    unlocks = []
+    # A database upgraded from before the elapsed column is replayed first
+    columns = {row[1] for row in db_conn.execute('PRAGMA table_info(progress)')}
+    elapsed = "elapsed" if "elapsed" in columns else "NULL"
+    for user_id, wpm, accuracy, day, duration, mode, elapsed, progress_id in db_conn.execute(
+            f'SELECT user_id, wpm, accuracy, CAST(date AS TEXT), duration, mode, {elapsed}, id FROM progress ORDER BY user_id, date, id'):
+        tracker = trackers.setdefault(user_id, AchievementTracker())
+        _, unlocked = tracker.record(wpm, accuracy, day, duration, mode, elapsed)
+        unlocks.extend((user_id, key, progress_id, day) for key in unlocked)
+    for user_id, tracker in trackers.items():
+        save_user_stats(db_conn, user_id, tracker.stats, [], None, None)
+    db_conn.executemany('INSERT OR IGNORE INTO achievements (user_id, achievement, progress_id, date) VALUES (?, ?, ?, ?)', unlocks)
+    return len(unlocks)
@@ -0,0 +1,96 @@
+import random
+from array import array
+
+from corpus import AliasTable
+from keystrokes import BACKSPACE
+
+# A bigram needs this many samples before it can be picked as a weak spot
+MIN_SAMPLES = 3
+
+# Share of passage words chosen to contain a weak bigram; the rest is filler
+FOCUS = 0.7
+
+
+def bigram_deltas(events):
+    # Each typed character after another one is a transition between the two
+    # expected characters; its latency is the time between the two keys.
+    deltas = {}
+    previous = None
+    for elapsed_ns, expected, typed, correct in events:
+        if typed == BACKSPACE or not expected:
+            previous = None
+            continue
+        if previous is not None:
+            bigram = (previous[1] + expected).lower()
+            count, errors, total_ns = deltas.get(bigram, (0, 0, 0))
+            deltas[bigram] = (count + 1, errors + (not correct), total_ns + elapsed_ns - previous[0])
+        previous = (elapsed_ns, expected)
+    return deltas
+
+
+def update_bigram_stats(db_conn, user_id, events):
+    # Running totals only; one upsert per distinct bigram in the test
+    rows = [(user_id, bigram, count, errors, total_ns)
+            for bigram, (count, errors, total_ns) in bigram_deltas(events).items()]
+    db_conn.executemany('''INSERT INTO bigram_stats (user_id, bigram, count, errors, total_ns)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, bigram) DO UPDATE SET
+            count = count + excluded.count,
+            errors = errors + excluded.errors,
+            total_ns = total_ns + excluded.total_ns''', rows)
+    return len(rows)
+
+
+def weakest_bigrams(db_conn, user_id, limit=12, min_samples=MIN_SAMPLES):
+    # Slow transitions rank high, and every error counts as five slow ones.
+    # Pairs with a space or punctuation are usually the slowest but no word
+    # can drill them, so only letter pairs compete for the limit.
+    return db_conn.execute('''SELECT bigram, total_ns / count / 1e6 * (1 + 5.0 * errors / count) AS weakness
+        FROM bigram_stats
+        WHERE user_id = ? AND count >= ? AND bigram GLOB '[a-z][a-z]'
+        ORDER BY weakness DESC
+        LIMIT ?''', (user_id, min_samples, limit)).fetchall()
+
+
+# Lists, for every letter pair, the words that contain it. Built once from
+# the word list so picking a word for a bigram is a dictionary lookup.
+class BigramIndex:
+    def __init__(self, words):
+        self.words = words
+        self.index = {}
+        for position, word in enumerate(words):
+            lowered = word.lower()
+            for bigram in {lowered[i:i + 2] for i in range(len(lowered) - 1)}:
+                if bigram.isalpha():
+                    self.index.setdefault(bigram, array("l")).append(position)
+
+    def __contains__(self, bigram):
+        return bigram in self.index
+
+    def word(self, bigram, rng):
+        positions = self.index[bigram]
+        return self.words[positions[rng.randrange(len(positions))]]
+
+
+# Builds practice passages that over-sample a user's weakest transitions.
+class AdaptivePractice:
+    def __init__(self, words, rng=None, focus=FOCUS):
+        self.index = BigramIndex(words)
+        self.rng = rng or random.Random()
+        self.focus = focus
+
+    def passage(self, weak_bigrams, length, filler):
+        targets = [(bigram, weakness) for bigram, weakness in weak_bigrams if bigram in self.index and weakness > 0]
+        if not targets:
+            return None
+        table = AliasTable([weakness for _, weakness in targets])
+        words = []
+        total = 0
+        while total < length:
+            if self.rng.random() < self.focus:
+                word = self.index.word(targets[table.sample(self.rng)][0], self.rng)
+            else:
+                word = filler()
+            total += len(word) + (1 if words else 0)
+            words.append(word)
+        return " ".join(words)
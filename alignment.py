@@ -0,0 +1,171 @@
+import numpy as np
+
+# Per character marks. An insertion is an extra typed character, a deletion
+# a target character that was skipped.
+MATCH, SUBSTITUTION, INSERTION, DELETION = 0, 1, 2, 3
+
+# Largest edit cost searched at one mismatch, and how many characters must
+# line up after an edit for it to be taken
+BAND = 8
+ANCHOR = 4
+
+# Matching runs are compared this many characters at a time at first
+CHUNK = 32
+
+# Mismatches in a row with no edit in the band lining the texts up again.
+# Past this the typed text is unrelated to the target (pasted or mashed
+# keys), and the rest is compared position by position instead of searched.
+MAX_MISSES = 32
+
+
+def common_run(target_text, typed_text, j, i):
+    # Length of the run of equal characters starting at target_text[j] and
+    # typed_text[i]. Chunks double while they match, and the first difference
+    # in a chunk that does not is found by bisection, so a run costs a few
+    # string comparisons whatever its length.
+    limit = min(len(target_text) - j, len(typed_text) - i)
+    run = 0
+    chunk = CHUNK
+    while run < limit:
+        size = min(chunk, limit - run)
+        if target_text[j + run:j + run + size] == typed_text[i + run:i + run + size]:
+            run += size
+            chunk *= 2
+            continue
+        low, high = 0, size
+        while high - low > 1:
+            middle = (low + high) // 2
+            if target_text[j + run:j + run + middle] == typed_text[i + run:i + run + middle]:
+                low = middle
+            else:
+                high = middle
+        return run + low
+    return run
+
+
+def band_steps(band=BAND):
+    # Every (target, typed) step through a mismatch of cost up to band, cheapest
+    # first and, at equal cost, substitutions before insertions or deletions
+    steps = []
+    for cost in range(1, band + 1):
+        steps.append((cost, cost))
+        for skew in range(1, cost + 1):
+            steps.append((cost, cost - skew))
+            steps.append((cost - skew, cost))
+    return steps
+
+STEPS = band_steps()
+
+
+def codes(text):
+    return np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+
+def positional_steps(target_text, typed_text, j, i):
+    # A substitution step for every differing position of the two texts,
+    # from target_text[j] and typed_text[i] to the end of the shorter one
+    length = min(len(target_text) - j, len(typed_text) - i)
+    different = np.flatnonzero(codes(target_text[j:j + length]) != codes(typed_text[i:i + length]))
+    ones = np.ones_like(different)
+    return length, np.column_stack([different + j, different + i, ones, ones])
+
+
+# The result of aligning typed text with the start of a target. Only the
+# target characters the typist reached count, so stopping early is not an
+# error. steps holds one (target index, typed index, target step, typed
+# step) row per mismatch; the tallies and per character marks are computed
+# from it with array operations.
+class Alignment:
+    def __init__(self, matches, attempted, typed_length, steps):
+        self.matches = matches
+        self.attempted = attempted
+        self.typed_length = typed_length
+        self.steps = np.array(steps, dtype=np.int64).reshape(-1, 4)
+        shared = np.minimum(self.steps[:, 2], self.steps[:, 3])
+        self.substitutions = int(shared.sum())
+        self.deletions = int((self.steps[:, 2] - shared).sum())
+        self.insertions = int((self.steps[:, 3] - shared).sum())
+
+    @property
+    def errors(self):
+        return self.substitutions + self.insertions + self.deletions
+
+    @property
+    def accuracy(self):
+        total = self.matches + self.errors
+        return self.matches / total * 100 if total else 0
+
+    def target_marks(self):
+        # MATCH, SUBSTITUTION or DELETION for every attempted target character
+        return self._marks(self.attempted, 0, 2, DELETION)
+
+    def typed_marks(self):
+        # MATCH, SUBSTITUTION or INSERTION for every typed character
+        return self._marks(self.typed_length, 1, 3, INSERTION)
+
+    def _marks(self, length, start_column, step_column, unmatched):
+        marks = np.zeros(length, dtype=np.int8)
+        starts = self.steps[:, start_column]
+        counts = self.steps[:, step_column]
+        shared = np.minimum(self.steps[:, 2], self.steps[:, 3])
+        # Offsets of every character each step covers, without a Python loop
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = np.repeat(starts, counts) + offsets
+        marks[positions] = np.where(offsets < np.repeat(shared, counts), SUBSTITUTION, unmatched)
+        return marks
+
+
+def align(target_text, typed_text, steps=STEPS, anchor=ANCHOR, max_misses=MAX_MISSES):
+    # Walks both texts along matching runs. At a mismatch, edits are tried in
+    # order of Levenshtein cost within the band, and the first one after
+    # which the next few characters agree is taken, so a skipped or doubled
+    # character costs one edit instead of the rest of the passage.
+    target_length = len(target_text)
+    typed_length = len(typed_text)
+    matches = 0
+    taken = []
+    misses = 0
+    j = i = 0
+    while i < typed_length and j < target_length and misses < max_misses:
+        if target_text[j] == typed_text[i]:
+            run = common_run(target_text, typed_text, j, i)
+            matches += run
+            j += run
+            i += run
+            if i == typed_length or j == target_length:
+                break
+        step = fallback = None
+        for target_step, typed_step in steps:
+            next_j = j + target_step
+            next_i = i + typed_step
+            if next_j + anchor <= target_length and next_i + anchor <= typed_length:
+                if target_text[next_j:next_j + anchor] == typed_text[next_i:next_i + anchor]:
+                    step = (target_step, typed_step)
+                    break
+                continue
+            if next_j > target_length or next_i > typed_length:
+                continue
+            # Near the end the anchor is shorter; a step that runs off the end
+            # of either text confirms nothing, so it is only a fallback
+            length = min(anchor, target_length - next_j, typed_length - next_i)
+            if target_text[next_j:next_j + length] == typed_text[next_i:next_i + length]:
+                if length:
+                    step = (target_step, typed_step)
+                    break
+                fallback = fallback or (target_step, typed_step)
+        misses = 0 if step else misses + 1
+        target_step, typed_step = step or fallback or (1, 1)
+        taken.append((j, i, target_step, typed_step))
+        j += target_step
+        i += typed_step
+    taken = np.array(taken, dtype=np.int64).reshape(-1, 4)
+    if misses >= max_misses:
+        length, positional = positional_steps(target_text, typed_text, j, i)
+        matches += length - len(positional)
+        taken = np.concatenate([taken, positional])
+        j += length
+        i += length
+    # Typing past the end of the target only adds insertions
+    if i < typed_length:
+        taken = np.concatenate([taken, [(j, i, 0, typed_length - i)]])
+    return Alignment(matches, j, typed_length, taken)
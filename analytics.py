@@ -0,0 +1,174 @@
+import numpy as np
+
+from chartdata import spread_days
+
+# A user's results, oldest first; ids above the given one only. Results
+# saved before the time typed was measured count their set duration.
+HISTORY_QUERY = '''SELECT id, substr(date, 1, 10), wpm, accuracy, COALESCE(elapsed, duration, 0) FROM progress
+    WHERE user_id=? AND id > ? ORDER BY date, id'''
+
+# Columns kept per result: (name, dtype)
+COLUMNS = [("id", np.int64), ("day", "datetime64[D]"), ("wpm", np.float64),
+           ("accuracy", np.float64), ("elapsed", np.float64)]
+
+# WPM percentiles of the stats panel
+PERCENTILES = (10, 50, 90)
+
+# Tests in the recent average and the consistency window
+RECENT = 10
+
+# Columns grow to at least this many rows, then double when full
+MIN_CAPACITY = 64
+
+
+def load_history(db_conn, user_id, after_id=0):
+    # Runs on the database thread, so the Tk thread only receives arrays
+    return to_columns(db_conn.execute(HISTORY_QUERY, (user_id, after_id)).fetchall())
+
+
+def to_columns(rows):
+    values = list(zip(*rows)) or [()] * len(COLUMNS)
+    return [np.array(column, dtype=dtype) for column, (_, dtype) in zip(values, COLUMNS)]
+
+
+# A user's results as parallel NumPy columns in date order. It is loaded
+# once and new results are appended in place; the columns have spare
+# capacity that doubles when full, so an append costs the same with 100
+# rows or 100k. Statistics work on slices of the columns without copying.
+class History:
+    def __init__(self, columns=None):
+        self.size = 0
+        self.last_id = 0
+        self.data = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+        if columns is not None:
+            self.extend(columns)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        return self.data[name][:self.size]
+
+    def reserve(self, size):
+        capacity = len(self.data["id"])
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, MIN_CAPACITY)
+        for name, dtype in COLUMNS:
+            grown = np.empty(capacity, dtype=dtype)
+            grown[:self.size] = self[name]
+            self.data[name] = grown
+
+    def extend(self, columns):
+        # columns are in date order, as load_history returns them
+        columns = [np.asarray(column, dtype=dtype) for column, (_, dtype) in zip(columns, COLUMNS)]
+        count = len(columns[0])
+        if not count:
+            return
+        in_order = not self.size or columns[1][0] >= self["day"][-1]
+        self.reserve(self.size + count)
+        for (name, _), column in zip(COLUMNS, columns):
+            self.data[name][self.size:self.size + count] = column
+        self.size += count
+        if not in_order:
+            # Only results dated before the newest one need a re-sort
+            order = np.lexsort((self["id"], self["day"]))
+            for name, _ in COLUMNS:
+                self.data[name][:self.size] = self[name][order]
+        self.last_id = max(self.last_id, int(columns[0].max()))
+
+    def append(self, progress_id, date, wpm, accuracy, elapsed=0):
+        # Results already read from the database are skipped
+        if progress_id <= self.last_id:
+            return
+        self.extend([[progress_id], [str(date)[:10]], [wpm], [accuracy], [elapsed or 0]])
+
+    def span(self, start=None, end=None):
+        # Row range of the results dated from start to end, both included
+        days = self["day"]
+        low = 0 if start is None else int(np.searchsorted(days, np.datetime64(start, "D")))
+        high = self.size if end is None else int(np.searchsorted(days, np.datetime64(end, "D"), side="right"))
+        return low, high
+
+
+def rolling_std(values, window):
+    # Standard deviation over up to window points, from running sums
+    sums = np.cumsum(np.r_[0.0, values])
+    squares = np.cumsum(np.r_[0.0, values * values])
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    counts = ends - starts
+    means = (sums[ends] - sums[starts]) / counts
+    variances = (squares[ends] - squares[starts]) / counts - means * means
+    return np.sqrt(np.maximum(variances, 0)), means
+
+
+def rolling_consistency(values, window=RECENT):
+    # 1 when every test in the window had the same WPM, falling towards 0
+    # as the spread approaches the average (as for Steady Hands)
+    deviations, means = rolling_std(values, window)
+    return np.maximum(0.0, 1 - np.divide(deviations, means, out=np.ones_like(means), where=means > 0))
+
+
+def personal_bests(values):
+    # The best result so far after each test
+    return np.maximum.accumulate(values) if len(values) else np.empty(0)
+
+
+def records(values):
+    # Indices of the tests that set a new personal best
+    if not len(values):
+        return np.empty(0, dtype=np.int64)
+    bests = personal_bests(values)
+    return np.flatnonzero(np.r_[True, bests[1:] > bests[:-1]])
+
+
+def trend(days, values):
+    # Least squares slope, in units per day
+    if len(values) < 2:
+        return 0.0
+    x = (days - days[0]).astype(np.float64)
+    x -= x.mean()
+    spread = np.dot(x, x)
+    return float(np.dot(x, values - values.mean()) / spread) if spread else 0.0
+
+
+def summary(history, start=None, end=None, window=RECENT):
+    # Figures for the stats panel over the results from start to end
+    low, high = history.span(start, end)
+    wpm = history["wpm"][low:high]
+    if not len(wpm):
+        return {"tests": 0}
+    stats = {
+        "tests": len(wpm),
+        "minutes": history["elapsed"][low:high].sum() / 60,
+        "average_wpm": wpm.mean(),
+        "recent_wpm": wpm[-window:].mean(),
+        "best_wpm": wpm.max(),
+        "average_accuracy": history["accuracy"][low:high].mean(),
+        "trend": trend(history["day"][low:high], wpm),
+        "consistency": rolling_consistency(wpm[-window:], window)[-1],
+        # New bests count against every earlier result, not just this range
+        "records": int(np.count_nonzero(records(history["wpm"][:high]) >= low)),
+    }
+    for percentile, value in zip(PERCENTILES, np.percentile(wpm, PERCENTILES)):
+        stats[f"p{percentile}"] = value
+    return stats
+
+
+def series(history, start, end, resolution):
+    # (dates, [wpm, accuracy]) for a chart at the chartdata resolution, the
+    # same figures the series queries read from progress and daily_stats
+    low, high = history.span(start, end)
+    days = history["day"][low:high]
+    columns = [history["wpm"][low:high], history["accuracy"][low:high]]
+    if resolution == "test":
+        return spread_days(days), columns
+    if resolution == "week":
+        # Weeks start on Monday; 1970-01-01 was a Thursday
+        days = days - (days.astype(np.int64) + 3) % 7
+    if not len(days):
+        return days.astype("datetime64[s]"), columns
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    counts = np.diff(np.r_[starts, len(days)])
+    return days[starts].astype("datetime64[s]"), [np.add.reduceat(column, starts) / counts for column in columns]
@@ -0,0 +1,112 @@
+import os
+import time
+from collections import deque
+
+from startup import LazyModule
+
+pygame = LazyModule("pygame")
+
+
+class NullAudioEngine:
+    enabled = False
+
+    def load(self, name, filename):
+        return None
+
+    def click(self, pressed_at=None):
+        return False
+
+    def play(self, name):
+        return False
+
+    def latency_report(self):
+        return None
+
+    def close(self):
+        pass
+
+
+# Keyclicks go through a small pool of reserved mixer channels, so a burst of
+# keys never has to wait for a free channel and other sounds cannot steal
+# them. Clicks arriving faster than max_click_rate are merged into the one
+# already playing.
+class AudioEngine:
+    enabled = True
+
+    def __init__(self, frequency=44100, buffer=256, click_channels=4, max_click_rate=25):
+        self.frequency = frequency
+        self.buffer = buffer
+        self.click_channels = click_channels
+        self.min_click_interval = 1 / max_click_rate if max_click_rate else 0
+        self.sounds = {}
+        self.last_click = float("-inf")
+        self.next_channel = 0
+        self.coalesced = 0
+        self.latencies = deque(maxlen=512)
+
+        # A small buffer keeps the mixer's own delay at a few milliseconds
+        pygame.mixer.pre_init(frequency, -16, 2, buffer)
+        pygame.mixer.init()
+        self.frequency, _, _ = pygame.mixer.get_init()
+        pygame.mixer.set_num_channels(click_channels + 4)
+        pygame.mixer.set_reserved(click_channels)
+        self.channels = [pygame.mixer.Channel(index) for index in range(click_channels)]
+
+    @property
+    def buffer_latency(self):
+        return self.buffer / self.frequency
+
+    def load(self, name, filename):
+        if not os.path.exists(filename):
+            print(f"Warning: Sound file {filename} not found.")
+            return None
+        # Decoded to PCM once here; playing it later never touches the file
+        sound = pygame.mixer.Sound(filename)
+        self.sounds[name] = sound
+        return sound
+
+    def click(self, pressed_at=None):
+        sound = self.sounds.get("key")
+        if sound is None:
+            return False
+        now = time.perf_counter()
+        if now - self.last_click < self.min_click_interval:
+            self.coalesced += 1
+            return False
+        self.last_click = now
+        channel = self.channels[self.next_channel]
+        self.next_channel = (self.next_channel + 1) % len(self.channels)
+        channel.play(sound)
+        if pressed_at is not None:
+            self.latencies.append(time.perf_counter() - pressed_at + self.buffer_latency)
+        return True
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            return False
+        sound.play()
+        return True
+
+    def latency_report(self):
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        return {
+            "samples": len(latencies),
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+            "coalesced": self.coalesced,
+        }
+
+    def close(self):
+        pygame.mixer.quit()
+
+
+def create_audio_engine(**kwargs):
+    try:
+        return AudioEngine(**kwargs)
+    except Exception as error:
+        # Headless machines have no audio device; run silently instead
+        print(f"Warning: Audio disabled ({error}).")
+        return NullAudioEngine()
@@ -0,0 +1,52 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adaptive import AdaptivePractice
+
+
+def dictionary(size, rng):
+    return ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+
+# Times building the bigram index over a word list, once per start of
+# Adaptive mode, and generating a passage, which runs on the Tk thread at
+# the start of every Adaptive test.
+def measure(words, length, rng, repeat=20):
+    start = time.perf_counter_ns()
+    practice = AdaptivePractice(words, rng=rng)
+    index_ms = (time.perf_counter_ns() - start) / 1e6
+    weak = [("ab", 3.0), ("qx", 2.0), ("th", 1.0)]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        practice.passage(weak, length, lambda: "the")
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+    return {
+        "index_ms": index_ms,
+        "best_ms": timings[0] / 1e6,
+        "median_ms": timings[len(timings) // 2] / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time adaptive passage generation from a large word list")
+    parser.add_argument("--words", type=int, nargs="+", default=[100000, 1000000], help="Words in the dictionary")
+    parser.add_argument("--chars", type=int, default=1500, help="Length of each passage")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for size in args.words:
+        result = measure(dictionary(size, rng), args.chars, rng)
+        print(f"{size} words: index {result['index_ms']:.1f} ms, {args.chars}-character passage "
+              f"best {result['best_ms']:.2f} ms, median {result['median_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alignment import align
+from corpus import Corpus
+
+
+def mistype(target, error_rate, rng):
+    # Leaves uncorrected errors in the text: half wrong keys, the rest split
+    # between skipped and doubled characters
+    typed = []
+    for char in target:
+        roll = rng.random()
+        if roll < error_rate / 2:
+            typed.append(rng.choice("abcdefghijklmnopqrstuvwxyz"))
+        elif roll < error_rate * 3 / 4:
+            continue
+        elif roll < error_rate:
+            typed.append(char + char)
+        else:
+            typed.append(char)
+    return "".join(typed)
+
+
+# Times end-of-test scoring of a long passage typed with uncorrected errors.
+# The best of several runs is reported, as the scoring runs once per test.
+def measure(target, typed, repeat=7):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        result = align(target, typed)
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+    return {
+        "best_ms": timings[0] / 1e6,
+        "median_ms": timings[len(timings) // 2] / 1e6,
+        "substitutions": result.substitutions,
+        "insertions": result.insertions,
+        "deletions": result.deletions,
+        "accuracy": result.accuracy,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time alignment scoring of a long typed passage")
+    parser.add_argument("--chars", type=int, default=100000, help="Length of the target passage")
+    parser.add_argument("--errors", type=float, nargs="+", default=[0.005, 0.01, 0.02],
+                        help="Shares of characters left wrong, skipped or doubled")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = Corpus(rng=rng)
+    target = ""
+    while len(target) < args.chars:
+        target += corpus.passage("Medium", duration=600) + " "
+    target = target[:args.chars]
+    for error_rate in args.errors:
+        result = measure(target, mistype(target, error_rate, rng))
+        print(f"{len(target)} characters, {error_rate:.1%} errors: best {result['best_ms']:.1f} ms, "
+              f"median {result['median_ms']:.1f} ms  ({result['substitutions']} substituted, "
+              f"{result['insertions']} inserted, {result['deletions']} deleted, accuracy {result['accuracy']:.2f}%)")
+    # The worst case: text unrelated to the target, as from mashed keys or a
+    # wrong paste, where no edit in the band lines the two up again
+    result = measure(target, "".join(rng.choice("abcdefghijklmnopqrstuvwxyz ") for _ in target))
+    print(f"{len(target)} characters, random keys: best {result['best_ms']:.1f} ms, "
+          f"median {result['median_ms']:.1f} ms  (accuracy {result['accuracy']:.2f}%)")
+
+
+if __name__ == "__main__":
+    main()
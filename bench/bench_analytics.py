@@ -0,0 +1,70 @@
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+from database import migrate
+
+
+def fill(db_conn, rows, rng, tests_per_day=20):
+    # One user's results, improving slowly with day to day noise
+    first_day = date(2020, 1, 1)
+    db_conn.executemany('INSERT INTO progress (user_id, wpm, accuracy, date, duration) VALUES (1, ?, ?, ?, ?)',
+                        ((int(40 + index / rows * 30 + rng.gauss(0, 8)), min(100.0, rng.gauss(95, 3)),
+                          (first_day + timedelta(days=index // tests_per_day)).isoformat(), rng.choice((30, 60, 180, 300)))
+                         for index in range(rows)))
+    db_conn.commit()
+    return first_day + timedelta(days=rows // tests_per_day)
+
+
+def timed(func, *args, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        result = func(*args)
+        timings.append(time.perf_counter_ns() - start)
+    return min(timings) / 1e6, result
+
+
+# Times what the app does with one user's history: the single load at the
+# first chart or stats view, then what runs on the Tk thread per refresh.
+def measure(rows, seed=0):
+    db_conn = sqlite3.connect(":memory:")
+    migrate(db_conn)
+    last_day = fill(db_conn, rows, random.Random(seed))
+    load_ms, columns = timed(analytics.load_history, db_conn, 1, repeat=1)
+    build_ms, history = timed(analytics.History, columns)
+    results = {"load": load_ms, "build": build_ms}
+    results["summary, all time"] = timed(analytics.summary, history)[0]
+    results["summary, 30 days"] = timed(analytics.summary, history, last_day - timedelta(days=30))[0]
+    for resolution, days in [("test", 14), ("day", 180), ("week", None)]:
+        start = None if days is None else last_day - timedelta(days=days)
+        results[f"{resolution} series"] = timed(analytics.series, history, start, last_day, resolution)[0]
+    start = time.perf_counter_ns()
+    for index in range(1000):
+        history.append(history.last_id + 1, last_day.isoformat(), 60, 95.0, 60)
+    results["append"] = (time.perf_counter_ns() - start) / 1e6 / 1000
+    db_conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time history analytics for one user")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000], help="Results in the user's history")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        print(f"{rows} results")
+        for name, took in measure(rows, args.seed).items():
+            print(f"  {name:<20} {took:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
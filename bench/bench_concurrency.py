@@ -0,0 +1,81 @@
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseWorker, connect, insert_progress, migrate
+
+
+def save_result(db_conn, user_id, wpm):
+    # Reads before writing, as the achievement stats do
+    db_conn.execute('SELECT COUNT(*) FROM progress WHERE user_id=?', (user_id,)).fetchone()
+    return insert_progress(db_conn, user_id, wpm, 95.0, "2025-02-16", "Timed Test", "Easy", 30)
+
+
+def save_results(path, user_id, writes):
+    # One copy of the app, saving one result at a time as after each test.
+    # Returns the failed writes and the time each successful one took.
+    worker = DatabaseWorker(path)
+    failed = 0
+    timings = []
+    for index in range(writes):
+        start = time.perf_counter()
+        try:
+            worker.submit(save_result, user_id, 40 + index % 60, write=True).result()
+            timings.append(time.perf_counter() - start)
+        except sqlite3.OperationalError:
+            failed += 1
+    worker.close()
+    return failed, timings
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(share * len(values)))] if values else 0.0
+
+
+# Runs many app processes saving to one database file at once and checks
+# that every result was written.
+def measure(path, processes, writes):
+    worker = DatabaseWorker(path)
+    worker.submit(migrate, write=True).result()
+    worker.close()
+    start = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        results = pool.starmap(save_results, [(path, user_id, writes) for user_id in range(1, processes + 1)])
+    elapsed = time.perf_counter() - start
+    db_conn = connect(path)
+    stored = db_conn.execute('SELECT COUNT(*) FROM progress').fetchone()[0]
+    db_conn.close()
+    timings = sorted(timing for _, process_timings in results for timing in process_timings)
+    return {
+        "expected": processes * writes,
+        "stored": stored,
+        "failed": sum(failed for failed, _ in results),
+        "writes_per_second": stored / elapsed,
+        "p50_ms": percentile(timings, 0.5) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+        "max_ms": (timings[-1] if timings else 0.0) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time concurrent writers sharing one database file")
+    parser.add_argument("--processes", type=int, nargs="+", default=[8, 32], help="App processes writing at once")
+    parser.add_argument("--writes", type=int, default=100, help="Results saved by each process")
+    args = parser.parse_args()
+
+    for processes in args.processes:
+        with tempfile.TemporaryDirectory() as directory:
+            result = measure(os.path.join(directory, "typing_data.db"), processes, args.writes)
+        print(f"{processes} processes: {result['stored']}/{result['expected']} rows stored, {result['failed']} failed, "
+              f"{result['writes_per_second']:.0f} writes/s, save p50 {result['p50_ms']:.1f} ms, "
+              f"p99 {result['p99_ms']:.1f} ms, max {result['max_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clock import SessionClock
+from corpus import Corpus
+from session import TypingSession
+
+
+class ReplayClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def keystrokes(target, error_rate, rng):
+    # Yields (action, char); a typo is followed by a backspace and the right key
+    for char in target:
+        if rng.random() < error_rate:
+            yield "insert", rng.choice("abcdefghijklmnopqrstuvwxyz")
+            yield "delete", None
+        yield "insert", char
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+# Replays a synthetic typist against the passage through the headless
+# TypingSession, making the same calls as the Tk input handler, and measures
+# how long each keystroke took to process and how much memory it kept.
+def replay(target, wpm=220, error_rate=0.03, seed=0, trace=True):
+    rng = random.Random(seed)
+    clock = ReplayClock()
+    session = TypingSession(SessionClock(clock))
+    session.set_target(target)
+    session.start(None)
+    interval = 60 / (wpm * 5)
+    latencies = []
+    position = 0
+    if trace:
+        tracemalloc.start()
+    for action, char in keystrokes(target, error_rate, rng):
+        clock.now += interval
+        start = time.perf_counter_ns()
+        if action == "insert":
+            session.insert(position, char)
+            position += 1
+        else:
+            position -= 1
+            session.delete(position, 1)
+        latencies.append(time.perf_counter_ns() - start)
+    if trace:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    else:
+        current = peak = 0
+    result = session.finish()
+    latencies.sort()
+    return {
+        "keystrokes": len(latencies),
+        "wpm": result[0],
+        "accuracy": result[1],
+        "p50_us": percentile(latencies, 0.50) / 1000,
+        "p95_us": percentile(latencies, 0.95) / 1000,
+        "p99_us": percentile(latencies, 0.99) / 1000,
+        "max_us": latencies[-1] / 1000,
+        "retained_bytes_per_key": current / len(latencies),
+        "peak_kib": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic keystrokes against the typing session")
+    parser.add_argument("--wpm", type=int, default=220)
+    parser.add_argument("--chars", type=int, default=100000, help="Length of the replayed passage")
+    parser.add_argument("--errors", type=float, default=0.03, help="Share of keys mistyped and corrected")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = Corpus(rng=random.Random(args.seed))
+    target = corpus.passage("Medium", duration=args.chars * 60 / (args.wpm * 5), wpm=args.wpm)[:args.chars]
+    # Timings without tracing, then allocations with it (tracing slows every call)
+    timings = replay(target, args.wpm, args.errors, args.seed, trace=False)
+    allocations = replay(target, args.wpm, args.errors, args.seed, trace=True)
+    print(f"{timings['keystrokes']} keystrokes at {args.wpm} WPM over {len(target)} characters "
+          f"(replayed WPM {timings['wpm']:.0f}, accuracy {timings['accuracy']:.2f}%)")
+    print(f"latency  p50 {timings['p50_us']:.2f} us  p95 {timings['p95_us']:.2f} us  "
+          f"p99 {timings['p99_us']:.2f} us  max {timings['max_us']:.2f} us")
+    print(f"memory   {allocations['retained_bytes_per_key']:.1f} bytes retained per keystroke, "
+          f"peak {allocations['peak_kib']:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
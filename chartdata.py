@@ -0,0 +1,134 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Ranges up to this many days are plotted per test, then per day, then per week
+PER_TEST_DAYS = 14
+PER_DAY_DAYS = 180
+
+# Moving average and percentile band window, in points of each resolution
+WINDOWS = {"test": 10, "day": 7, "week": 4}
+BAND = (10, 90)
+
+# Never plot more than one point per this many pixels of chart width
+PIXELS_PER_POINT = 2
+
+QUERIES = {
+    "test": '''SELECT date, wpm, accuracy FROM progress
+        WHERE user_id=? AND date BETWEEN ? AND ? ORDER BY date, id''',
+    "day": '''SELECT day, total_wpm / tests, total_accuracy / tests FROM daily_stats
+        WHERE user_id=? AND day BETWEEN ? AND ? ORDER BY day''',
+    # Weeks start on Monday
+    "week": '''SELECT date(day, 'weekday 0', '-6 days') AS week, SUM(total_wpm) / SUM(tests), SUM(total_accuracy) / SUM(tests)
+        FROM daily_stats WHERE user_id=? AND day BETWEEN ? AND ? GROUP BY week ORDER BY week''',
+}
+
+
+def choose_resolution(start_date, end_date):
+    days = (end_date - start_date).days
+    if days <= PER_TEST_DAYS:
+        return "test"
+    if days <= PER_DAY_DAYS:
+        return "day"
+    return "week"
+
+
+def series_query(resolution):
+    return QUERIES[resolution]
+
+
+def to_datetimes(dates, spread_within_day=False):
+    times = np.array([str(date)[:19] for date in dates], dtype="datetime64[s]")
+    if spread_within_day:
+        times = spread_days(times)
+    return times
+
+
+def spread_days(times):
+    # Tests only carry their day, so space each day's tests across it
+    days = times.astype("datetime64[D]")
+    if not len(days):
+        return days.astype("datetime64[s]")
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    counts = np.diff(np.r_[starts, len(days)])
+    rank = np.arange(len(days)) - np.repeat(starts, counts)
+    offsets = ((rank + 0.5) / np.repeat(counts, counts) * 86400).astype("timedelta64[s]")
+    return days.astype("datetime64[s]") + offsets
+
+
+def moving_average(values, window):
+    # Averages over up to window points; the first few use what is available
+    sums = np.cumsum(np.r_[0.0, values])
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (sums[ends] - sums[starts]) / (ends - starts)
+
+
+def rolling_percentiles(values, window, percentiles=BAND):
+    if not len(values):
+        return tuple(np.empty(0) for _ in percentiles)
+    # Sorting puts the padding at the end of each window, so the first few
+    # windows interpolate over just the values they have (like nanpercentile,
+    # which is far slower row by row)
+    padded = np.r_[np.full(window - 1, np.nan), values]
+    windows = np.sort(sliding_window_view(padded, window), axis=1)
+    valid = np.minimum(np.arange(1, len(values) + 1), window)
+    rows = np.arange(len(values))
+    bands = []
+    for percentile in percentiles:
+        position = percentile / 100 * (valid - 1)
+        below = np.floor(position).astype(int)
+        above = np.minimum(below + 1, valid - 1)
+        fraction = position - below
+        bands.append(windows[rows, below] * (1 - fraction) + windows[rows, above] * fraction)
+    return tuple(bands)
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: keeps the first and last points and,
+    # from each bucket in between, the point forming the largest triangle
+    # with the previous pick and the next bucket's mean. Returns indices.
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    edges = np.linspace(1, count - 1, threshold - 1).astype(int)
+    picked = np.empty(threshold, dtype=int)
+    picked[0] = 0
+    picked[-1] = count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        picked[bucket + 1] = previous
+    return picked
+
+
+def prepare(rows, resolution, panels=1, width=800):
+    # Turns query rows (date, then one value per panel) into what the chart
+    # plots: sampled points plus a moving average and percentile band that
+    # are computed on every point before sampling. Points are picked by the
+    # first panel's values, and every panel is sampled at the same dates.
+    dates = to_datetimes([row[0] for row in rows], spread_within_day=resolution == "test")
+    columns = [np.array([row[index] for row in rows], dtype=float) for index in range(1, panels + 1)]
+    return prepare_columns(dates, columns, resolution, width)
+
+
+def prepare_columns(dates, columns, resolution, width=800):
+    # The same for values that are already arrays, one per panel
+    window = WINDOWS[resolution]
+    x = dates.astype(float)
+    indices = lttb(x, columns[0], max(3, width // PIXELS_PER_POINT))
+    series = []
+    for values in columns:
+        low, high = rolling_percentiles(values, window)
+        series.append({
+            "values": values[indices],
+            "average": moving_average(values, window)[indices],
+            "low": low[indices],
+            "high": high[indices],
+        })
+    return dates[indices], series
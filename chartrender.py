@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import chartdata
+from charts import LineChart
+
+CACHE_SIZE = 32
+
+
+# Renders charts on a background thread into off-screen Agg buffers and
+# returns them as binary PPM, which tk.PhotoImage shows directly. Each view
+# keeps one LineChart that only the render thread touches. Finished images
+# are kept in an LRU cache; a key should change whenever the data behind an
+# image does, e.g. by including the user's last progress id.
+class ChartRenderer:
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.charts = {}
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="digitype-charts")
+
+    def cached(self, key):
+        with self.lock:
+            image = self.cache.get(key)
+            if image is not None:
+                self.cache.move_to_end(key)
+            return image
+
+    def store(self, key, image):
+        with self.lock:
+            self.cache[key] = image
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def invalidate(self, user_id):
+        # Keys start with the user id
+        with self.lock:
+            for key in [key for key in self.cache if key[0] == user_id]:
+                del self.cache[key]
+
+    def render(self, key, view, panels, rows, resolution, width, height):
+        image = self.cached(key)
+        if image is not None:
+            future = Future()
+            future.set_result(image)
+            return future
+        return self.executor.submit(self.draw, key, view, panels, rows, resolution, width, height)
+
+    def draw(self, key, view, panels, rows, resolution, width, height):
+        chart = self.charts.get(view)
+        if chart is None:
+            chart = self.charts[view] = LineChart(panels)
+            chart.attach_offscreen()
+        chart.resize(width, height)
+        if isinstance(rows, tuple):
+            # (dates, columns) already cut from a user's cached history
+            dates, columns = rows
+            dates, series = chartdata.prepare_columns(dates, columns[:len(panels)], resolution, width)
+        else:
+            dates, series = chartdata.prepare(rows, resolution, len(panels), width)
+        chart.update(dates, *[panel["values"] for panel in series],
+                     bands=[(panel["average"], panel["low"], panel["high"]) for panel in series])
+        image = chart.to_ppm()
+        self.store(key, image)
+        return image
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,109 @@
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+# A date/value line chart that keeps one Figure for the lifetime of the app.
+# New data only replaces the line data; when the axis limits stay the same the
+# lines are blitted over a cached background instead of redrawing the figure.
+# The Figure is not created through pyplot, so nothing keeps old ones alive.
+# Each panel can also show a moving average and a shaded percentile band.
+class LineChart:
+    # Markers are only drawn while the points are far enough apart to see
+    MAX_MARKERS = 60
+
+    def __init__(self, panels, figsize=None):
+        self.figure = Figure(figsize=figsize)
+        self.canvas = None
+        self.background = None
+        self.limits = None
+        self.lines = []
+        self.averages = []
+        self.bands = []
+        for index, (title, ylabel, color) in enumerate(panels):
+            ax = self.figure.add_subplot(len(panels), 1, index + 1)
+            band = ax.fill_between([], [], [], color=color, alpha=0.15, linewidth=0, animated=True)
+            line, = ax.plot([], [], marker='o', linestyle='-', color=color, alpha=0.6, animated=True)
+            average, = ax.plot([], [], linestyle='-', linewidth=2, color=color, animated=True)
+            ax.set_title(title)
+            ax.set_xlabel('Date')
+            ax.set_ylabel(ylabel)
+            ax.grid(True)
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+            self.lines.append(line)
+            self.averages.append(average)
+            self.bands.append(band)
+        if len(panels) > 1:
+            self.figure.tight_layout()
+
+    def attach_offscreen(self):
+        # Draws into an in-memory Agg buffer instead of a Tk widget
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.background = None
+        # Any full redraw (first show, resize) refreshes the cached background
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def resize(self, width, height):
+        size = (width / self.figure.dpi, height / self.figure.dpi)
+        if tuple(self.figure.get_size_inches()) != size:
+            self.figure.set_size_inches(*size)
+            self.figure.tight_layout()
+            # The cached background no longer fits; force a full redraw
+            self.background = None
+            self.limits = None
+
+    def to_ppm(self):
+        # Binary PPM is the one format tk.PhotoImage reads without extensions
+        rgba = np.asarray(self.canvas.buffer_rgba())
+        height, width = rgba.shape[:2]
+        return b"P6 %d %d 255\n" % (width, height) + rgba[:, :, :3].tobytes()
+
+    def update(self, dates, *series, bands=None):
+        # bands holds an (average, low, high) triple per panel, or None
+        x = mdates.date2num(dates) if len(dates) else []
+        for line, values in zip(self.lines, series):
+            line.set_data(x, values)
+            line.set_marker('o' if len(x) <= self.MAX_MARKERS else '')
+        for panel, (average, band) in enumerate(zip(self.averages, self.bands)):
+            if bands and bands[panel] is not None and len(x):
+                mean, low, high = bands[panel]
+                average.set_data(x, mean)
+                band.set_verts([np.column_stack([np.r_[x, x[::-1]], np.r_[low, high[::-1]]])])
+            else:
+                average.set_data([], [])
+                band.set_verts([])
+        limits = [self.data_limits(x, values) for values in series]
+        if limits == self.limits and self.background is not None:
+            self.blit()
+            return
+        self.limits = limits
+        for line, (xlim, ylim) in zip(self.lines, limits):
+            if xlim:
+                line.axes.set_xlim(*xlim)
+                line.axes.set_ylim(*ylim)
+        self.canvas.draw()
+
+    @staticmethod
+    def data_limits(x, values):
+        if not len(x):
+            return None, None
+        low, high = min(values), max(values)
+        pad = (high - low) * 0.05 or 1
+        # A single day still needs a visible span on the date axis
+        return (x[0] - 0.5, x[-1] + 0.5) if x[0] == x[-1] else (x[0], x[-1]), (low - pad, high + pad)
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_lines()
+
+    def draw_lines(self):
+        for band, line, average in zip(self.bands, self.lines, self.averages):
+            line.axes.draw_artist(band)
+            line.axes.draw_artist(line)
+            line.axes.draw_artist(average)
+
+    def blit(self):
+        self.canvas.restore_region(self.background)
+        self.draw_lines()
+        self.canvas.blit(self.figure.bbox)
@@ -0,0 +1,99 @@
+import time
+
+
+# Monotonic clock for one test. Elapsed time is measured, not counted in
+# ticks, so a busy event loop can delay the display but never the result.
+class SessionClock:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.reset()
+
+    def reset(self, duration=None):
+        self.duration = duration
+        self.started_at = None
+        self.paused_at = None
+        self.stopped_at = None
+        self.paused_total = 0.0
+
+    def start(self, duration=None):
+        self.reset(duration)
+        self.started_at = self.clock()
+
+    def pause(self):
+        if self.is_running and self.paused_at is None:
+            self.paused_at = self.clock()
+
+    def resume(self):
+        if self.paused_at is not None:
+            self.paused_total += self.clock() - self.paused_at
+            self.paused_at = None
+
+    def toggle_pause(self):
+        if self.is_paused:
+            self.resume()
+        else:
+            self.pause()
+        return self.is_paused
+
+    def stop(self):
+        if self.is_running:
+            self.resume()
+            self.stopped_at = self.clock()
+
+    @property
+    def is_running(self):
+        return self.started_at is not None and self.stopped_at is None
+
+    @property
+    def is_paused(self):
+        return self.paused_at is not None
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        if self.stopped_at is not None:
+            end = self.stopped_at
+        elif self.paused_at is not None:
+            end = self.paused_at
+        else:
+            end = self.clock()
+        return end - self.started_at - self.paused_total
+
+    @property
+    def remaining(self):
+        if self.duration is None:
+            return None
+        return max(0.0, self.duration - self.elapsed)
+
+    @property
+    def is_expired(self):
+        return self.duration is not None and self.elapsed >= self.duration
+
+
+# A single repeating after() callback. Starting it again replaces the
+# pending call instead of adding a second chain.
+class Ticker:
+    def __init__(self, widget, interval, callback):
+        self.widget = widget
+        self.interval = interval
+        self.callback = callback
+        self.job = None
+
+    @property
+    def is_active(self):
+        return self.job is not None
+
+    def start(self):
+        self.stop()
+        self.job = self.widget.after(self.interval, self.tick)
+
+    def stop(self):
+        if self.job is not None:
+            self.widget.after_cancel(self.job)
+            self.job = None
+
+    def tick(self):
+        self.job = self.widget.after(self.interval, self.tick)
+        if self.callback() is False:
+            self.stop()
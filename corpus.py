@@ -0,0 +1,175 @@
+import os
+import random
+import string
+from array import array
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+WORDS_PATH = os.path.join(DATA_DIR, "words.txt")
+SENTENCES_PATH = os.path.join(DATA_DIR, "sentences.txt")
+CACHE_DIR = os.path.join(DATA_DIR, "__pycache__")
+
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+# Letters that are rare in English text and awkward to reach on the keyboard
+RARE_LETTERS = set("jkqvxz")
+SYMBOLS = set(string.punctuation + string.digits)
+
+# Passages are long enough that a typist at this speed cannot run out of text
+PASSAGE_WPM = 120
+CHARS_PER_WORD = 5
+
+# Bump when text_features changes so stale caches are recomputed
+FEATURES = 3
+FEATURES_VERSION = 1
+
+
+def text_features(text):
+    words = text.split()
+    letters = [char.lower() for char in text if char.isalpha()]
+    word_length = len(letters) / len(words) if words else 0.0
+    rare = sum(char in RARE_LETTERS for char in letters) / len(letters) if letters else 0.0
+    symbols = sum(char in SYMBOLS or char.isupper() for char in text) / len(text) if text else 0.0
+    return word_length, rare, symbols
+
+
+def passage_length(duration, wpm=PASSAGE_WPM):
+    return duration * wpm * CHARS_PER_WORD / 60
+
+
+def difficulty_score(word_length, rare, symbols):
+    return word_length / CHARS_PER_WORD + 4 * rare + 3 * symbols
+
+
+# Walker's alias method: after an O(n) setup every weighted draw costs one
+# random index and one coin flip, however many entries there are.
+class AliasTable:
+    def __init__(self, weights):
+        count = len(weights)
+        total = sum(weights)
+        self.probability = array("d", [1.0]) * count
+        self.alias = array("l", range(count))
+        scaled = [weight * count / total for weight in weights]
+        small = [index for index, weight in enumerate(scaled) if weight < 1.0]
+        large = [index for index, weight in enumerate(scaled) if weight >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+
+    def __len__(self):
+        return len(self.alias)
+
+    def sample(self, rng):
+        index = rng.randrange(len(self.alias))
+        return index if rng.random() < self.probability[index] else self.alias[index]
+
+
+# A list of texts (one per line) with cached difficulty features. The texts
+# are split into Easy/Medium/Hard buckets by score, each with its own alias
+# table. Features are computed once and saved to a cache file, which is
+# reused for as long as the source file's size and mtime are unchanged.
+class TextIndex:
+    def __init__(self, path, weight=None, cache_dir=None):
+        self.path = path
+        self.cache_path = os.path.join(cache_dir, os.path.basename(path) + ".features") if cache_dir else None
+        with open(path, encoding="utf-8") as source:
+            self.texts = [line.strip() for line in source if line.strip()]
+        self.features = self.load_features() or self.compute_features()
+        self.buckets = {}
+        scores = sorted(range(len(self.texts)), key=self.score)
+        size = len(scores) / len(DIFFICULTIES)
+        for number, difficulty in enumerate(DIFFICULTIES):
+            indices = array("l", scores[round(number * size):round((number + 1) * size)])
+            weights = [weight(index) if weight else 1.0 for index in indices]
+            self.buckets[difficulty] = (indices, AliasTable(weights))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def score(self, index):
+        start = index * FEATURES
+        return difficulty_score(*self.features[start:start + FEATURES])
+
+    def stamp(self):
+        stat = os.stat(self.path)
+        return array("q", [FEATURES_VERSION, stat.st_size, stat.st_mtime_ns, len(self.texts)])
+
+    def compute_features(self):
+        features = array("f")
+        for text in self.texts:
+            features.extend(text_features(text))
+        if self.cache_path:
+            try:
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                with open(self.cache_path, "wb") as cache:
+                    self.stamp().tofile(cache)
+                    features.tofile(cache)
+            except OSError:
+                pass
+        return features
+
+    def load_features(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        stamp = self.stamp()
+        header = array("q")
+        features = array("f")
+        try:
+            with open(self.cache_path, "rb") as cache:
+                header.fromfile(cache, len(stamp))
+                if header != stamp:
+                    return None
+                features.fromfile(cache, len(self.texts) * FEATURES)
+        except (OSError, EOFError):
+            return None
+        return features
+
+    def sample(self, difficulty, rng):
+        indices, table = self.buckets[difficulty]
+        return self.texts[indices[table.sample(rng)]]
+
+
+# Word and sentence lists for every mode, loaded on first use.
+class Corpus:
+    def __init__(self, words_path=WORDS_PATH, sentences_path=SENTENCES_PATH, cache_dir=CACHE_DIR, rng=None):
+        self.words_path = words_path
+        self.sentences_path = sentences_path
+        self.cache_dir = cache_dir
+        self.rng = rng or random.Random()
+        self._words = None
+        self._sentences = None
+
+    @property
+    def words(self):
+        if self._words is None:
+            # Word lists are in frequency order, so common words come up more often
+            self._words = TextIndex(self.words_path, weight=lambda rank: 1 / (rank + 10), cache_dir=self.cache_dir)
+        return self._words
+
+    @property
+    def sentences(self):
+        if self._sentences is None:
+            self._sentences = TextIndex(self.sentences_path, cache_dir=self.cache_dir)
+        return self._sentences
+
+    def word(self, difficulty="Easy"):
+        return self.words.sample(difficulty, self.rng)
+
+    def sentence(self, difficulty="Easy"):
+        return self.sentences.sample(difficulty, self.rng)
+
+    def passage(self, difficulty="Easy", duration=60, wpm=PASSAGE_WPM):
+        target = passage_length(duration, wpm)
+        parts = []
+        length = 0
+        previous = None
+        while length < target:
+            sentence = self.sentence(difficulty)
+            if sentence == previous and len(self.sentences.buckets[difficulty][0]) > 1:
+                continue
+            length += len(sentence) + (1 if parts else 0)
+            parts.append(sentence)
+            previous = sentence
+        return " ".join(parts)
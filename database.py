@@ -0,0 +1,535 @@
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from urllib.parse import quote
+
+from achievements import backfill_achievements
+
+_STOP = object()
+
+
+def create_tables(db_conn):
+    db_conn.execute('''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY,
+        username TEXT UNIQUE,
+        password TEXT,
+        email TEXT
+    )''')
+    db_conn.execute('''CREATE TABLE IF NOT EXISTS progress (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        wpm INTEGER,
+        accuracy REAL,
+        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )''')
+    db_conn.execute('''CREATE TABLE IF NOT EXISTS keystrokes (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        progress_id INTEGER,
+        mode TEXT,
+        seq INTEGER,
+        elapsed_ns INTEGER,
+        expected TEXT,
+        typed TEXT,
+        correct INTEGER,
+        FOREIGN KEY(user_id) REFERENCES users(id),
+        FOREIGN KEY(progress_id) REFERENCES progress(id)
+    )''')
+
+
+def add_progress_indexes(db_conn):
+    # Covers the per-user date range scans of the progress and history views
+    db_conn.execute('CREATE INDEX IF NOT EXISTS idx_progress_user_date ON progress (user_id, date, wpm, accuracy)')
+    db_conn.execute('''CREATE TABLE IF NOT EXISTS daily_stats (
+        user_id INTEGER,
+        day TIMESTAMP,
+        tests INTEGER,
+        best_wpm REAL,
+        total_wpm REAL,
+        total_accuracy REAL,
+        PRIMARY KEY (user_id, day)
+    ) WITHOUT ROWID''')
+    db_conn.execute('''INSERT OR REPLACE INTO daily_stats (user_id, day, tests, best_wpm, total_wpm, total_accuracy)
+        SELECT user_id, substr(date, 1, 10), COUNT(*), MAX(wpm), SUM(wpm), SUM(accuracy)
+        FROM progress GROUP BY user_id, substr(date, 1, 10)''')
+
+
+def add_leaderboard(db_conn):
+    db_conn.execute('ALTER TABLE progress ADD COLUMN mode TEXT')
+    db_conn.execute('ALTER TABLE progress ADD COLUMN difficulty TEXT')
+    db_conn.execute('ALTER TABLE progress ADD COLUMN duration INTEGER')
+    # One personal best row per user and board; a board is a (difficulty, duration)
+    # pair where "All" and 0 stand for every difficulty and every duration.
+    db_conn.execute('''CREATE TABLE IF NOT EXISTS leaderboard (
+        difficulty TEXT,
+        duration INTEGER,
+        user_id INTEGER,
+        progress_id INTEGER,
+        wpm REAL,
+        accuracy REAL,
+        date TIMESTAMP,
+        PRIMARY KEY (difficulty, duration, user_id)
+    ) WITHOUT ROWID''')
+    db_conn.execute('CREATE INDEX IF NOT EXISTS idx_leaderboard_rank ON leaderboard (difficulty, duration, wpm DESC, accuracy DESC)')
+    # Older rows have no difficulty or duration, so they only count towards the overall board
+    db_conn.execute('''INSERT OR REPLACE INTO leaderboard (difficulty, duration, user_id, progress_id, wpm, accuracy, date)
+        SELECT 'All', 0, user_id, id, wpm, accuracy, date FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY wpm DESC, accuracy DESC, id) AS rank
+            FROM progress
+        ) WHERE rank = 1''')
+
+
+def add_bigram_stats(db_conn):
+    # Running per-user totals for every pair of consecutive expected characters
+    db_conn.execute('''CREATE TABLE IF NOT EXISTS bigram_stats (
+        user_id INTEGER,
+        bigram TEXT,
+        count INTEGER,
+        errors INTEGER,
+        total_ns INTEGER,
+        PRIMARY KEY (user_id, bigram)
+    ) WITHOUT ROWID''')
+    db_conn.execute('''INSERT OR REPLACE INTO bigram_stats (user_id, bigram, count, errors, total_ns)
+        SELECT user_id, lower(previous_expected || expected), COUNT(*), SUM(correct = 0), SUM(elapsed_ns - previous_ns)
+        FROM (
+            SELECT user_id, expected, typed, correct, elapsed_ns,
+                   LAG(expected) OVER test AS previous_expected,
+                   LAG(typed) OVER test AS previous_typed,
+                   LAG(elapsed_ns) OVER test AS previous_ns
+            FROM keystrokes
+            WINDOW test AS (PARTITION BY progress_id ORDER BY seq)
+        )
+        WHERE expected != '' AND previous_expected != ''
+          AND typed != char(8) AND previous_typed != char(8)
+        GROUP BY user_id, lower(previous_expected || expected)''')
+
+
+def add_table_indexes(db_conn):
+    # Every paged sort order ends in a unique column, and each has an index
+    # that can be walked backwards from any row without sorting
+    db_conn.execute('CREATE INDEX IF NOT EXISTS idx_progress_user_date_id ON progress (user_id, date)')
+    db_conn.execute('CREATE INDEX IF NOT EXISTS idx_progress_user_wpm ON progress (user_id, wpm)')
+    db_conn.execute('CREATE INDEX IF NOT EXISTS idx_progress_user_accuracy ON progress (user_id, accuracy)')
+    db_conn.execute('DROP INDEX IF EXISTS idx_leaderboard_rank')
+    db_conn.execute('CREATE INDEX IF NOT EXISTS idx_leaderboard_wpm ON leaderboard (difficulty, duration, wpm, accuracy, user_id)')
+    db_conn.execute('CREATE INDEX IF NOT EXISTS idx_leaderboard_accuracy ON leaderboard (difficulty, duration, accuracy, wpm, user_id)')
+    db_conn.execute('CREATE INDEX IF NOT EXISTS idx_leaderboard_date ON leaderboard (difficulty, duration, date, user_id)')
+
+
+def add_achievements(db_conn):
+    # Running aggregates per user and stat, which achievement rules are
+    # checked against, and the achievements each user has unlocked
+    db_conn.execute('''CREATE TABLE IF NOT EXISTS user_stats (
+        user_id INTEGER,
+        stat TEXT,
+        value REAL,
+        PRIMARY KEY (user_id, stat)
+    ) WITHOUT ROWID''')
+    db_conn.execute('''CREATE TABLE IF NOT EXISTS achievements (
+        user_id INTEGER,
+        achievement TEXT,
+        progress_id INTEGER,
+        date TIMESTAMP,
+        PRIMARY KEY (user_id, achievement)
+    ) WITHOUT ROWID''')
+    backfill_achievements(db_conn)
+
+
+def rank_timed_modes(db_conn):
+    # Boards filled before RANKED_MODES also held Practice, Custom Text and
+    # Word Rain results, and results saved before the mode was recorded
+    rebuild_leaderboard(db_conn)
+
+
+def add_elapsed(db_conn):
+    # Seconds actually typed, which is less than duration when a test ends
+    # early or has no time limit. Older results leave it NULL.
+    db_conn.execute('ALTER TABLE progress ADD COLUMN elapsed REAL')
+
+
+# Each entry upgrades the schema by one version; PRAGMA user_version records
+# how many have been applied to a database file.
+MIGRATIONS = [
+    create_tables,
+    add_progress_indexes,
+    add_leaderboard,
+    add_bigram_stats,
+    add_table_indexes,
+    add_achievements,
+    rank_timed_modes,
+    add_elapsed,
+]
+
+
+def migrate(db_conn):
+    version = db_conn.execute('PRAGMA user_version').fetchone()[0]
+    for migration in MIGRATIONS[version:]:
+        migration(db_conn)
+    db_conn.execute(f'PRAGMA user_version = {len(MIGRATIONS)}')
+
+
+# Modes with a set passage and a timer; only their results are ranked
+RANKED_MODES = ("Timed Test", "Adaptive")
+
+
+def insert_progress(db_conn, user_id, wpm, accuracy, date, mode=None, difficulty=None, duration=None, elapsed=None):
+    progress_id = db_conn.execute('''INSERT INTO progress (user_id, wpm, accuracy, date, mode, difficulty, duration, elapsed)
+                                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                                  (user_id, wpm, accuracy, date, mode, difficulty, duration, elapsed)).lastrowid
+    db_conn.execute('''INSERT INTO daily_stats (user_id, day, tests, best_wpm, total_wpm, total_accuracy)
+        VALUES (?, substr(?, 1, 10), 1, ?, ?, ?)
+        ON CONFLICT (user_id, day) DO UPDATE SET
+            tests = tests + 1,
+            best_wpm = MAX(best_wpm, excluded.best_wpm),
+            total_wpm = total_wpm + excluded.total_wpm,
+            total_accuracy = total_accuracy + excluded.total_accuracy''',
+                    (user_id, date, wpm, wpm, accuracy))
+    if mode in RANKED_MODES:
+        update_leaderboard(db_conn, progress_id, user_id, wpm, accuracy, date, difficulty, duration)
+    return progress_id
+
+
+def rebuild_daily_stats(db_conn):
+    # Recounts every day from progress, after rows were written in bulk
+    db_conn.execute('DELETE FROM daily_stats')
+    db_conn.execute('''INSERT INTO daily_stats (user_id, day, tests, best_wpm, total_wpm, total_accuracy)
+        SELECT user_id, substr(date, 1, 10), COUNT(*), MAX(wpm), SUM(wpm), SUM(accuracy)
+        FROM progress GROUP BY user_id, substr(date, 1, 10)''')
+
+
+def rebuild_leaderboard(db_conn):
+    # Each user's best per difficulty and duration is found first, and the
+    # boards (as in leaderboard_boards) are ranked from those few rows. Ties
+    # go to the earlier result, as update_leaderboard keeps the first.
+    db_conn.execute('DELETE FROM leaderboard')
+    db_conn.execute(f'''INSERT INTO leaderboard (difficulty, duration, user_id, progress_id, wpm, accuracy, date)
+        WITH best AS (
+            SELECT * FROM (
+                SELECT id, user_id, wpm, accuracy, date, difficulty, duration,
+                       ROW_NUMBER() OVER (PARTITION BY user_id, difficulty, duration ORDER BY wpm DESC, accuracy DESC, id) AS rank
+                FROM progress
+                WHERE mode IN ({", ".join("?" * len(RANKED_MODES))})
+            ) WHERE rank = 1
+        ), boards AS (
+            SELECT 'All' AS board_difficulty, 0 AS board_duration, id, user_id, wpm, accuracy, date FROM best
+            UNION ALL SELECT difficulty, 0, id, user_id, wpm, accuracy, date FROM best WHERE difficulty != ''
+            UNION ALL SELECT 'All', duration, id, user_id, wpm, accuracy, date FROM best WHERE duration
+            UNION ALL SELECT difficulty, duration, id, user_id, wpm, accuracy, date FROM best WHERE difficulty != '' AND duration
+        )
+        SELECT board_difficulty, board_duration, user_id, id, wpm, accuracy, date FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY board_difficulty, board_duration, user_id
+                                         ORDER BY wpm DESC, accuracy DESC, id) AS rank
+            FROM boards
+        ) WHERE rank = 1''', RANKED_MODES)
+
+
+def leaderboard_boards(difficulty, duration):
+    boards = [("All", 0)]
+    if difficulty:
+        boards.append((difficulty, 0))
+    if duration:
+        boards.append(("All", duration))
+    if difficulty and duration:
+        boards.append((difficulty, duration))
+    return boards
+
+
+def update_leaderboard(db_conn, progress_id, user_id, wpm, accuracy, date, difficulty, duration):
+    # Each upsert is a single primary key lookup and only replaces a worse result
+    db_conn.executemany('''INSERT INTO leaderboard (difficulty, duration, user_id, progress_id, wpm, accuracy, date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (difficulty, duration, user_id) DO UPDATE SET
+            progress_id = excluded.progress_id,
+            wpm = excluded.wpm,
+            accuracy = excluded.accuracy,
+            date = excluded.date
+        WHERE excluded.wpm > leaderboard.wpm
+           OR (excluded.wpm = leaderboard.wpm AND excluded.accuracy > leaderboard.accuracy)''',
+                        [(board_difficulty, board_duration, user_id, progress_id, wpm, accuracy, date)
+                         for board_difficulty, board_duration in leaderboard_boards(difficulty, duration)])
+
+
+PAGE_SIZE = 100
+
+# Sort orders for the paged tables, newest or best first. The last key of
+# each is unique, so a page can start right after the last row of the one
+# before it (keyset pagination) instead of counting rows with OFFSET.
+HISTORY_SORTS = {
+    "date": ("date", "id"),
+    "wpm": ("wpm", "id"),
+    "accuracy": ("accuracy", "id"),
+}
+LEADERBOARD_SORTS = {
+    "wpm": ("l.wpm", "l.accuracy", "l.user_id"),
+    "accuracy": ("l.accuracy", "l.wpm", "l.user_id"),
+    "date": ("l.date", "l.user_id"),
+}
+
+
+def _cursor_column(key):
+    # Dates are compared as stored; reading them through the timestamp
+    # converter would hand back a value that no longer matches the column
+    return f'CAST({key} AS TEXT)' if key.endswith('date') else key
+
+
+def keyset_page(db_conn, columns, tables, where, params, keys, after=None, before=None, limit=PAGE_SIZE):
+    # Returns up to limit rows following the key `after` (or leading up to the
+    # key `before`), in display order, together with each row's sort key
+    sql = f'SELECT {", ".join(columns)}, {", ".join(map(_cursor_column, keys))} FROM {tables} WHERE {where}'
+    params = tuple(params)
+    placeholders = ", ".join("?" * len(keys))
+    if before is not None:
+        sql += f' AND ({", ".join(keys)}) > ({placeholders}) ORDER BY {", ".join(keys)} LIMIT ?'
+        params += tuple(before)
+    else:
+        if after is not None:
+            sql += f' AND ({", ".join(keys)}) < ({placeholders})'
+            params += tuple(after)
+        sql += f' ORDER BY {", ".join(key + " DESC" for key in keys)} LIMIT ?'
+    rows = db_conn.execute(sql, params + (limit,)).fetchall()
+    if before is not None:
+        rows.reverse()
+    return [row[:len(columns)] for row in rows], [row[len(columns):] for row in rows]
+
+
+def history_page(db_conn, user_id, sort="date", after=None, before=None, limit=PAGE_SIZE):
+    return keyset_page(db_conn, ("date", "wpm", "accuracy", "mode", "difficulty", "duration"), 'progress',
+                       'user_id = ?', (user_id,), HISTORY_SORTS[sort], after, before, limit)
+
+
+def leaderboard_page(db_conn, difficulty="All", duration=0, sort="wpm", after=None, before=None, limit=PAGE_SIZE):
+    return keyset_page(db_conn, ("u.username", "l.wpm", "l.accuracy", "l.date"), 'leaderboard l JOIN users u ON l.user_id = u.id',
+                       'l.difficulty = ? AND l.duration = ?', (difficulty, duration), LEADERBOARD_SORTS[sort], after, before, limit)
+
+
+DEFAULT_PATH = 'typing_data.db'
+ENV_VAR = "DIGITYPE_DB"
+
+# Several copies of the app may share one database file. Readers never wait
+# for the writer in WAL mode; a writer waits up to busy_timeout for another
+# to commit, then backs off and retries a few times before giving up.
+PRAGMAS = [
+    ('busy_timeout', 5000),
+    ('journal_mode', 'WAL'),
+    # Commits are durable once the WAL is checkpointed, not on every fsync
+    ('synchronous', 'NORMAL'),
+    # 16 MB page cache and up to 256 MB read through a memory map
+    ('cache_size', -16384),
+    ('mmap_size', 256 * 1024 * 1024),
+    ('temp_store', 'MEMORY'),
+]
+
+WRITE_RETRIES = 6
+RETRY_DELAY = 0.05
+
+
+def path_from_env():
+    return os.environ.get(ENV_VAR) or DEFAULT_PATH
+
+
+def is_locked(error):
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in str(error) or "busy" in str(error))
+
+
+def retry_locked(func, *args, retries=WRITE_RETRIES, delay=RETRY_DELAY):
+    # Doubles the pause after each failure, with jitter so writers that gave
+    # up together do not all come back at once
+    for attempt in range(retries + 1):
+        try:
+            return func(*args)
+        except sqlite3.OperationalError as error:
+            if attempt == retries or not is_locked(error):
+                raise
+            time.sleep(delay * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+def connect(path=None, **connect_kwargs):
+    # Transactions are opened explicitly, by the worker or a bulk transfer
+    db_conn = sqlite3.connect(path or path_from_env(), isolation_level=None, **connect_kwargs)
+    for name, value in PRAGMAS:
+        # Switching a new file to WAL needs a moment of exclusive access
+        retry_locked(db_conn.execute, f'PRAGMA {name}={value}')
+    return db_conn
+
+
+def connect_readonly(path=None):
+    # For reading a file without changing it: no journal mode switch, no
+    # -wal or -shm files left behind, and a missing file is an error
+    # instead of a new empty database
+    path = os.path.abspath(path or path_from_env())
+    return sqlite3.connect(f'file:{quote(path)}?mode=ro', uri=True)
+
+
+def begin(db_conn):
+    # Takes the write lock up front; a deferred transaction that later tries
+    # to write can fail at once, without waiting, if another copy wrote first
+    retry_locked(db_conn.execute, 'BEGIN IMMEDIATE')
+
+
+# Owns the SQLite connection on a dedicated thread. Requests are queued and
+# answered through futures; every write that is waiting when the worker wakes
+# up goes into a single transaction, so a burst of writes costs one fsync.
+class DatabaseWorker(threading.Thread):
+    def __init__(self, path=None, **connect_kwargs):
+        super().__init__(name="digitype-db", daemon=True)
+        self.path = path
+        self.connect_kwargs = connect_kwargs
+        self.requests = queue.Queue()
+        # Set if the connection could not be opened; every request then fails with it
+        self.error = None
+        self.lock = threading.Lock()
+        self.start()
+
+    def submit(self, func, *args, write=False):
+        future = Future()
+        with self.lock:
+            if self.error is None:
+                self.requests.put((future, func, args, write))
+                return future
+        future.set_exception(self.error)
+        return future
+
+    def execute(self, sql, params=()):
+        return self.submit(_execute, sql, params, write=True)
+
+    def query(self, sql, params=()):
+        return self.submit(_fetchall, sql, params)
+
+    def query_one(self, sql, params=()):
+        return self.submit(_fetchone, sql, params)
+
+    def close(self):
+        if self.is_alive():
+            self.requests.put(_STOP)
+            self.join()
+
+    def connect(self):
+        return connect(self.path, **self.connect_kwargs)
+
+    def run(self):
+        try:
+            db_conn = self.connect()
+        except Exception as error:
+            self.fail_all(error)
+            return
+        try:
+            running = True
+            while running:
+                batch = [self.requests.get()]
+                while True:
+                    try:
+                        batch.append(self.requests.get_nowait())
+                    except queue.Empty:
+                        break
+                if _STOP in batch:
+                    running = False
+                    batch = [request for request in batch if request is not _STOP]
+                self.process(db_conn, batch)
+        finally:
+            db_conn.close()
+
+    def fail_all(self, error):
+        with self.lock:
+            self.error = error
+            while True:
+                try:
+                    request = self.requests.get_nowait()
+                except queue.Empty:
+                    return
+                if request is not _STOP and request[0].set_running_or_notify_cancel():
+                    request[0].set_exception(error)
+
+    def process(self, db_conn, batch):
+        finished = []
+        in_transaction = False
+        for future, func, args, write in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if write and not in_transaction:
+                    begin(db_conn)
+                    in_transaction = True
+                if write:
+                    # A failing write only rolls back itself, not the whole group
+                    db_conn.execute('SAVEPOINT request')
+                    try:
+                        result = func(db_conn, *args)
+                    except BaseException:
+                        db_conn.execute('ROLLBACK TO request')
+                        raise
+                    finally:
+                        db_conn.execute('RELEASE request')
+                    finished.append((future, result))
+                else:
+                    future.set_result(func(db_conn, *args))
+            except Exception as error:
+                future.set_exception(error)
+        if in_transaction:
+            try:
+                retry_locked(db_conn.execute, 'COMMIT')
+            except Exception as error:
+                db_conn.execute('ROLLBACK')
+                for future, _ in finished:
+                    future.set_exception(error)
+                return
+        for future, result in finished:
+            future.set_result(result)
+
+
+def _execute(db_conn, sql, params):
+    cursor = db_conn.execute(sql, params)
+    return cursor.lastrowid if sql.lstrip().upper().startswith('INSERT') else cursor.rowcount
+
+
+def _fetchall(db_conn, sql, params):
+    return db_conn.execute(sql, params).fetchall()
+
+
+def _fetchone(db_conn, sql, params):
+    return db_conn.execute(sql, params).fetchone()
+
+
+# Hands finished futures back to the Tk thread. Worker threads only touch a
+# thread-safe queue; the widget polls it with after() and runs the callbacks.
+class CallbackDispatcher:
+    def __init__(self, widget, interval=15):
+        self.widget = widget
+        self.interval = interval
+        self.completed = queue.SimpleQueue()
+        self.pending = set()
+        self.widget.after(self.interval, self.poll)
+
+    def then(self, future, callback=None, errback=None):
+        self.pending.add(future)
+        future.add_done_callback(lambda done: self.completed.put((done, callback, errback)))
+        return future
+
+    def poll(self):
+        self.widget.after(self.interval, self.poll)
+        while True:
+            try:
+                completed = self.completed.get_nowait()
+            except queue.Empty:
+                return
+            self.dispatch(*completed)
+
+    def dispatch(self, future, callback, errback):
+        self.pending.discard(future)
+        error = future.exception()
+        if error is None:
+            if callback:
+                callback(future.result())
+        elif errback:
+            errback(error)
+        else:
+            raise error
+
+    def drain(self, timeout=None):
+        # Wait for everything in flight and run its callbacks right away
+        while self.pending:
+            self.dispatch(*self.completed.get(timeout=timeout))
@@ -1,50 +1,113 @@
+import startup
+import argparse
 import sqlite3
 import time
 import random
+import math
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import pygame
-import os
 from datetime import datetime, timedelta
-from tkcalendar import DateEntry
-import matplotlib.dates as mdates
+from startup import LazyModule, mark
+from profiling import Profiler, LagMonitor, ProfileOverlay, enabled_from_env
+from audio import NullAudioEngine, create_audio_engine
+from clock import SessionClock, Ticker
+from passages import PassageFile
+from corpus import Corpus, passage_length
+from adaptive import AdaptivePractice, update_bigram_stats, weakest_bigrams
+from achievements import AchievementTracker, achievement_names, load_user_stats, record_result
+from keystrokes import KeystrokeLog, BACKSPACE, save_keystrokes
+from session import TypingSession, WordRainSession
+from database import (DatabaseWorker, CallbackDispatcher, begin, connect, connect_readonly, path_from_env, migrate, insert_progress, history_page, leaderboard_page,
+                      HISTORY_SORTS, LEADERBOARD_SORTS)
+from tables import PagedTable
+from targetview import TargetView
+from views import ViewRegistry, restyle
+
+# Charting, analytics and the date picker are only imported when first used
+analytics = LazyModule("analytics")
+chartdata = LazyModule("chartdata")
+chartrender = LazyModule("chartrender")
+tkcalendar = LazyModule("tkcalendar")
+transfer = LazyModule("transfer")
+
+mark("imports")
 
 # Register adapters and converters for datetime
 sqlite3.register_adapter(datetime, lambda dt: dt.isoformat())
 sqlite3.register_converter("timestamp", lambda s: datetime.fromisoformat(s.decode("utf-8")))
 
+# Keyclicks per second above which clicks are merged into the one playing
+CLICK_RATE_LIMIT = 25
+
+# How often the countdown label is refreshed
+TIMER_TICK_MS = 100
+
+# Panels of the chart views: (title, y label, color)
+PROGRESS_PANELS = [('WPM Progress', 'Words Per Minute', 'blue')]
+HISTORY_PANELS = [('WPM Over Selected Period', 'Words Per Minute', 'blue'),
+                  ('Accuracy Over Selected Period', 'Accuracy (%)', 'green')]
+
+# Screens shown without the navbar, and screens rebuilt for each login
+LOGGED_OUT_VIEWS = {"login", "account"}
+USER_VIEWS = ("progress", "history", "stats")
+
+# Time ranges of the stats panel, in days up to today
+STATS_RANGES = {"Last 7 days": 7, "Last 30 days": 30, "Last year": 365, "All time": None}
+
+# Rows of the stats panel: (label, summary key, format)
+STATS_ROWS = [("Tests", "tests", "{:.0f}"),
+              ("Time typed", "minutes", "{:.0f} min"),
+              ("Average WPM", "average_wpm", "{:.1f}"),
+              ("Last 10 tests", "recent_wpm", "{:.1f} WPM"),
+              ("Best WPM", "best_wpm", "{:.0f}"),
+              ("Slowest 10%", "p10", "{:.0f} WPM or less"),
+              ("Median WPM", "p50", "{:.0f}"),
+              ("Fastest 10%", "p90", "{:.0f} WPM or more"),
+              ("Trend", "trend", "{:+.2f} WPM per day"),
+              ("Consistency", "consistency", "{:.0%}"),
+              ("Personal bests set", "records", "{:.0f}"),
+              ("Average accuracy", "average_accuracy", "{:.2f}%")]
+
+# Word Rain falls at this many pixels per second and redraws at about 30 fps
+WORD_RAIN_SPEED = 100
+WORD_RAIN_FRAME_MS = 33
+
+DURATIONS = {
+    "30-seconds": 30,
+    "1-minute": 60,
+    "3-minute": 180,
+    "5-minute": 300
+}
+
 class DigiType(tk.Tk):
-    def __init__(self):
+    def __init__(self, profile=False, db_path=None):
         super().__init__()
         self.title("Digitype Dojo")
         self.geometry("800x600")
-        self.db_conn = sqlite3.connect('typing_data.db', detect_types=sqlite3.PARSE_DECLTYPES)
-        self.db_cursor = self.db_conn.cursor()
+        mark("tk init")
+        # Hot handlers are only wrapped with timers when profiling is on
+        self.profiler = Profiler(profile or enabled_from_env())
+        self.profiler.instrument(self)
+        # Other copies of the app may write to the same file at any time
+        self.db = DatabaseWorker(db_path or path_from_env(), detect_types=sqlite3.PARSE_DECLTYPES)
+        self.db_callbacks = CallbackDispatcher(self)
         self.create_tables()
+        mark("database worker")
 
         self.test_duration = 30
         self.remaining_time = self.test_duration
         self.is_paused = False
+        # One clock for whichever test is running; each view has a single tick
+        self.session_clock = SessionClock()
+        self.test_ticker = Ticker(self, TIMER_TICK_MS, self.on_test_tick)
+        self.word_rain_ticker = Ticker(self, WORD_RAIN_FRAME_MS, self.word_rain_tick)
+        self.word_speed = 1000
 
-        self.texts = {
-            "Easy": [
-                "The quick brown fox jumps over the lazy dog.",
-                "A journey of a thousand miles begins with a single step.",
-                "To be or not to be, that is the question."
-            ],
-            "Medium": [
-                "All that glitters is not gold.",
-                "A picture is worth a thousand words.",
-                "Actions speak louder than words."
-            ],
-            "Hard": [
-                "Beauty is in the eye of the beholder.",
-                "Better late than never.",
-                "Birds of a feather flock together."
-            ]
-        }
+        # Passages and Word Rain words come from the on-disk corpus, indexed on first use
+        self.corpus = Corpus()
+        self.adaptive = None
+        self.weak_bigrams = []
 
         self.dark_mode = False
         self.font_size = 14
@@ -53,42 +116,88 @@ class DigiType(tk.Tk):
         self.typing_mode = "Timed Test"
         self.difficulty_level = "Easy"
         self.current_user = None
+        self.keystroke_log = KeystrokeLog()
+        # Test logic lives in the sessions; both share the clock and keystroke log
+        self.session = TypingSession(self.session_clock, self.keystroke_log)
+        self.word_rain = WordRainSession(WORD_RAIN_SPEED, 600, self.session_clock, self.keystroke_log)
+        # Chart images are rendered off the Tk thread once a chart view is opened
+        self.chart_renderer = None
+        self.chart_views = {}
+        self.last_progress_id = None
+        # The user's results as arrays, read on the first chart or stats view
+        self.user_history = None
+        self.user_history_pending = None
+        self.passage_file = None
+        self.last_edit_at = None
+        # Achievement stats are loaded at login and kept current after every test
         self.achievements = []
+        self.new_achievements = []
+        self.create_shell()
         self.load_achievements()
         self.create_login_page()
-
-        pygame.mixer.init()
-        self.key_sound = self.load_sound("key_press.mp3")
-        self.complete_sound = self.load_sound("complete.mp3")
-
-    def load_sound(self, filename):
-        if os.path.exists(filename):
-            return pygame.mixer.Sound(filename)
-        print(f"Warning: Sound file {filename} not found.")
-        return None
+        mark("login page")
+        if self.profiler.enabled:
+            self.start_profiling()
+
+        # Audio is loaded off the Tk thread once the first frame is up
+        self.audio = NullAudioEngine()
+        self.audio_failed = False
+        self.audio_lock = threading.Lock()
+        self.audio_thread = threading.Thread(target=self.init_audio, name="digitype-audio", daemon=True)
+        self.after_idle(self.audio_thread.start)
+
+    def init_audio(self):
+        self.load_sound("key_press.mp3", "key")
+        self.load_sound("complete.mp3", "complete")
+        mark("audio")
+
+    def start_audio_engine(self):
+        with self.audio_lock:
+            if not self.audio.enabled and not self.audio_failed:
+                audio = create_audio_engine(max_click_rate=CLICK_RATE_LIMIT)
+                self.audio_failed = not audio.enabled
+                self.audio = audio
+        return self.audio
+
+    def load_sound(self, filename, name=None):
+        return self.start_audio_engine().load(name or filename, filename)
 
     def create_tables(self):
-        self.db_cursor.execute('''CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY,
-            username TEXT UNIQUE,
-            password TEXT,
-            email TEXT
-        )''')
-        self.db_cursor.execute('''CREATE TABLE IF NOT EXISTS progress (
-            id INTEGER PRIMARY KEY,
-            user_id INTEGER,
-            wpm INTEGER,
-            accuracy REAL,
-            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )''')
-        self.db_conn.commit()
+        self.db_callbacks.then(self.db.submit(migrate, write=True), errback=self.on_database_error)
+
+    def on_database_error(self, error):
+        messagebox.showerror("Database Unavailable", f"Results cannot be loaded or saved: {error}")
+
+    def create_shell(self):
+        # One navbar and one container for the whole session; screens are
+        # built on first visit and swapped in and out of the container
+        self.navbar = self.create_navbar(self)
+        self.view_area = tk.Frame(self, bg=self.bg_color)
+        self.view_area.pack(fill=tk.BOTH, expand=True)
+        self.views = ViewRegistry(self.view_area)
+        self.views.register("login", self.build_login_page, on_show=self.clear_login_page, padx=20, pady=20)
+        self.views.register("account", self.build_account_page, on_show=self.clear_account_page, padx=20, pady=20)
+        self.views.register("home", self.build_homepage)
+        self.views.register("test", self.build_typing_test, on_hide=self.reset_test, padx=20, pady=20)
+        self.views.register("progress", self.build_progress_view, refresh=self.show_progress_chart, padx=20, pady=20)
+        self.views.register("word rain", self.build_word_rain, on_show=self.reset_word_rain, on_hide=self.word_rain_ticker.stop)
+        self.views.register("history", self.build_history_view, refresh=self.refresh_history, padx=20, pady=20)
+        self.views.register("leaderboard", self.build_leaderboard, refresh=self.update_leaderboard, padx=20, pady=20)
+        self.views.register("achievements", self.build_achievements, refresh=self.refresh_achievements, padx=20, pady=20)
+        self.views.register("stats", self.build_stats_view, refresh=self.refresh_stats, padx=20, pady=20)
+
+    def show_view(self, name):
+        if name in LOGGED_OUT_VIEWS:
+            self.navbar.pack_forget()
+        else:
+            self.navbar.pack(fill=tk.X, before=self.view_area)
+        self.views.show(name)
 
     def create_login_page(self):
-        self.clear_widgets()
+        self.show_view("login")
 
-        login_frame = tk.Frame(self, bg=self.bg_color)
-        login_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+    def build_login_page(self, parent):
+        login_frame = tk.Frame(parent, bg=self.bg_color)
 
         tk.Label(login_frame, text="Login", font=("Arial", 24), bg=self.bg_color, fg=self.font_color).pack(pady=20)
         self.create_entry(login_frame, "Username:", "username_entry")
@@ -96,12 +205,16 @@ class DigiType(tk.Tk):
 
         tk.Button(login_frame, text="Login", command=self.login, font=("Arial", 14), bg="#3498db", fg="white").pack(pady=10)
         tk.Button(login_frame, text="Create Account", command=self.create_account_page, font=("Arial", 14), bg="#2ecc71", fg="white").pack(pady=10)
+        return login_frame
+
+    def clear_login_page(self):
+        self.password_entry.delete(0, tk.END)
 
     def create_account_page(self):
-        self.clear_widgets()
+        self.show_view("account")
 
-        account_frame = tk.Frame(self, bg=self.bg_color)
-        account_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+    def build_account_page(self, parent):
+        account_frame = tk.Frame(parent, bg=self.bg_color)
 
         tk.Label(account_frame, text="Create Account", font=("Arial", 24), bg=self.bg_color, fg=self.font_color).pack(pady=20)
         self.create_entry(account_frame, "Username:", "new_username_entry")
@@ -110,6 +223,11 @@ class DigiType(tk.Tk):
 
         tk.Button(account_frame, text="Create Account", command=self.create_account, font=("Arial", 14), bg="#3498db", fg="white").pack(pady=10)
         tk.Button(account_frame, text="Back to Login", command=self.create_login_page, font=("Arial", 14), bg="#e74c3c", fg="white").pack(pady=10)
+        return account_frame
+
+    def clear_account_page(self):
+        for entry in (self.new_username_entry, self.new_password_entry, self.email_entry):
+            entry.delete(0, tk.END)
 
     def create_entry(self, parent, label_text, attr_name, **kwargs):
         tk.Label(parent, text=label_text, font=("Arial", 14), bg=self.bg_color, fg=self.font_color).pack(pady=5)
@@ -120,10 +238,16 @@ class DigiType(tk.Tk):
     def login(self):
         username = self.username_entry.get()
         password = self.password_entry.get()
-        self.db_cursor.execute('SELECT id FROM users WHERE username=? AND password=?', (username, password))
-        user = self.db_cursor.fetchone()
+        future = self.db.query_one('SELECT id FROM users WHERE username=? AND password=?', (username, password))
+        return self.db_callbacks.then(future, self.on_login_result)
+
+    def on_login_result(self, user):
         if user:
             self.current_user = user[0]
+            self.refresh_weak_bigrams()
+            self.load_achievements()
+            future = self.db.query_one('SELECT MAX(id) FROM progress WHERE user_id=?', (self.current_user,))
+            self.db_callbacks.then(future, lambda row: self.set_last_progress_id(row[0]))
             self.create_homepage()
         else:
             messagebox.showerror("Login Failed", "Invalid username or password")
@@ -132,17 +256,20 @@ class DigiType(tk.Tk):
         username = self.new_username_entry.get()
         password = self.new_password_entry.get()
         email = self.email_entry.get()
-        try:
-            self.db_cursor.execute('INSERT INTO users (username, password, email) VALUES (?, ?, ?)', (username, password, email))
-            self.db_conn.commit()
-            messagebox.showinfo("Account Created", "Account created successfully. Please login.")
-            self.create_login_page()
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Account Creation Failed", "Username already exists")
+        future = self.db.execute('INSERT INTO users (username, password, email) VALUES (?, ?, ?)', (username, password, email))
+        return self.db_callbacks.then(future, self.on_account_created, self.on_account_error)
 
-    def create_navbar(self, parent_frame):
-        navbar = tk.Frame(parent_frame, bg="#333")
-        navbar.pack(fill=tk.X)
+    def on_account_created(self, user_id):
+        messagebox.showinfo("Account Created", "Account created successfully. Please login.")
+        self.create_login_page()
+
+    def on_account_error(self, error):
+        if not isinstance(error, sqlite3.IntegrityError):
+            raise error
+        messagebox.showerror("Account Creation Failed", "Username already exists")
+
+    def create_navbar(self, parent):
+        navbar = tk.Frame(parent, bg="#333")
 
         buttons = [
             ("Home", self.create_homepage),
@@ -152,6 +279,7 @@ class DigiType(tk.Tk):
             ("Typing History", self.show_typing_history),
             ("Leaderboard", self.show_leaderboard),
             ("Achievements", self.show_achievements),
+            ("Stats", self.show_stats),
             ("Settings", self.open_settings),
             ("Logout", self.logout)
         ]
@@ -159,35 +287,38 @@ class DigiType(tk.Tk):
         for text, command in buttons:
             side = tk.LEFT if text not in ["Settings", "Logout"] else tk.RIGHT
             tk.Button(navbar, text=text, command=command, bg="#333", fg="white", relief=tk.FLAT).pack(side=side, padx=10, pady=5)
+        return navbar
 
     def create_homepage(self):
-        self.clear_widgets()
-
-        self.home_frame = tk.Frame(self, bg=self.bg_color)
-        self.home_frame.pack(fill=tk.BOTH, expand=True)
+        self.show_view("home")
 
-        self.create_navbar(self.home_frame)
+    def build_homepage(self, parent):
+        home_frame = tk.Frame(parent, bg=self.bg_color)
 
-        tk.Label(self.home_frame, text="Digitype Dojo", font=("Arial", 24), bg=self.bg_color, fg=self.font_color).pack(pady=20)
-        tk.Button(self.home_frame, text="Start Typing Test", command=self.create_widgets, font=("Arial", 16), bg="#3498db", fg="white").pack(pady=10)
-        tk.Button(self.home_frame, text="View Progress", command=self.update_progress_chart, font=("Arial", 16), bg="#2ecc71", fg="white").pack(pady=10)
+        tk.Label(home_frame, text="Digitype Dojo", font=("Arial", 24), bg=self.bg_color, fg=self.font_color).pack(pady=20)
+        tk.Button(home_frame, text="Start Typing Test", command=self.create_widgets, font=("Arial", 16), bg="#3498db", fg="white").pack(pady=10)
+        tk.Button(home_frame, text="View Progress", command=self.update_progress_chart, font=("Arial", 16), bg="#2ecc71", fg="white").pack(pady=10)
+        return home_frame
 
     def create_widgets(self):
-        self.clear_widgets()
+        self.show_view("test")
 
-        main_frame = tk.Frame(self, bg=self.bg_color)
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+    def build_typing_test(self, parent):
+        main_frame = tk.Frame(parent, bg=self.bg_color)
 
-        self.create_navbar(main_frame)
-
-        self.text_display = tk.Label(main_frame, text="Click Start to Begin", font=("Arial", self.font_size), bg=self.bg_color, fg=self.font_color, wraplength=700, justify="left")
+        # The passage is coloured character by character as it is typed
+        self.text_display = TargetView(main_frame, self.session.scoring, font=("Arial", self.font_size), bg=self.bg_color, fg=self.font_color)
         self.text_display.pack(pady=10)
 
-        self.typing_input = tk.Entry(main_frame, font=("Arial", self.font_size), width=80, bg=self.bg_color, fg=self.font_color)
+        # Every edit is reported to the scoring engine as a delta (action, index, text)
+        validate_command = (self.register(self.on_input_edit), "%d", "%i", "%S")
+        self.typing_input = tk.Entry(main_frame, font=("Arial", self.font_size), width=80, bg=self.bg_color, fg=self.font_color,
+                                     validate="key", validatecommand=validate_command)
         self.typing_input.pack(pady=10)
         self.typing_input.bind("<KeyRelease>", self.on_text_change)
+        self.set_target_text("Click Start to Begin")
 
-        self.timer_label = tk.Label(main_frame, text="Time Left: 30s", font=("Arial", self.font_size), bg=self.bg_color, fg=self.font_color)
+        self.timer_label = tk.Label(main_frame, text=f"Time Left: {self.test_duration}s", font=("Arial", self.font_size), bg=self.bg_color, fg=self.font_color)
         self.timer_label.pack(pady=10)
 
         btn_frame = tk.Frame(main_frame, bg=self.bg_color)
@@ -197,12 +328,10 @@ class DigiType(tk.Tk):
         self.create_button(btn_frame, "Reset", self.reset_test, "#e74c3c")
         self.create_button(btn_frame, "Upload Text File", self.upload_text_file, "#9b59b6")
 
-        self.create_combobox(main_frame, "Select Duration", ["30-seconds", "1-minute", "3-minute", "5-minute"], self.set_test_duration)
-        self.create_combobox(main_frame, "Select Mode", ["Timed Test", "Practice Mode", "Custom Text"], self.set_typing_mode)
+        self.create_combobox(main_frame, "Select Duration", list(DURATIONS), self.set_test_duration)
+        self.create_combobox(main_frame, "Select Mode", ["Timed Test", "Practice Mode", "Custom Text", "Adaptive"], self.set_typing_mode)
         self.create_combobox(main_frame, "Select Difficulty", ["Easy", "Medium", "Hard"], self.set_difficulty_level)
-
-        self.chart_area = tk.Frame(main_frame, bg=self.bg_color)
-        self.chart_area.pack(pady=10, fill=tk.BOTH, expand=True)
+        return main_frame
 
     def create_button(self, parent, text, command, bg_color):
         tk.Button(parent, text=text, command=command, bg=bg_color, fg="white").pack(side=tk.LEFT, padx=5)
@@ -212,368 +341,475 @@ class DigiType(tk.Tk):
         combobox.set(default_text)
         combobox.pack(pady=10)
         combobox.bind("<<ComboboxSelected>>", command)
+        return combobox
 
     def set_test_duration(self, event):
-        duration_map = {
-            "30-seconds": 30,
-            "1-minute": 60,
-            "3-minute": 180,
-            "5-minute": 300
-        }
-        self.test_duration = duration_map[self.duration_spinner.get()]
+        self.test_duration = DURATIONS[event.widget.get()]
         self.remaining_time = self.test_duration
         self.timer_label.config(text=f"Time Left: {self.remaining_time}s")
 
     def set_typing_mode(self, event):
-        self.typing_mode = self.mode_spinner.get()
+        self.typing_mode = event.widget.get()
 
     def set_difficulty_level(self, event):
-        self.difficulty_level = self.difficulty_spinner.get()
+        self.difficulty_level = event.widget.get()
 
     def start_test(self):
         if self.typing_mode == "Timed Test":
-            self.text_display.config(text=random.choice(self.texts[self.difficulty_level]) * 10)
+            self.set_target_text(self.corpus.passage(self.difficulty_level, self.test_duration))
+        elif self.typing_mode == "Adaptive":
+            self.set_target_text(self.adaptive_passage())
         elif self.typing_mode == "Practice Mode":
-            self.text_display.config(text="Practice Mode: Type anything you want.")
+            self.set_target_text("Practice Mode: Type anything you want.")
         elif self.typing_mode == "Custom Text":
-            self.text_display.config(text="Custom Text Mode: Enter your custom text below.")
+            self.set_target_text("Custom Text Mode: Enter your custom text below.")
             self.typing_input.bind("<Return>", self.set_custom_text)
 
         self.typing_input.delete(0, tk.END)
         self.typing_input.focus()
-        self.start_time = time.time()
         self.remaining_time = self.test_duration
         self.timer_label.config(text=f"Time Left: {self.remaining_time}s")
         self.is_paused = False
-        self.update_timer()
+        self.session.start(self.test_duration)
+        self.test_ticker.start()
+
+    def adaptive_passage(self):
+        if self.adaptive is None:
+            self.adaptive = AdaptivePractice(self.corpus.words.texts)
+        passage = self.adaptive.passage(self.weak_bigrams, passage_length(self.test_duration),
+                                        lambda: self.corpus.word(self.difficulty_level))
+        # Until enough keystrokes are recorded there is nothing to adapt to
+        return passage or self.corpus.passage(self.difficulty_level, self.test_duration)
+
+    def refresh_weak_bigrams(self):
+        future = self.db.submit(weakest_bigrams, self.current_user)
+        return self.db_callbacks.then(future, self.set_weak_bigrams)
+
+    def set_weak_bigrams(self, weak_bigrams):
+        self.weak_bigrams = weak_bigrams
+
+    def set_target_text(self, text):
+        self.session.set_target(text, self.typing_input.get())
+        self.text_display.set_text(self.session.scoring.target_text)
 
     def set_custom_text(self, event):
         custom_text = self.typing_input.get()
-        self.text_display.config(text=custom_text)
         self.typing_input.delete(0, tk.END)
+        self.set_target_text(custom_text)
         self.typing_input.unbind("<Return>")
 
     def upload_text_file(self):
         file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt")])
         if file_path:
-            with open(file_path, 'r') as file:
-                self.uploaded_text = file.read().split('\n')
-            self.text_display.config(text=self.uploaded_text[0])
-            self.uploaded_text_index = 0
-
-    def update_timer(self):
-        if not self.is_paused and self.remaining_time > 0:
-            self.remaining_time -= 1
-            self.timer_label.config(text=f"Time Left: {self.remaining_time}s")
-            self.after(1000, self.update_timer)
-        elif self.remaining_time == 0:
+            if self.passage_file:
+                self.passage_file.close()
+            # Passages are read lazily from the file instead of loading it whole
+            self.passage_file = PassageFile(file_path)
+            self.session.set_passages(self.passage_file.passages())
+            passage = self.session.next_passage()
+            if passage is None:
+                messagebox.showerror("Upload Failed", "The file does not contain any text.")
+                return
+            self.set_target_text(passage)
+
+    def update_timer_label(self, label):
+        remaining_time = math.ceil(self.session_clock.remaining)
+        if remaining_time != self.remaining_time:
+            self.remaining_time = remaining_time
+            label.config(text=f"Time Left: {self.remaining_time}s")
+
+    def on_test_tick(self):
+        if not self.timer_label.winfo_exists():
+            return False
+        self.update_timer_label(self.timer_label)
+        if self.session_clock.is_expired:
             self.end_test()
 
     def pause_test(self):
-        self.is_paused = not self.is_paused
-        if not self.is_paused:
-            self.update_timer()
+        self.is_paused = self.session.toggle_pause()
 
     def end_test(self):
-        typed_text = self.typing_input.get().strip()
-        elapsed_time = self.test_duration - self.remaining_time
-        wpm = len(typed_text.split()) * (60 / elapsed_time) if elapsed_time > 0 else 0
-        accuracy = self.calculate_accuracy(typed_text)
-        self.save_progress(wpm, accuracy)
-        self.show_results(wpm, accuracy)
+        self.test_ticker.stop()
+        wpm, accuracy, keystrokes, elapsed = self.session.finish()
+        self.save_progress(wpm, accuracy, keystrokes, self.typing_mode, elapsed)
         self.typing_input.config(state=tk.DISABLED)
-        if self.complete_sound:
-            self.complete_sound.play()
+        self.audio.play("complete")
+        self.show_results(wpm, accuracy)
+
+    def calculate_accuracy(self):
+        return self.session.accuracy
 
-    def calculate_accuracy(self, typed_text):
-        target_text = self.text_display.cget("text").strip()
-        correct_chars = sum(1 for i, c in enumerate(typed_text) if i < len(target_text) and c == target_text[i])
-        return (correct_chars / len(target_text)) * 100 if target_text else 0
+    def on_input_edit(self, action, index, text):
+        self.last_edit_at = time.perf_counter()
+        if action == "1":
+            self.session.insert(int(index), text)
+            self.text_display.touch(int(index))
+        elif action == "0":
+            self.session.delete(int(index), len(text))
+            self.text_display.touch(int(index))
+        return True
 
     def on_text_change(self, event):
-        target_text = self.text_display.cget("text").strip()
-        typed_text = self.typing_input.get()
-        self.typing_input.config(fg="red" if not target_text.startswith(typed_text) else self.font_color)
-        if self.key_sound:
-            self.key_sound.play()
-        if typed_text == target_text:
-            self.uploaded_text_index += 1
-            if self.uploaded_text_index < len(self.uploaded_text):
-                self.text_display.config(text=self.uploaded_text[self.uploaded_text_index])
-                self.typing_input.delete(0, tk.END)
+        self.typing_input.config(fg="red" if not self.session.is_correct else self.font_color)
+        # Latency is measured from the key press that changed the text
+        self.audio.click(self.last_edit_at)
+        self.last_edit_at = None
+        if self.session.is_complete:
+            passage = self.session.next_passage()
+            if passage is not None:
+                with self.keystroke_log.paused():
+                    self.typing_input.delete(0, tk.END)
+                self.set_target_text(passage)
             else:
                 self.end_test()
 
-    def save_progress(self, wpm, accuracy):
-        self.db_cursor.execute('''INSERT INTO progress (user_id, wpm, accuracy, date) VALUES (?, ?, ?, ?)''', 
-                               (self.current_user, wpm, accuracy, datetime.now().strftime('%Y-%m-%d')))
-        self.db_conn.commit()
+    def save_progress(self, wpm, accuracy, keystrokes=(), mode=None, elapsed=None):
+        # The result row, its keystrokes and the achievement stats it changed
+        # are written together on the database thread. Unlocks are shown
+        # from the app's copy of the stats straight away.
+        keystrokes = list(keystrokes)
+        date = datetime.now().strftime('%Y-%m-%d')
+        self.check_achievements(wpm, accuracy, date, mode, elapsed)
+        user_id = self.current_user
+        duration = self.test_duration
+        future = self.db.submit(self.write_progress, user_id, wpm, accuracy, date,
+                                keystrokes, mode, self.difficulty_level, duration, elapsed, write=True)
+        if keystrokes:
+            self.refresh_weak_bigrams()
+        # Chart images drawn before this result are out of date
+        if self.chart_renderer is not None:
+            self.chart_renderer.invalidate(user_id)
+        elapsed = duration if elapsed is None else elapsed
+        return self.db_callbacks.then(future, lambda saved: self.add_result(user_id, saved, date, wpm, accuracy, elapsed))
+
+    def add_result(self, user_id, saved, date, wpm, accuracy, elapsed):
+        progress_id, tracker = saved
+        if user_id == self.current_user:
+            # The loaded history takes the new row as is, without reading it
+            # back; the stored stats include results saved by other copies
+            if self.user_history is not None:
+                self.user_history.append(progress_id, date, wpm, accuracy, elapsed)
+            self.set_achievement_tracker(tracker)
+        self.set_last_progress_id(progress_id)
+
+    @staticmethod
+    def write_progress(db_conn, user_id, wpm, accuracy, date, keystrokes, mode, difficulty, duration, elapsed):
+        progress_id = insert_progress(db_conn, user_id, wpm, accuracy, date, mode, difficulty, duration, elapsed)
+        if keystrokes:
+            save_keystrokes(db_conn, user_id, progress_id, mode, keystrokes)
+            update_bigram_stats(db_conn, user_id, keystrokes)
+        tracker = record_result(db_conn, user_id, wpm, accuracy, date, duration, mode, progress_id, elapsed)
+        return progress_id, tracker
 
     def show_results(self, wpm, accuracy):
-        self.check_achievements(wpm, accuracy)
-        messagebox.showinfo("Results", f"WPM: {int(wpm)}\nAccuracy: {accuracy:.2f}%")
+        messagebox.showinfo("Results", f"WPM: {int(wpm)}\nAccuracy: {accuracy:.2f}%{self.new_achievements_text()}")
         self.update_progress_chart()
 
     def update_progress_chart(self):
-        self.clear_widgets()
-
-        main_frame = tk.Frame(self, bg=self.bg_color)
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-
-        self.create_navbar(main_frame)
-
-        self.chart_area = tk.Frame(main_frame, bg=self.bg_color)
-        self.chart_area.pack(pady=10, fill=tk.BOTH, expand=True)
-
-        date_frame = tk.Frame(main_frame, bg=self.bg_color)
+        self.show_view("progress")
+
+    def build_progress_view(self, parent):
+        main_frame = tk.Frame(parent, bg=self.bg_color)
+        self.create_chart_view(main_frame, "progress", self.show_progress_chart)
+        self.progress_summary = tk.Label(main_frame, font=("Arial", 12), bg=self.bg_color, fg=self.font_color)
+        self.progress_summary.pack(pady=5)
+        return main_frame
+
+    def create_chart_view(self, parent, view, command):
+        chart_area = tk.Frame(parent, bg=self.bg_color)
+        chart_area.pack(pady=10, fill=tk.BOTH, expand=True)
+        chart_label = tk.Label(chart_area, bg=self.bg_color)
+        chart_label.pack(fill=tk.BOTH, expand=True)
+
+        date_frame = tk.Frame(parent, bg=self.bg_color)
         date_frame.pack(pady=10)
 
         tk.Label(date_frame, text="From:", bg=self.bg_color, fg=self.font_color).pack(side=tk.LEFT, padx=5)
-        self.start_date_entry = DateEntry(date_frame, width=12, background='darkblue', foreground='white', borderwidth=2)
-        self.start_date_entry.pack(side=tk.LEFT, padx=5)
+        start_date_entry = tkcalendar.DateEntry(date_frame, width=12, background='darkblue', foreground='white', borderwidth=2)
+        start_date_entry.pack(side=tk.LEFT, padx=5)
 
         tk.Label(date_frame, text="To:", bg=self.bg_color, fg=self.font_color).pack(side=tk.LEFT, padx=5)
-        self.end_date_entry = DateEntry(date_frame, width=12, background='darkblue', foreground='white', borderwidth=2)
-        self.end_date_entry.pack(side=tk.LEFT, padx=5)
+        end_date_entry = tkcalendar.DateEntry(date_frame, width=12, background='darkblue', foreground='white', borderwidth=2)
+        end_date_entry.pack(side=tk.LEFT, padx=5)
 
-        tk.Button(date_frame, text="Show", command=self.show_progress_chart, bg="#3498db", fg="white").pack(side=tk.LEFT, padx=5)
+        tk.Button(date_frame, text="Show", command=command, bg="#3498db", fg="white").pack(side=tk.LEFT, padx=5)
 
-        # Display the past 7 days' progress by default
+        # Display the past 7 days by default
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=7)
-        self.start_date_entry.set_date(start_date)
-        self.end_date_entry.set_date(end_date)
-        self.show_progress_chart()
+        start_date_entry.set_date(start_date)
+        end_date_entry.set_date(end_date)
+        self.chart_views[view] = {"area": chart_area, "label": chart_label, "start": start_date_entry, "end": end_date_entry,
+                                  "key": None, "image": None}
 
     def show_progress_chart(self):
-        start_date = self.start_date_entry.get_date().strftime('%Y-%m-%d')
-        end_date = self.end_date_entry.get_date().strftime('%Y-%m-%d')
-        self.db_cursor.execute('SELECT date, wpm FROM progress WHERE user_id=? AND date BETWEEN ? AND ? ORDER BY date', 
-                               (self.current_user, start_date, end_date))
-        data = self.db_cursor.fetchall()
-        dates = [d[0] for d in data]
-        wpm_values = [d[1] for d in data]
-
-        fig, ax = plt.subplots()
-        ax.plot(dates, wpm_values, marker='o', linestyle='-', color='blue')
-        ax.set_title('WPM Progress')
-        ax.set_xlabel('Date')
-        ax.set_ylabel('Words Per Minute')
-        ax.grid(True)
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
-
-        self.clear_chart_area()
-
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_area)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.show_chart("progress", PROGRESS_PANELS)
+        self.show_progress_summary()
+
+    def show_progress_summary(self):
+        if self.user_history is None:
+            self.progress_summary.config(text="")
+            return
+        chart = self.chart_views["progress"]
+        stats = analytics.summary(self.user_history, chart["start"].get_date(), chart["end"].get_date())
+        if not stats["tests"]:
+            self.progress_summary.config(text="No tests in this period")
+            return
+        self.progress_summary.config(text=f"{stats['tests']} tests, median {stats['p50']:.0f} WPM, best {stats['best_wpm']:.0f} WPM, "
+                                          f"trend {stats['trend']:+.2f} WPM per day")
+
+    def show_chart(self, view, panels):
+        if self.chart_renderer is None:
+            self.chart_renderer = chartrender.ChartRenderer()
+        chart = self.chart_views[view]
+        start_date = chart["start"].get_date()
+        end_date = chart["end"].get_date()
+        self.update_idletasks()
+        width = max(chart["area"].winfo_width(), 400)
+        height = max(chart["area"].winfo_height(), 150 * len(panels))
+        # A new test changes last_progress_id, so cached images are never stale
+        key = (self.current_user, view, start_date, end_date, self.last_progress_id, width, height)
+        chart["key"] = key
+        image = self.chart_renderer.cached(key)
+        if image is not None:
+            self.show_chart_image(key, image)
+            return
+        # Long ranges are read per day or per week so the row count stays small
+        resolution = chartdata.choose_resolution(start_date, end_date)
+        if self.user_history is not None:
+            # Cut from the loaded history, with no query
+            data = analytics.series(self.user_history, start_date, end_date, resolution)
+            self.render_chart(key, view, panels, data, resolution, width, height)
+            return
+        self.load_user_history()
+        future = self.db.query(chartdata.series_query(resolution),
+                               (self.current_user, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+        self.db_callbacks.then(future, lambda data: self.render_chart(key, view, panels, data, resolution, width, height))
+
+    def render_chart(self, key, view, panels, data, resolution, width, height):
+        future = self.chart_renderer.render(key, view, panels, data, resolution, width, height)
+        self.db_callbacks.then(future, lambda image: self.show_chart_image(key, image))
+
+    def show_chart_image(self, key, image):
+        # Only the most recently requested chart of a view is shown
+        chart = self.chart_views.get(key[1])
+        if chart is None or key != chart["key"]:
+            return
+        chart["image"] = tk.PhotoImage(data=image, format="PPM")
+        chart["label"].config(image=chart["image"])
+
+    def set_last_progress_id(self, progress_id):
+        self.last_progress_id = progress_id
+        # Views of past results reload when next shown, or now if visible
+        self.views.invalidate("progress", "history", "leaderboard", "stats")
+
+    def load_user_history(self):
+        # Read once per login; add_result keeps it current afterwards
+        user_id = self.current_user
+        if self.user_history is not None or self.user_history_pending == user_id:
+            return
+        self.user_history_pending = user_id
+        future = self.db.submit(analytics.load_history, user_id)
+        self.db_callbacks.then(future, lambda columns: self.set_user_history(user_id, columns))
+
+    def set_user_history(self, user_id, columns):
+        if user_id != self.current_user:
+            return
+        self.user_history = analytics.History(columns)
+        self.user_history_pending = None
+        self.views.invalidate("progress", "stats")
 
     def reset_test(self):
-        self.text_display.config(text="Click Start to Begin")
+        self.test_ticker.stop()
+        self.session.reset()
         self.typing_input.config(state=tk.NORMAL)
         self.typing_input.delete(0, tk.END)
+        self.set_target_text("Click Start to Begin")
+        self.remaining_time = self.test_duration
         self.timer_label.config(text=f"Time Left: {self.test_duration}s")
         self.is_paused = False
 
     def toggle_dark_mode(self):
         self.dark_mode = not self.dark_mode
-        self.bg_color = "black" if self.dark_mode else "white"
-        self.font_color = "white" if self.dark_mode else "black"
-        self.create_homepage()
+        self.apply_theme(bg_color="black" if self.dark_mode else "white", font_color="white" if self.dark_mode else "black")
+
+    def set_font_size(self, font_size):
+        self.apply_theme(font_size=int(font_size))
+
+    def set_font_color(self, font_color):
+        self.apply_theme(font_color=font_color)
+
+    def set_bg_color(self, bg_color):
+        self.apply_theme(bg_color=bg_color)
+
+    def apply_theme(self, bg_color=None, font_color=None, font_size=None):
+        bg_color = bg_color or self.bg_color
+        font_color = font_color or self.font_color
+        font_size = font_size or self.font_size
+        # Built views are restyled in place; the rest pick the theme up when built
+        restyle(self.view_area, self.bg_color, {
+            "background": (self.bg_color, bg_color),
+            "foreground": (self.font_color, font_color),
+            "font": (f"Arial {self.font_size}", ("Arial", font_size)),
+        })
+        if self.views.is_built("word rain"):
+            self.canvas.itemconfigure("rain", fill=font_color, font=("Arial", font_size))
+        self.bg_color = bg_color
+        self.font_color = font_color
+        self.font_size = font_size
 
     def start_word_rain(self):
-        self.clear_widgets()
+        self.show_view("word rain")
 
-        self.word_rain_frame = tk.Frame(self, bg=self.bg_color)
-        self.word_rain_frame.pack(fill=tk.BOTH, expand=True)
+    def build_word_rain(self, parent):
+        word_rain_frame = tk.Frame(parent, bg=self.bg_color)
 
-        self.create_navbar(self.word_rain_frame)
-
-        self.canvas = tk.Canvas(self.word_rain_frame, bg=self.bg_color)
+        self.canvas = tk.Canvas(word_rain_frame, bg=self.bg_color)
         self.canvas.pack(fill=tk.BOTH, expand=True)
 
-        self.words = ["apple", "banana", "cherry", "date", "elderberry", "fig", "grape", "honeydew"]
-        self.active_words = []
-        self.word_speed = 1000
-        self.score = 0
-        self.is_paused = False
-
-        self.typing_input = tk.Entry(self.word_rain_frame, font=("Arial", self.font_size), width=80, bg=self.bg_color, fg=self.font_color)
-        self.typing_input.pack(pady=10)
-        self.typing_input.bind("<KeyRelease>", self.check_word_rain)
+        self.rain_input = tk.Entry(word_rain_frame, font=("Arial", self.font_size), width=80, bg=self.bg_color, fg=self.font_color)
+        self.rain_input.pack(pady=10)
+        self.rain_input.bind("<KeyRelease>", self.check_word_rain)
 
-        self.score_label = tk.Label(self.word_rain_frame, text="Score: 0", font=("Arial", self.font_size), bg=self.bg_color, fg=self.font_color)
+        self.score_label = tk.Label(word_rain_frame, text="Score: 0", font=("Arial", self.font_size), bg=self.bg_color, fg=self.font_color)
         self.score_label.pack(pady=10)
 
-        self.remaining_time = self.test_duration
-        self.timer_label = tk.Label(self.word_rain_frame, text=f"Time Left: {self.remaining_time}s", font=("Arial", self.font_size), bg=self.bg_color, fg=self.font_color)
-        self.timer_label.pack(pady=10)
+        self.rain_timer_label = tk.Label(word_rain_frame, text=f"Time Left: {self.test_duration}s", font=("Arial", self.font_size), bg=self.bg_color, fg=self.font_color)
+        self.rain_timer_label.pack(pady=10)
 
-        btn_frame = tk.Frame(self.word_rain_frame, bg=self.bg_color)
+        btn_frame = tk.Frame(word_rain_frame, bg=self.bg_color)
         btn_frame.pack(pady=10)
         pause_btn = tk.Button(btn_frame, text="Pause", command=self.pause_word_rain, bg="#f39c12", fg="white")
         pause_btn.pack(side=tk.LEFT, padx=5)
         reset_btn = tk.Button(btn_frame, text="Reset", command=self.reset_word_rain, bg="#e74c3c", fg="white")
         reset_btn.pack(side=tk.LEFT, padx=5)
+        return word_rain_frame
+
+    def start_word_rain_clock(self):
+        # Word positions follow the session clock, which stands still while paused
+        self.word_rain.start(self.test_duration)
+        self.word_rain_played = 0.0
+        self.word_rain_next_word = 0.0
+        self.word_rain_ticker.start()
+
+    def word_rain_tick(self):
+        # One frame clock drives spawning, falling and the countdown
+        if not self.canvas.winfo_exists():
+            return False
+        played = self.session_clock.elapsed
+        elapsed = played - self.word_rain_played
+        self.word_rain_played = played
+        if elapsed:
+            self.canvas.move("rain", 0, elapsed * self.word_rain.engine.speed)
+        if not self.is_paused and played >= self.word_rain_next_word:
+            self.add_word(played)
+            self.word_rain_next_word = played + self.word_speed / 1000
+        for word_id in self.word_rain.engine.expire(played):
+            self.canvas.delete(word_id)
+        self.update_timer_label(self.rain_timer_label)
+        if self.session_clock.is_expired:
+            self.end_word_rain()
 
-        self.add_word()
-        self.update_word_rain()
-        self.update_word_rain_timer()
-
-    def add_word(self):
-        if not self.is_paused:
-            word = random.choice(self.words)
-            word_id = self.canvas.create_text(random.randint(50, 750), 0, text=word, font=("Arial", self.font_size), fill=self.font_color)
-            self.active_words.append(word_id)
-            self.after(self.word_speed, self.add_word)
-
-    def update_word_rain(self):
-        if not self.is_paused:
-            for word_id in self.active_words:
-                self.canvas.move(word_id, 0, 5)
-                if self.canvas.coords(word_id)[1] > 600:
-                    self.canvas.delete(word_id)
-                    self.active_words.remove(word_id)
-            self.after(50, self.update_word_rain)
-
-    def update_word_rain_timer(self):
-        if not self.is_paused:
-            if self.remaining_time > 0:
-                self.remaining_time -= 1
-                self.timer_label.config(text=f"Time Left: {self.remaining_time}s")
-                self.after(1000, self.update_word_rain_timer)
-            else:
-                self.end_word_rain()
+    def add_word(self, now):
+        word = self.corpus.word(self.difficulty_level)
+        x = random.randint(50, 750)
+        word_id = self.canvas.create_text(x, 0, text=word, font=("Arial", self.font_size), fill=self.font_color, tags=("rain",))
+        self.word_rain.engine.spawn(word_id, word, now)
 
     def pause_word_rain(self):
-        self.is_paused = not self.is_paused
-        if not self.is_paused:
-            self.add_word()
-            self.update_word_rain()
-            self.update_word_rain_timer()
+        self.is_paused = self.word_rain.toggle_pause()
 
     def end_word_rain(self):
-        wpm = self.score * (60 / self.test_duration)
-        self.save_progress(wpm, 100)
-        messagebox.showinfo("Game Over", f"Score: {self.score}\nWPM: {int(wpm)}")
+        self.word_rain_ticker.stop()
+        wpm, accuracy, keystrokes, elapsed = self.word_rain.finish()
+        self.save_progress(wpm, accuracy, keystrokes, "Word Rain", elapsed)
+        messagebox.showinfo("Game Over", f"Score: {self.word_rain.score}\nWPM: {int(wpm)}{self.new_achievements_text()}")
         self.create_homepage()
 
     def reset_word_rain(self):
-        for word_id in self.active_words:
-            self.canvas.delete(word_id)
-        self.active_words.clear()
-        self.score = 0
+        # Every visit to Word Rain starts a new game
+        self.canvas.delete("rain")
+        self.word_rain.clear()
+        self.rain_input.delete(0, tk.END)
         self.score_label.config(text="Score: 0")
         self.remaining_time = self.test_duration
-        self.timer_label.config(text=f"Time Left: {self.remaining_time}s")
+        self.rain_timer_label.config(text=f"Time Left: {self.remaining_time}s")
         self.is_paused = False
+        self.start_word_rain_clock()
 
     def check_word_rain(self, event):
-        typed_text = self.typing_input.get().strip()
-        for word_id in self.active_words:
-            word = self.canvas.itemcget(word_id, "text")
-            if typed_text == word:
-                self.canvas.delete(word_id)
-                self.active_words.remove(word_id)
-                self.typing_input.delete(0, tk.END)
-                self.score += 1
-                self.score_label.config(text=f"Score: {self.score}")
-                break
+        typed_text = self.rain_input.get().strip()
+        self.word_rain.key(BACKSPACE if event.keysym == "BackSpace" else event.char, typed_text)
+        word_id = self.word_rain.submit(typed_text)
+        if word_id:
+            self.canvas.delete(word_id)
+            self.rain_input.delete(0, tk.END)
+            self.score_label.config(text=f"Score: {self.word_rain.score}")
 
     def show_typing_history(self):
-        self.clear_widgets()
-
-        main_frame = tk.Frame(self, bg=self.bg_color)
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-
-        self.create_navbar(main_frame)
-
-        self.chart_area = tk.Frame(main_frame, bg=self.bg_color)
-        self.chart_area.pack(pady=10, fill=tk.BOTH, expand=True)
-
-        date_frame = tk.Frame(main_frame, bg=self.bg_color)
-        date_frame.pack(pady=10)
-
-        tk.Label(date_frame, text="From:", bg=self.bg_color, fg=self.font_color).pack(side=tk.LEFT, padx=5)
-        self.start_date_entry = DateEntry(date_frame, width=12, background='darkblue', foreground='white', borderwidth=2)
-        self.start_date_entry.pack(side=tk.LEFT, padx=5)
-
-        tk.Label(date_frame, text="To:", bg=self.bg_color, fg=self.font_color).pack(side=tk.LEFT, padx=5)
-        self.end_date_entry = DateEntry(date_frame, width=12, background='darkblue', foreground='white', borderwidth=2)
-        self.end_date_entry.pack(side=tk.LEFT, padx=5)
-
-        tk.Button(date_frame, text="Show", command=self.show_history_chart, bg="#3498db", fg="white").pack(side=tk.LEFT, padx=5)
-
-        # Display the past 7 days' history by default
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=7)
-        self.start_date_entry.set_date(start_date)
-        self.end_date_entry.set_date(end_date)
+        self.show_view("history")
+
+    def build_history_view(self, parent):
+        main_frame = tk.Frame(parent, bg=self.bg_color)
+        self.create_chart_view(main_frame, "history", self.show_history_chart)
+
+        # Every test, newest first; click a heading to sort by it
+        self.history_table = PagedTable(main_frame, [("date", "Date", 100), ("wpm", "WPM", 70), ("accuracy", "Accuracy", 80),
+                                                     ("mode", "Mode", 110), ("difficulty", "Difficulty", 80), ("duration", "Duration", 70)],
+                                        self.fetch_history_page, self.db_callbacks, HISTORY_SORTS, "date",
+                                        format_row=self.format_history_row, height=8, bg=self.bg_color)
+        self.history_table.pack(pady=10, fill=tk.X)
+        return main_frame
+
+    def refresh_history(self):
+        self.history_table.reload()
         self.show_history_chart()
 
     def show_history_chart(self):
-        start_date = self.start_date_entry.get_date().strftime('%Y-%m-%d')
-        end_date = self.end_date_entry.get_date().strftime('%Y-%m-%d')
-        self.db_cursor.execute('SELECT date, wpm, accuracy FROM progress WHERE user_id=? AND date BETWEEN ? AND ? ORDER BY date', 
-                               (self.current_user, start_date, end_date))
-        data = self.db_cursor.fetchall()
-        dates = [d[0] for d in data]
-        wpm_values = [d[1] for d in data]
-        accuracy_values = [d[2] for d in data]
-
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8))
-        ax1.plot(dates, wpm_values, marker='o', linestyle='-', color='blue')
-        ax1.set_title('WPM Over Selected Period')
-        ax1.set_xlabel('Date')
-        ax1.set_ylabel('Words Per Minute')
-        ax1.grid(True)
-        ax1.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
-
-        ax2.plot(dates, accuracy_values, marker='o', linestyle='-', color='green')
-        ax2.set_title('Accuracy Over Selected Period')
-        ax2.set_xlabel('Date')
-        ax2.set_ylabel('Accuracy (%)')
-        ax2.grid(True)
-        ax2.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
-
-        self.clear_chart_area()
-
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_area)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.show_chart("history", HISTORY_PANELS)
+
+    def fetch_history_page(self, sort, after, before, limit):
+        return self.db.submit(history_page, self.current_user, sort, after, before, limit)
+
+    @staticmethod
+    def format_history_row(row):
+        date, wpm, accuracy, mode, difficulty, duration = row
+        date = date.strftime('%Y-%m-%d') if isinstance(date, datetime) else date
+        return (date, int(wpm), f"{accuracy:.2f}%", mode or "", difficulty or "", f"{duration}s" if duration else "")
 
     def show_leaderboard(self):
-        self.clear_widgets()
+        self.show_view("leaderboard")
 
-        main_frame = tk.Frame(self, bg=self.bg_color)
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+    def build_leaderboard(self, parent):
+        main_frame = tk.Frame(parent, bg=self.bg_color)
 
-        self.create_navbar(main_frame)
+        tk.Label(main_frame, text="Leaderboard", font=("Arial", 24), bg=self.bg_color, fg=self.font_color).pack(pady=10)
 
-        self.chart_area = tk.Frame(main_frame, bg=self.bg_color)
-        self.chart_area.pack(pady=10, fill=tk.BOTH, expand=True)
+        board_frame = tk.Frame(main_frame, bg=self.bg_color)
+        board_frame.pack(pady=5)
+        self.board_difficulty = self.create_combobox(board_frame, "All", ["All", "Easy", "Medium", "Hard"], self.update_leaderboard)
+        self.board_duration = self.create_combobox(board_frame, "All", ["All"] + list(DURATIONS), self.update_leaderboard)
 
-        self.db_cursor.execute('''
-            SELECT u.username, MAX(p.wpm) as max_wpm, p.accuracy, p.date
-            FROM progress p
-            JOIN users u ON p.user_id = u.id
-            GROUP BY u.username
-            ORDER BY max_wpm DESC, p.accuracy DESC
-            LIMIT 10
-        ''')
-        data = self.db_cursor.fetchall()
-        usernames = [d[0] for d in data]
-        wpm_values = [d[1] for d in data]
-        accuracy_values = [d[2] for d in data]
-        dates = [d[3] for d in data]
+        # Rows are fetched page by page as the table scrolls
+        self.leaderboard_table = PagedTable(main_frame, [("username", "User", 160), ("wpm", "WPM", 80), ("accuracy", "Accuracy", 90), ("date", "Date", 110)],
+                                            self.fetch_leaderboard_page, self.db_callbacks, LEADERBOARD_SORTS, "wpm",
+                                            format_row=self.format_leaderboard_row, height=15, bg=self.bg_color)
+        self.leaderboard_table.pack(pady=10, fill=tk.BOTH, expand=True)
+        return main_frame
 
-        leaderboard_frame = tk.Frame(self.chart_area, bg=self.bg_color)
-        leaderboard_frame.pack(pady=10, fill=tk.BOTH, expand=True)
+    def update_leaderboard(self, event=None):
+        self.leaderboard_table.reload()
 
-        tk.Label(leaderboard_frame, text="Leaderboard", font=("Arial", 24), bg=self.bg_color, fg=self.font_color).pack(pady=10)
+    def fetch_leaderboard_page(self, sort, after, before, limit):
+        difficulty = self.board_difficulty.get()
+        duration = DURATIONS.get(self.board_duration.get(), 0)
+        return self.db.submit(leaderboard_page, difficulty, duration, sort, after, before, limit)
 
-        for i, (username, wpm, accuracy, date) in enumerate(zip(usernames, wpm_values, accuracy_values, dates)):
-            tk.Label(leaderboard_frame, text=f"{i+1}. {username} - WPM: {wpm}, Accuracy: {accuracy:.2f}%, Date: {date}", font=("Arial", 14), bg=self.bg_color, fg=self.font_color).pack(pady=5)
+    @staticmethod
+    def format_leaderboard_row(row):
+        username, wpm, accuracy, date = row
+        date = date.strftime('%Y-%m-%d') if isinstance(date, datetime) else date
+        return (username, int(wpm), f"{accuracy:.2f}%", date)
 
     def open_settings(self):
         settings_window = tk.Toplevel(self)
@@ -599,6 +835,10 @@ class DigiType(tk.Tk):
         tk.Label(settings_window, text="Profile:").pack(pady=10)
         tk.Button(settings_window, text="Update Profile", command=self.update_profile).pack(pady=5)
 
+        latency = self.audio.latency_report()
+        if latency:
+            tk.Label(settings_window, text=f"Key sound latency: {latency['p50_ms']:.1f} ms median, {latency['p95_ms']:.1f} ms p95").pack(pady=10)
+
     def update_profile(self):
         profile_window = tk.Toplevel(self)
         profile_window.title("Update Profile")
@@ -607,7 +847,6 @@ class DigiType(tk.Tk):
         tk.Label(profile_window, text="Username:").pack(pady=10)
         username_entry = tk.Entry(profile_window)
         username_entry.pack(pady=10)
-        username_entry.insert(0, self.get_current_username())
 
         tk.Label(profile_window, text="Password:").pack(pady=10)
         password_entry = tk.Entry(profile_window, show="*")
@@ -616,68 +855,177 @@ class DigiType(tk.Tk):
         tk.Label(profile_window, text="Email:").pack(pady=10)
         email_entry = tk.Entry(profile_window)
         email_entry.pack(pady=10)
-        email_entry.insert(0, self.get_current_email())
 
-        tk.Button(profile_window, text="Save", command=lambda: self.save_profile(username_entry.get(), password_entry.get(), email_entry.get())).pack(pady=10)
+        def fill_entries(user):
+            username_entry.insert(0, user[0])
+            email_entry.insert(0, user[1] or "")
+        self.db_callbacks.then(self.get_current_profile(), fill_entries)
 
-    def get_current_username(self):
-        self.db_cursor.execute('SELECT username FROM users WHERE id=?', (self.current_user,))
-        return self.db_cursor.fetchone()[0]
+        tk.Button(profile_window, text="Save", command=lambda: self.save_profile(username_entry.get(), password_entry.get(), email_entry.get())).pack(pady=10)
 
-    def get_current_email(self):
-        self.db_cursor.execute('SELECT email FROM users WHERE id=?', (self.current_user,))
-        return self.db_cursor.fetchone()[0]
+    def get_current_profile(self):
+        return self.db.query_one('SELECT username, email FROM users WHERE id=?', (self.current_user,))
 
     def save_profile(self, username, password, email):
-        self.db_cursor.execute('UPDATE users SET username=?, password=?, email=? WHERE id=?', (username, password, email, self.current_user))
-        self.db_conn.commit()
-        messagebox.showinfo("Profile Updated", "Your profile has been updated successfully.")
+        future = self.db.execute('UPDATE users SET username=?, password=?, email=? WHERE id=?', (username, password, email, self.current_user))
+        self.db_callbacks.then(future, lambda _: messagebox.showinfo("Profile Updated", "Your profile has been updated successfully."))
+        return future
 
     def load_achievements(self):
-        self.achievements = [
-            {"name": "First Test", "description": "Complete your first typing test", "achieved": False},
-            {"name": "Speed Demon", "description": "Achieve a WPM of 100 or more", "achieved": False},
-            {"name": "Accuracy Master", "description": "Achieve an accuracy of 95% or more", "achieved": False}
-        ]
-
-    def check_achievements(self, wpm, accuracy):
-        for achievement in self.achievements:
-            if achievement["name"] == "First Test":
-                achievement["achieved"] = True
-            elif achievement["name"] == "Speed Demon" and wpm >= 100:
-                achievement["achieved"] = True
-            elif achievement["name"] == "Accuracy Master" and accuracy >= 95:
-                achievement["achieved"] = True
+        self.set_achievement_tracker(AchievementTracker())
+        if self.current_user is not None:
+            future = self.db.submit(load_user_stats, self.current_user)
+            self.db_callbacks.then(future, lambda loaded: self.set_achievement_tracker(AchievementTracker(*loaded)))
+
+    def set_achievement_tracker(self, tracker):
+        self.achievement_tracker = tracker
+        self.achievements = tracker.achievements()
+        self.views.invalidate("achievements")
+
+    def check_achievements(self, wpm, accuracy, date=None, mode=None, elapsed=None):
+        # Only rules on the stats this result changed are evaluated
+        date = date or datetime.now().strftime('%Y-%m-%d')
+        updated, unlocked = self.achievement_tracker.record(wpm, accuracy, date, self.test_duration, mode, elapsed)
+        self.new_achievements = achievement_names(unlocked)
+        if unlocked:
+            self.achievements = self.achievement_tracker.achievements()
+            self.views.invalidate("achievements")
+        return updated, unlocked
+
+    def new_achievements_text(self):
+        return "".join(f"\nAchievement unlocked: {name}" for name in self.new_achievements)
 
     def show_achievements(self):
-        self.clear_widgets()
-
-        main_frame = tk.Frame(self, bg=self.bg_color)
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        self.show_view("achievements")
 
-        self.create_navbar(main_frame)
+    def build_achievements(self, parent):
+        main_frame = tk.Frame(parent, bg=self.bg_color)
 
         achievements_frame = tk.Frame(main_frame, bg=self.bg_color)
         achievements_frame.pack(pady=10, fill=tk.BOTH, expand=True)
 
         tk.Label(achievements_frame, text="Achievements", font=("Arial", 24), bg=self.bg_color, fg=self.font_color).pack(pady=10)
 
+        self.achievement_labels = []
         for achievement in self.achievements:
+            label = tk.Label(achievements_frame, font=("Arial", 14), bg=self.bg_color, fg=self.font_color)
+            label.pack(pady=5)
+            self.achievement_labels.append(label)
+        return main_frame
+
+    def refresh_achievements(self):
+        for achievement, label in zip(self.achievements, self.achievement_labels):
             status = "Achieved" if achievement["achieved"] else "Not Achieved"
-            tk.Label(achievements_frame, text=f"{achievement['name']}: {achievement['description']} - {status}", font=("Arial", 14), bg=self.bg_color, fg=self.font_color).pack(pady=5)
+            label.config(text=f"{achievement['name']}: {achievement['description']} - {status}")
+
+    def show_stats(self):
+        self.show_view("stats")
+
+    def build_stats_view(self, parent):
+        main_frame = tk.Frame(parent, bg=self.bg_color)
+
+        tk.Label(main_frame, text="Statistics", font=("Arial", 24), bg=self.bg_color, fg=self.font_color).pack(pady=10)
+        self.stats_range = self.create_combobox(main_frame, "Last 30 days", list(STATS_RANGES), lambda event: self.refresh_stats())
+
+        table = tk.Frame(main_frame, bg=self.bg_color)
+        table.pack(pady=10)
+        self.stats_labels = {}
+        for row, (text, key, _) in enumerate(STATS_ROWS):
+            tk.Label(table, text=f"{text}:", font=("Arial", 14), bg=self.bg_color, fg=self.font_color).grid(row=row, column=0, sticky=tk.W, padx=10, pady=2)
+            self.stats_labels[key] = tk.Label(table, font=("Arial", 14), bg=self.bg_color, fg=self.font_color)
+            self.stats_labels[key].grid(row=row, column=1, sticky=tk.E, padx=10, pady=2)
+        return main_frame
+
+    def refresh_stats(self):
+        if self.user_history is None:
+            # set_user_history refreshes the panel once the arrays are in
+            for label in self.stats_labels.values():
+                label.config(text="...")
+            self.load_user_history()
+            return
+        days = STATS_RANGES[self.stats_range.get()]
+        start = None if days is None else datetime.now().date() - timedelta(days=days)
+        stats = analytics.summary(self.user_history, start)
+        for _, key, text in STATS_ROWS:
+            self.stats_labels[key].config(text=text.format(stats[key]) if key in stats else "-")
 
     def logout(self):
         self.current_user = None
+        self.user_history = None
+        self.user_history_pending = None
+        self.load_achievements()
         self.create_login_page()
-
-    def clear_widgets(self):
-        for widget in self.winfo_children():
-            widget.destroy()
-
-    def clear_chart_area(self):
-        for widget in self.chart_area.winfo_children():
-            widget.destroy()
+        # Screens holding the last user's data are built afresh for the next one
+        self.chart_views.clear()
+        self.views.destroy(*USER_VIEWS)
+
+    def report_startup(self):
+        self.update_idletasks()
+        mark("first frame")
+        self.audio_thread.join(timeout=10)
+        print(startup.report())
+        self.destroy()
+
+    def start_profiling(self):
+        self.lag_monitor = LagMonitor(self, self.profiler.histogram("event loop lag"))
+        self.lag_monitor.start()
+        self.profile_overlay = ProfileOverlay(self, self.profiler)
+        self.bind_all("<F12>", self.profile_overlay.toggle)
+
+    def destroy(self):
+        if self.profiler.enabled:
+            print(self.profiler.report())
+        if self.passage_file:
+            self.passage_file.close()
+        if self.chart_renderer is not None:
+            self.chart_renderer.close()
+        self.db.close()
+        super().destroy()
 
 if __name__ == "__main__":
-    app = DigiType()
-    app.mainloop()
+    parser = argparse.ArgumentParser(description="Digitype Dojo typing trainer")
+    parser.add_argument("--profile-startup", action="store_true", help="print a startup timing report after the first frame and exit")
+    parser.add_argument("--profile", action="store_true", help="time hot handlers and event loop lag (also enabled by DIGITYPE_PROFILE=1)")
+    parser.add_argument("--db", help="database file (default: $DIGITYPE_DB or typing_data.db)")
+    commands = parser.add_subparsers(dest="command")
+    for command, help_text in [("export", "write a table to a .csv or .jsonl file, gzipped if the name ends in .gz"),
+                               ("import", "add the rows of a .csv or .jsonl file (optionally .gz) to a table")]:
+        subparser = commands.add_parser(command, help=help_text)
+        subparser.add_argument("table", choices=["users", "progress"])
+        subparser.add_argument("path")
+        if command == "import":
+            subparser.add_argument("--replace", action="store_true", help="overwrite rows with the same id instead of failing")
+    args = parser.parse_args()
+
+    if args.command:
+        # Bulk transfers run on their own connection, without opening a window
+        db_conn = None
+        try:
+            if args.command == "export":
+                # Read as is; exporting never changes the source file
+                db_conn = connect_readonly(args.db)
+                count = transfer.export_table(db_conn, args.table, args.path)
+                print(f"Exported {count} {args.table} rows to {args.path}")
+            else:
+                # One transaction, as in the app, so a failed or concurrent
+                # migration never leaves a half-upgraded schema
+                db_conn = connect(args.db)
+                begin(db_conn)
+                try:
+                    migrate(db_conn)
+                    db_conn.execute('COMMIT')
+                except BaseException:
+                    db_conn.execute('ROLLBACK')
+                    raise
+                count = transfer.import_table(db_conn, args.table, args.path, replace=args.replace)
+                print(f"Imported {count} {args.table} rows from {args.path}")
+        except (ValueError, OSError, sqlite3.Error) as error:
+            parser.error(str(error))
+        finally:
+            if db_conn is not None:
+                db_conn.close()
+    else:
+        app = DigiType(profile=args.profile, db_path=args.db)
+        if args.profile_startup:
+            app.after_idle(app.report_startup)
+        app.mainloop()
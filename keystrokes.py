@@ -0,0 +1,82 @@
+import time
+from array import array
+from contextlib import contextmanager
+
+BACKSPACE = "\b"
+
+
+# Fixed-size ring buffer of keystroke events stored column-wise in typed
+# arrays, so recording a key never allocates a tuple or touches the disk.
+class KeystrokeLog:
+    def __init__(self, capacity=16384):
+        self.capacity = capacity
+        self.timestamps = array("q", [0]) * capacity
+        self.expected = array("l", [0]) * capacity
+        self.typed = array("l", [0]) * capacity
+        self.correct = bytearray(capacity)
+        self.active = False
+        self.clear()
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+        self.dropped = 0
+        self.start_ns = time.perf_counter_ns()
+
+    def begin(self):
+        self.clear()
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    @contextmanager
+    def paused(self):
+        active = self.active
+        self.active = False
+        try:
+            yield
+        finally:
+            self.active = active
+
+    def __len__(self):
+        return self.count
+
+    def record(self, expected, typed, correct, timestamp=None):
+        if not self.active:
+            return
+        if self.count == self.capacity:
+            # Overwrite the oldest event rather than growing without bound
+            self.start = (self.start + 1) % self.capacity
+            self.count -= 1
+            self.dropped += 1
+        index = (self.start + self.count) % self.capacity
+        self.timestamps[index] = time.perf_counter_ns() if timestamp is None else timestamp
+        self.expected[index] = ord(expected) if expected else 0
+        self.typed[index] = ord(typed) if typed else 0
+        self.correct[index] = 1 if correct else 0
+        self.count += 1
+
+    def events(self):
+        for offset in range(self.count):
+            index = (self.start + offset) % self.capacity
+            expected = self.expected[index]
+            typed = self.typed[index]
+            yield (self.timestamps[index] - self.start_ns,
+                   chr(expected) if expected else "",
+                   chr(typed) if typed else "",
+                   self.correct[index])
+
+    def take_events(self):
+        events = list(self.events())
+        self.stop()
+        self.clear()
+        return events
+
+
+def save_keystrokes(db_conn, user_id, progress_id, mode, events):
+    rows = [(user_id, progress_id, mode, seq, elapsed_ns, expected, typed, correct)
+            for seq, (elapsed_ns, expected, typed, correct) in enumerate(events)]
+    db_conn.executemany('''INSERT INTO keystrokes (user_id, progress_id, mode, seq, elapsed_ns, expected, typed, correct)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+    return len(rows)
@@ -0,0 +1,71 @@
+import codecs
+import mmap
+import os
+
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+]
+
+
+def detect_encoding(head, default="utf-8"):
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding, len(bom)
+    return default, 0
+
+
+# Serves the lines of an uploaded text file one passage at a time. The file is
+# memory-mapped and scanned lazily, so only the passage being typed is ever
+# decoded, and memory use does not grow with the file. A byte order mark,
+# when present, decides the encoding; otherwise the given encoding (UTF-8 by
+# default) is used.
+class PassageFile:
+    def __init__(self, path, encoding="utf-8", max_length=500):
+        self.path = path
+        self.max_length = max_length
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        encoding, self.start = detect_encoding(self.data[:4], encoding)
+        self.encoding = codecs.lookup(encoding).name
+        self.newline = "\n".encode(self.encoding)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def decode(self, raw):
+        return raw.decode(self.encoding, errors="replace").strip()
+
+    def lines(self):
+        data = self.data
+        width = len(self.newline)
+        position = self.start
+        end = len(data)
+        while position < end and not self.closed:
+            newline = data.find(self.newline, position)
+            # In UTF-16/32 a newline only counts on a character boundary
+            while newline != -1 and (newline - position) % width:
+                newline = data.find(self.newline, newline + 1)
+            stop = end if newline == -1 else newline
+            text = self.decode(data[position:stop])
+            if text:
+                yield text
+            position = stop + width
+
+    def passages(self):
+        for text in self.lines():
+            while len(text) > self.max_length:
+                # Split very long lines at a word boundary
+                cut = text.rfind(" ", 0, self.max_length)
+                cut = self.max_length if cut <= 0 else cut
+                yield text[:cut]
+                text = text[cut:].lstrip()
+            yield text
@@ -0,0 +1,199 @@
+import csv
+import functools
+import json
+import math
+import os
+import time
+import tkinter as tk
+from array import array
+
+ENV_VAR = "DIGITYPE_PROFILE"
+
+# Navigation and the handlers on the typing, Word Rain and chart paths
+HOT_PATHS = [
+    "show_view",
+    "on_input_edit",
+    "on_text_change",
+    "check_word_rain",
+    "word_rain_tick",
+    "show_progress_chart",
+    "show_history_chart",
+    "refresh_stats",
+    "show_chart_image",
+    "save_progress",
+    "write_progress",
+]
+
+# Buckets grow by about 19% each, from 1 microsecond to about an hour
+BUCKETS_PER_DOUBLING = 4
+BUCKETS = 32 * BUCKETS_PER_DOUBLING
+
+
+def enabled_from_env():
+    return os.environ.get(ENV_VAR, "").lower() not in ("", "0", "false", "no")
+
+
+# Fixed-size log-scale histogram of durations. Recording a sample is a few
+# arithmetic operations and never allocates; percentiles are accurate to
+# the width of one bucket.
+class Histogram:
+    def __init__(self, name):
+        self.name = name
+        self.counts = array("q", [0]) * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, duration_ns):
+        micros = duration_ns / 1000
+        bucket = int(math.log2(micros) * BUCKETS_PER_DOUBLING) + 1 if micros >= 1 else 0
+        self.counts[min(bucket, BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    @staticmethod
+    def bucket_upper_ms(bucket):
+        return 2 ** (bucket / BUCKETS_PER_DOUBLING) / 1000
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bucket_upper_ms(bucket), self.max_ns / 1e6)
+        return self.max_ns / 1e6
+
+    def summary(self):
+        return {
+            "name": self.name,
+            "count": self.count,
+            "mean_ms": self.total_ns / self.count / 1e6 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ns / 1e6,
+        }
+
+
+# Collects handler timings and event loop lag. When disabled, instrument()
+# leaves every method untouched, so profiling costs nothing at all.
+class Profiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+
+    def histogram(self, name):
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(name)
+        return self.histograms[name]
+
+    def timed(self, name, func):
+        histogram = self.histogram(name)
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.record(clock() - start)
+        return wrapper
+
+    def instrument(self, obj, names=HOT_PATHS):
+        # Instance attributes shadow the class methods, so anything bound
+        # afterwards (Tk commands, key bindings) goes through the timer
+        if not self.enabled:
+            return
+        for name in names:
+            method = getattr(obj, name, None)
+            if method is not None:
+                setattr(obj, name, self.timed(name, method))
+
+    def summaries(self):
+        return [histogram.summary() for histogram in self.histograms.values() if histogram.count]
+
+    def report(self):
+        lines = [f"{'handler':<22} {'count':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)"]
+        for row in self.summaries():
+            lines.append(f"{row['name']:<22} {row['count']:>7} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                         f"{row['p99_ms']:>8.2f} {row['max_ms']:>8.2f}")
+        return "\n".join(lines)
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as output:
+            json.dump(self.summaries(), output, indent=2)
+
+    def export_csv(self, path):
+        rows = self.summaries()
+        with open(path, "w", newline="", encoding="utf-8") as output:
+            writer = csv.DictWriter(output, fieldnames=["name", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+# Measures how late the Tk event loop runs a callback scheduled with after().
+# A busy handler delays everything queued behind it, so lag is the stutter
+# the user feels.
+class LagMonitor:
+    def __init__(self, widget, histogram, interval=50):
+        self.widget = widget
+        self.histogram = histogram
+        self.interval = interval
+        self.due = None
+        self.job = None
+
+    def start(self):
+        self.due = time.perf_counter_ns() + self.interval * 1_000_000
+        self.job = self.widget.after(self.interval, self.tick)
+
+    def stop(self):
+        if self.job is not None:
+            self.widget.after_cancel(self.job)
+            self.job = None
+
+    def tick(self):
+        self.histogram.record(max(0, time.perf_counter_ns() - self.due))
+        self.start()
+
+
+# Small always-on-top window with the live timing table and export buttons.
+class ProfileOverlay(tk.Toplevel):
+    def __init__(self, master, profiler, refresh_ms=500):
+        super().__init__(master)
+        self.title("Digitype Profile")
+        self.attributes("-topmost", True)
+        self.profiler = profiler
+        self.refresh_ms = refresh_ms
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)
+        self.table = tk.Label(self, font=("Courier", 10), justify=tk.LEFT, anchor="w")
+        self.table.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        buttons = tk.Frame(self)
+        buttons.pack(pady=5)
+        tk.Button(buttons, text="Export JSON", command=lambda: self.export("json")).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Export CSV", command=lambda: self.export("csv")).pack(side=tk.LEFT, padx=5)
+        self.refresh()
+
+    def refresh(self):
+        if self.winfo_viewable():
+            self.table.config(text=self.profiler.report())
+        self.after(self.refresh_ms, self.refresh)
+
+    def toggle(self, event=None):
+        if self.winfo_viewable():
+            self.withdraw()
+        else:
+            self.deiconify()
+
+    def export(self, kind):
+        path = os.path.abspath(f"digitype_profile_{time.strftime('%Y%m%d_%H%M%S')}.{kind}")
+        if kind == "json":
+            self.profiler.export_json(path)
+        else:
+            self.profiler.export_csv(path)
+        self.title(f"Digitype Profile - saved {os.path.basename(path)}")
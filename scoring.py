@@ -0,0 +1,101 @@
+# Incremental scoring for a typing test. The engine is fed one keystroke or
+# edit delta at a time, so each update only costs the size of the edit
+# instead of a rescan of everything typed so far.
+
+
+class ScoringEngine:
+    def __init__(self, target_text=""):
+        self.reset(target_text)
+
+    def reset(self, target_text=""):
+        self.target_text = target_text
+        self.typed = []
+        self.matches = bytearray()
+        self.position = 0
+        self.correct_chars = 0
+        self.errors = 0
+        self.total_errors = 0
+        self.keystrokes = 0
+        self.word_count = 0
+        self.first_error = None
+
+    def expected_char(self, index=None):
+        index = self.position if index is None else index
+        return self.target_text[index] if index < len(self.target_text) else ""
+
+    def type_char(self, char):
+        index = self.position
+        correct = index < len(self.target_text) and self.target_text[index] == char
+        if not char.isspace() and (index == 0 or self.typed[index - 1].isspace()):
+            self.word_count += 1
+        self.typed.append(char)
+        self.matches.append(correct)
+        self.position += 1
+        self.keystrokes += 1
+        if correct:
+            self.correct_chars += 1
+        else:
+            self.errors += 1
+            self.total_errors += 1
+            if self.first_error is None:
+                self.first_error = index
+        return correct
+
+    def backspace(self):
+        if not self.position:
+            return
+        self.position -= 1
+        char = self.typed.pop()
+        if self.matches.pop():
+            self.correct_chars -= 1
+        else:
+            self.errors -= 1
+            # Errors past the cursor are gone, so if the first one was just
+            # removed there are none left.
+            if self.first_error == self.position:
+                self.first_error = None
+        if not char.isspace() and (self.position == 0 or self.typed[-1].isspace()):
+            self.word_count -= 1
+
+    def insert(self, index, text):
+        # Typing at the end of the input is the common case and stays O(1) per
+        # character; edits in the middle replay only the shifted suffix.
+        tail = self._truncate(index)
+        for char in text:
+            self.type_char(char)
+        self._replay(tail)
+
+    def delete(self, index, count):
+        tail = self._truncate(index)
+        self._replay(tail[count:])
+
+    def sync(self, typed_text):
+        prefix = 0
+        limit = min(len(typed_text), self.position)
+        while prefix < limit and typed_text[prefix] == self.typed[prefix]:
+            prefix += 1
+        self._truncate(prefix)
+        self._replay(typed_text[prefix:])
+
+    def _truncate(self, index):
+        tail = self.typed[index:]
+        for _ in range(len(tail)):
+            self.backspace()
+        return tail
+
+    def _replay(self, chars):
+        keystrokes = self.keystrokes
+        total_errors = self.total_errors
+        for char in chars:
+            self.type_char(char)
+        # Re-typing a shifted suffix is bookkeeping, not new keystrokes.
+        self.keystrokes = keystrokes
+        self.total_errors = total_errors
+
+    @property
+    def is_correct(self):
+        return self.errors == 0
+
+    @property
+    def is_complete(self):
+        return self.errors == 0 and self.position == len(self.target_text)
@@ -0,0 +1,126 @@
+from clock import SessionClock
+from keystrokes import KeystrokeLog, BACKSPACE
+from scoring import ScoringEngine
+from startup import LazyModule
+from wordrain import WordRainEngine
+
+# Final scoring needs NumPy, which is only loaded when a test ends
+alignment = LazyModule("alignment")
+
+
+def words_per_minute(words, elapsed):
+    return words * (60 / elapsed) if elapsed > 0 else 0
+
+
+# Everything a typing test needs apart from its widgets: the target passage,
+# scoring, the keystroke log and the clock. The Tk app forwards each edit of
+# the input here and reads the result back, so a test can also be run (and
+# benchmarked) without a display.
+class TypingSession:
+    def __init__(self, clock=None, log=None):
+        self.clock = clock or SessionClock()
+        self.log = log or KeystrokeLog()
+        self.scoring = ScoringEngine()
+        self.passages = iter(())
+
+    def set_target(self, text, typed=""):
+        self.scoring.reset(text.strip())
+        self.scoring.sync(typed)
+
+    def set_passages(self, passages):
+        self.passages = iter(passages)
+
+    def next_passage(self):
+        return next(self.passages, None)
+
+    def start(self, duration):
+        self.log.begin()
+        self.clock.start(duration)
+
+    def reset(self):
+        self.clock.reset()
+        self.log.stop()
+
+    def insert(self, index, text, timestamp=None):
+        for offset, char in enumerate(text):
+            expected = self.scoring.expected_char(index + offset)
+            self.log.record(expected, char, char == expected, timestamp)
+        self.scoring.insert(index, text)
+
+    def delete(self, index, count, timestamp=None):
+        self.log.record("", BACKSPACE, False, timestamp)
+        self.scoring.delete(index, count)
+
+    def toggle_pause(self):
+        if self.clock.is_running:
+            self.clock.toggle_pause()
+        return self.clock.is_paused
+
+    @property
+    def is_correct(self):
+        return self.scoring.is_correct
+
+    @property
+    def is_complete(self):
+        return self.scoring.is_complete
+
+    @property
+    def wpm(self):
+        return words_per_minute(self.scoring.word_count, self.clock.elapsed)
+
+    @property
+    def accuracy(self):
+        return self.align().accuracy
+
+    def align(self):
+        # Typed text is aligned with the target, so a skipped or extra
+        # character is one error, and only the part of the target that was
+        # reached is scored
+        return alignment.align(self.scoring.target_text, "".join(self.scoring.typed))
+
+    def finish(self):
+        self.clock.stop()
+        return self.wpm, self.accuracy, self.log.take_events(), self.clock.elapsed
+
+
+# The Word Rain game without its canvas: which words are falling, the score,
+# the keystroke log and the clock.
+class WordRainSession:
+    def __init__(self, speed=100, height=600, clock=None, log=None):
+        self.engine = WordRainEngine(speed=speed, height=height)
+        self.clock = clock or SessionClock()
+        self.log = log or KeystrokeLog()
+        self.score = 0
+
+    def start(self, duration):
+        self.score = 0
+        self.log.begin()
+        self.clock.start(duration)
+
+    def clear(self):
+        return self.engine.clear()
+
+    def key(self, char, typed_text, timestamp=None):
+        # typed_text is the input after the key, without surrounding spaces
+        if char == BACKSPACE:
+            self.log.record("", BACKSPACE, False, timestamp)
+        elif char and char.isprintable() and typed_text:
+            expected = self.engine.expected_char(typed_text[:-1])
+            self.log.record(expected, char, char == expected, timestamp)
+
+    def submit(self, typed_text):
+        item_id = self.engine.match(typed_text)
+        if item_id:
+            self.score += 1
+        return item_id
+
+    def toggle_pause(self):
+        return self.clock.toggle_pause()
+
+    @property
+    def wpm(self):
+        return words_per_minute(self.score, self.clock.elapsed)
+
+    def finish(self):
+        self.clock.stop()
+        return self.wpm, 100, self.log.take_events(), self.clock.elapsed
@@ -0,0 +1,58 @@
+import importlib
+import threading
+import time
+
+# Reference point for every startup mark; this module is imported first.
+STARTED = time.perf_counter()
+
+_marks = []
+_lock = threading.Lock()
+
+
+def mark(label, took=None):
+    at = time.perf_counter() - STARTED
+    thread = threading.current_thread().name
+    with _lock:
+        if took is None:
+            # Default to the time since the previous mark on the same thread
+            previous = [mark_at for _, mark_at, _, mark_thread in _marks if mark_thread == thread]
+            took = at - (previous[-1] if previous else 0.0)
+        _marks.append((label, at, took, thread))
+
+
+def marks():
+    with _lock:
+        return list(_marks)
+
+
+def report():
+    lines = [f"{'phase':<32} {'at (ms)':>9} {'took (ms)':>10}  thread"]
+    for label, at, took, thread in marks():
+        lines.append(f"{label:<32} {at * 1000:>9.1f} {took * 1000:>10.1f}  {thread}")
+    return "\n".join(lines)
+
+
+# Stands in for a module until one of its attributes is first used, so heavy
+# imports only cost time on the screens that need them.
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    mark(f"import {self._name}", time.perf_counter() - start)
+                    self._module = module
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
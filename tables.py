@@ -0,0 +1,116 @@
+import tkinter as tk
+from tkinter import ttk
+
+# Rows kept in the widget at once; older pages are dropped and fetched again
+# if the user scrolls back to them
+MAX_PAGES = 5
+
+# Fetch the next page once the view is this close to either end
+PREFETCH_MARGIN = 0.15
+
+
+# A ttk.Treeview that holds only a window of rows around the visible part of
+# a result. Pages are requested by sort key through fetch(sort, after,
+# before) as the user scrolls, so memory stays bounded however many rows
+# the query matches. fetch returns a future of (rows, keys); results are
+# handed back on the Tk thread by the dispatcher.
+class PagedTable(tk.Frame):
+    def __init__(self, master, columns, fetch, dispatcher, sorts, sort, page_size=100, format_row=None, height=10, **kwargs):
+        super().__init__(master, **kwargs)
+        self.fetch = fetch
+        self.dispatcher = dispatcher
+        self.sort = sort
+        self.page_size = page_size
+        self.max_rows = page_size * MAX_PAGES
+        self.format_row = format_row or (lambda row: row)
+        self.keys = {}
+        self.generation = 0
+        self.loading = False
+        self.more_above = False
+        self.more_below = True
+
+        self.tree = ttk.Treeview(self, columns=[name for name, _, _ in columns], show="headings", height=height)
+        for name, heading, width in columns:
+            self.tree.column(name, width=width, anchor=tk.CENTER)
+            if name in sorts:
+                self.tree.heading(name, text=heading, command=lambda name=name: self.sort_by(name))
+            else:
+                self.tree.heading(name, text=heading)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_scroll)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def sort_by(self, sort):
+        self.sort = sort
+        self.reload()
+
+    def reload(self):
+        # Results of requests made before the reload are ignored
+        self.generation += 1
+        self.tree.delete(*self.tree.get_children())
+        self.keys.clear()
+        self.loading = False
+        self.more_above = False
+        self.more_below = True
+        self.load(below=True)
+
+    def load(self, below):
+        if self.loading:
+            return
+        items = self.tree.get_children()
+        after = self.keys[items[-1]] if below and items else None
+        before = self.keys[items[0]] if not below else None
+        self.loading = True
+        generation = self.generation
+        future = self.fetch(self.sort, after, before, self.page_size)
+        self.dispatcher.then(future, lambda page: self.add_page(generation, below, page),
+                             lambda error: self.page_failed(generation, error))
+
+    def page_failed(self, generation, error):
+        # The next scroll asks for the page again instead of waiting forever
+        if generation == self.generation:
+            self.loading = False
+        raise error
+
+    def add_page(self, generation, below, page):
+        if generation != self.generation or not self.tree.winfo_exists():
+            return
+        self.loading = False
+        rows, keys = page
+        full = len(rows) == self.page_size
+        if below:
+            self.more_below = full
+            for row, key in zip(rows, keys):
+                self.keys[self.tree.insert("", tk.END, values=self.format_row(row))] = key
+        else:
+            self.more_above = full
+            for index, (row, key) in enumerate(zip(rows, keys)):
+                self.keys[self.tree.insert("", index, values=self.format_row(row))] = key
+            # Keep the rows the user was looking at in place
+            self.tree.yview_scroll(len(rows), "units")
+        self.trim(below)
+
+    def trim(self, below):
+        items = self.tree.get_children()
+        excess = len(items) - self.max_rows
+        if excess <= 0:
+            return
+        dropped = items[:excess] if below else items[-excess:]
+        self.tree.delete(*dropped)
+        for item in dropped:
+            del self.keys[item]
+        if below:
+            self.more_above = True
+            self.tree.yview_scroll(-excess, "units")
+        else:
+            self.more_below = True
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.loading:
+            return
+        if float(last) >= 1 - PREFETCH_MARGIN and self.more_below:
+            self.load(below=True)
+        elif float(first) <= PREFETCH_MARGIN and self.more_above:
+            self.load(below=False)
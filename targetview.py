@@ -0,0 +1,154 @@
+import tkinter as tk
+from array import array
+from bisect import bisect_right
+
+UNTYPED, CORRECT, INCORRECT = 0, 1, 2
+
+# Key events arriving within one frame (about 60 Hz) share a single redraw
+FRAME_MS = 16
+
+# Lines of the passage kept in the widget; the cursor stays on the second
+WRAP_COLUMNS = 60
+VISIBLE_LINES = 4
+
+
+def wrap_lines(text, columns=WRAP_COLUMNS):
+    # Returns the offset each display line starts at. Lines only break at a
+    # space or newline, and the breaking character is shown as the newline,
+    # so offsets in the passage and in the widget stay one to one.
+    starts = array("l", [0])
+    line_start = 0
+    last_break = -1
+    for index, char in enumerate(text):
+        if char == "\n":
+            line_start = index + 1
+            starts.append(line_start)
+            last_break = -1
+            continue
+        if char == " ":
+            last_break = index
+        if index - line_start >= columns and last_break >= line_start:
+            line_start = last_break + 1
+            starts.append(line_start)
+            last_break = -1
+    return starts
+
+
+def target_states(matches, position, start, end):
+    # Characters before the cursor are correct or incorrect, the rest untyped
+    return bytearray((CORRECT if matches[index] else INCORRECT) if index < position else UNTYPED
+                     for index in range(start, end))
+
+
+def changed_runs(old, new, offset=0):
+    # (start, end, state) for each run of characters whose state changed
+    runs = []
+    for index, (before, after) in enumerate(zip(old, new)):
+        if before == after:
+            continue
+        if runs and runs[-1][1] == offset + index and runs[-1][2] == after:
+            runs[-1][1] += 1
+        else:
+            runs.append([offset + index, offset + index + 1, after])
+    return [tuple(run) for run in runs]
+
+
+# Shows the target passage with per-character feedback. Edits only mark the
+# first offset they touch; once per frame the characters between there and
+# the cursor are compared with what is drawn and only runs that changed are
+# retagged. Only a few lines around the cursor are in the widget, so long
+# passages cost the same to show and to scroll as short ones.
+class TargetView(tk.Text):
+    def __init__(self, master, scoring, columns=WRAP_COLUMNS, lines=VISIBLE_LINES, **kwargs):
+        super().__init__(master, width=columns + 10, height=lines, wrap=tk.WORD, relief=tk.FLAT,
+                         cursor="arrow", takefocus=0, **kwargs)
+        self.scoring = scoring
+        self.columns = columns
+        self.lines = lines
+        self.tag_configure("correct", foreground="#2ecc71")
+        self.tag_configure("incorrect", foreground="white", background="#e74c3c")
+        self.tag_configure("cursor", underline=True)
+        self.job = None
+        self.set_text("")
+
+    def set_text(self, text):
+        self.text = text
+        self.starts = wrap_lines(text, self.columns)
+        self.states = bytearray(len(text))
+        self.position = 0
+        self.first_line = None
+        self.dirty = None
+        self.touch(0)
+
+    def touch(self, index):
+        # Called for every edit; the redraw itself waits for the next frame
+        self.dirty = index if self.dirty is None else min(self.dirty, index)
+        if self.job is None:
+            self.job = self.after(FRAME_MS, self.redraw)
+
+    def redraw(self):
+        self.job = None
+        if self.dirty is None:
+            return
+        position = min(self.scoring.position, len(self.text))
+        end = min(max(self.position, position), len(self.text))
+        start = min(self.dirty, end)
+        self.dirty = None
+        states = target_states(self.scoring.matches, position, start, end)
+        runs = changed_runs(self.states[start:end], states, start)
+        self.states[start:end] = states
+        self.position = position
+        if self.scroll_to(position):
+            return
+        for run_start, run_end, state in runs:
+            self.tag_range(run_start, run_end, state)
+        self.place_cursor()
+
+    def scroll_to(self, position):
+        # Moves the window of lines so the cursor is on its second line, and
+        # redraws the whole window if it moved
+        line = bisect_right(self.starts, position) - 1
+        first_line = max(0, min(line - 1, len(self.starts) - self.lines))
+        if first_line == self.first_line:
+            return False
+        self.first_line = first_line
+        self.window_start = self.starts[first_line]
+        last_line = min(first_line + self.lines, len(self.starts))
+        self.window_end = self.line_end(last_line - 1)
+        self.config(state=tk.NORMAL)
+        self.delete("1.0", tk.END)
+        self.insert("1.0", "\n".join(self.text[self.starts[line]:self.line_end(line)] for line in range(first_line, last_line)))
+        self.config(state=tk.DISABLED)
+        states = self.states[self.window_start:self.window_end]
+        for run_start, run_end, state in changed_runs(bytes(len(states)), states, self.window_start):
+            self.tag_range(run_start, run_end, state)
+        self.place_cursor()
+        return True
+
+    def line_end(self, line):
+        # Offset of the character that breaks the line, or the passage end
+        return self.starts[line + 1] - 1 if line + 1 < len(self.starts) else len(self.text)
+
+    def index_of(self, offset):
+        return f"1.0 + {offset - self.window_start} chars"
+
+    def tag_range(self, start, end, state):
+        start = max(start, self.window_start)
+        end = min(end, self.window_end)
+        if start >= end:
+            return
+        self.tag_remove("correct", self.index_of(start), self.index_of(end))
+        self.tag_remove("incorrect", self.index_of(start), self.index_of(end))
+        if state != UNTYPED:
+            self.tag_add("correct" if state == CORRECT else "incorrect", self.index_of(start), self.index_of(end))
+
+    def place_cursor(self):
+        self.tag_remove("cursor", "1.0", tk.END)
+        if self.window_start <= self.position < self.window_end:
+            self.tag_add("cursor", self.index_of(self.position))
+
+    def destroy(self):
+        if self.job is not None:
+            self.after_cancel(self.job)
+            self.job = None
+        super().destroy()
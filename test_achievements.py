@@ -0,0 +1,91 @@
+import sqlite3
+import pytest
+from achievements import AchievementTracker, apply_result, backfill_achievements, load_user_stats, record_result, save_user_stats
+from database import MIGRATIONS, add_achievements, insert_progress, migrate
+
+@pytest.fixture
+def db_conn():
+    conn = sqlite3.connect(':memory:')
+    migrate(conn)
+    return conn
+
+def unlocked(tracker):
+    return [achievement["name"] for achievement in tracker.achievements() if achievement["achieved"]]
+
+def test_one_result_unlocks_the_rules_it_reaches():
+    tracker = AchievementTracker()
+    updated, keys = tracker.record(100, 95.0, "2025-02-14", 30)
+    assert keys == ["first_test", "speed_demon", "accuracy_master", "sprinter"]
+    assert updated["best_wpm_30"] == 100
+    assert tracker.record(120, 99.0, "2025-02-14", 30)[1] == [], "Achievements unlock once"
+    assert unlocked(tracker)[:3] == ["First Test", "Speed Demon", "Accuracy Master"]
+
+def test_day_streaks():
+    stats = {}
+    for day in ["2025-02-14", "2025-02-15", "2025-02-15", "2025-02-16"]:
+        apply_result(stats, 40, 90.0, day)
+    assert stats["day_streak"] == 3
+    assert "day_streak" not in apply_result(stats, 40, 90.0, "2025-02-10"), "Older results leave the streak alone"
+    apply_result(stats, 40, 90.0, "2025-02-18")
+    assert stats["day_streak"] == 1, "A missed day starts a new streak"
+
+def test_runs_and_consistency():
+    tracker = AchievementTracker()
+    for _ in range(9):
+        tracker.record(60, 96.0, "2025-02-14", 60)
+    assert "consistency" not in tracker.stats, "Consistency needs enough tests to settle"
+    assert tracker.record(60, 96.0, "2025-02-14", 60)[1] == ["regular", "sharpshooter", "steady_hands"]
+    tracker.record(30, 80.0, "2025-02-14", 60)
+    assert tracker.stats["accurate_run"] == 0
+    assert tracker.stats["consistency"] < 0.9
+
+def test_word_rain_counts_towards_totals_only():
+    tracker = AchievementTracker()
+    for _ in range(10):
+        updated, keys = tracker.record(80, 100, "2025-02-14", 30, "Word Rain")
+    assert tracker.stats["tests"] == 10 and tracker.stats["best_wpm"] == 80
+    assert not {"best_accuracy", "accurate_run", "best_wpm_30", "wpm_mean", "consistency"} & set(tracker.stats)
+    assert "accuracy_master" not in tracker.unlocked and "sharpshooter" not in tracker.unlocked
+    assert tracker.record(60, 96.0, "2025-02-14", 30)[0]["scored_tests"] == 1
+    assert "consistency" not in tracker.stats, "Word Rain games do not settle consistency"
+
+def test_results_saved_by_two_copies_both_count(db_conn):
+    # Two copies save without seeing each other's results; each save reads
+    # the stored stats in its own transaction, so both count
+    first = record_result(db_conn, 1, 50, 96.0, "2025-02-14", 60, "Timed Test", 1)
+    second = record_result(db_conn, 1, 70, 90.0, "2025-02-14", 30, "Timed Test", 2)
+    stats, _ = load_user_stats(db_conn, 1)
+    assert stats["tests"] == 2 and stats["seconds"] == 90 and stats["best_wpm"] == 70
+    assert stats["accurate_run"] == 0 and second.stats == stats and first.stats["tests"] == 1
+
+def test_only_time_spent_typing_counts(db_conn):
+    # A 60-second test whose passage ran out after 12.5 seconds
+    progress_id = insert_progress(db_conn, 1, 50, 96.0, "2025-02-14", "Timed Test", "Easy", 60, 12.5)
+    tracker = record_result(db_conn, 1, 50, 96.0, "2025-02-14", 60, "Timed Test", progress_id, 12.5)
+    assert tracker.stats["seconds"] == 12.5 and tracker.stats["best_wpm_60"] == 50
+    db_conn.execute('DELETE FROM user_stats')
+    backfill_achievements(db_conn)
+    assert load_user_stats(db_conn, 1)[0]["seconds"] == 12.5, "Replays use the stored time"
+    assert apply_result({}, 50, 96.0, "2025-02-14", 60)["seconds"] == 60, "Older results count their set duration"
+
+def test_stats_and_unlocks_are_stored_per_user(db_conn):
+    tracker = AchievementTracker()
+    updated, keys = tracker.record(100, 95.0, "2025-02-14", 30)
+    save_user_stats(db_conn, 1, updated, keys, 1, "2025-02-14")
+    save_user_stats(db_conn, 1, {}, keys, 2, "2025-02-15")
+    stats, stored = load_user_stats(db_conn, 1)
+    assert stats == tracker.stats
+    assert sorted(stored) == sorted(keys)
+    assert load_user_stats(db_conn, 2) == ({}, [])
+
+def test_migration_replays_history():
+    conn = sqlite3.connect(':memory:')
+    for migration in MIGRATIONS[:MIGRATIONS.index(add_achievements)]:
+        migration(conn)
+    conn.executemany('INSERT INTO progress (user_id, wpm, accuracy, date, mode, difficulty, duration) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                     [(1, 50, 96.0, day, "Timed Test", "Easy", 60) for day in ["2025-02-14", "2025-02-15", "2025-02-16"]])
+    add_achievements(conn)
+    stats, keys = load_user_stats(conn, 1)
+    assert stats["tests"] == 3 and stats["day_streak"] == 3
+    assert sorted(keys) == ["accuracy_master", "first_test", "on_a_roll"]
+    assert conn.execute('SELECT progress_id FROM achievements WHERE achievement = "on_a_roll"').fetchone() == (3,)
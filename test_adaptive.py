@@ -0,0 +1,83 @@
+import random
+import sqlite3
+import pytest
+from adaptive import AdaptivePractice, BigramIndex, bigram_deltas, update_bigram_stats, weakest_bigrams
+from database import MIGRATIONS, add_bigram_stats, migrate
+from keystrokes import BACKSPACE, save_keystrokes
+
+MS = 1_000_000
+
+EVENTS = [
+    (0, "t", "t", 1),
+    (100 * MS, "h", "h", 1),
+    (600 * MS, "e", "x", 0),
+    (700 * MS, "", BACKSPACE, 0),
+    (800 * MS, "e", "e", 1),
+    (900 * MS, "T", "T", 1),
+    (1000 * MS, "h", "h", 1),
+]
+
+@pytest.fixture
+def db_conn():
+    conn = sqlite3.connect(':memory:')
+    migrate(conn)
+    return conn
+
+def test_deltas_skip_backspaces():
+    deltas = bigram_deltas(EVENTS)
+    assert deltas["th"] == (2, 0, 200 * MS), "Bigrams are case-insensitive"
+    assert deltas["he"] == (1, 1, 500 * MS)
+    assert deltas["et"] == (1, 0, 100 * MS)
+    assert len(deltas) == 3, "A backspace breaks the chain of transitions"
+
+def test_stats_accumulate_and_rank_weakest(db_conn):
+    for _ in range(3):
+        update_bigram_stats(db_conn, 1, EVENTS)
+    assert db_conn.execute('SELECT count, errors FROM bigram_stats WHERE user_id=1 AND bigram="he"').fetchone() == (3, 3)
+    weakest = weakest_bigrams(db_conn, 1)
+    assert [bigram for bigram, _ in weakest] == ["he", "et", "th"]
+    assert weakest_bigrams(db_conn, 2) == []
+
+def test_only_letter_pairs_are_ranked(db_conn):
+    # Transitions around spaces and commas are the slowest for most typists
+    events = []
+    elapsed = 0
+    for char in "the cat, the hat, the mat":
+        elapsed += (400 if char in " ," or events and events[-1][1] in " ," else 100) * MS
+        events.append((elapsed, char, char, 1))
+    for _ in range(3):
+        update_bigram_stats(db_conn, 1, events)
+    weakest = weakest_bigrams(db_conn, 1, limit=3)
+    assert weakest and all(bigram.isalpha() for bigram, _ in weakest)
+    practice = AdaptivePractice(["the", "that", "match"], rng=random.Random(0))
+    assert practice.passage(weakest, 50, lambda: "filler") is not None
+
+def test_migration_backfills_from_keystrokes(tmp_path):
+    db_conn = sqlite3.connect(str(tmp_path / "old.db"))
+    version = MIGRATIONS.index(add_bigram_stats)
+    for migration in MIGRATIONS[:version]:
+        migration(db_conn)
+    db_conn.execute(f'PRAGMA user_version = {version}')
+    save_keystrokes(db_conn, 1, 1, "Timed Test", EVENTS)
+    save_keystrokes(db_conn, 1, 2, "Timed Test", EVENTS)
+    migrate(db_conn)
+    backfilled = dict((row[0], row[1:]) for row in db_conn.execute('SELECT bigram, count, errors, total_ns FROM bigram_stats'))
+    expected = {bigram: (count * 2, errors * 2, total * 2) for bigram, (count, errors, total) in bigram_deltas(EVENTS).items()}
+    assert backfilled == expected, "The backfill should match the incremental update"
+
+def test_passage_oversamples_weak_bigrams():
+    practice = AdaptivePractice(["quiz", "zebra", "the", "cat", "dog"], rng=random.Random(3))
+    passage = practice.passage([("qu", 10.0), ("zz", 5.0)], 300, lambda: "filler")
+    words = passage.split()
+    assert len(passage) >= 300
+    assert sum(word == "quiz" for word in words) > sum(word == "filler" for word in words)
+    assert practice.passage([("zz", 5.0)], 300, lambda: "filler") is None, "Bigrams no word contains are ignored"
+
+def test_generation_with_large_dictionary():
+    # Timings are in bench/bench_adaptive.py
+    rng = random.Random(0)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 10))) for _ in range(100000)]
+    practice = AdaptivePractice(words, rng=rng)
+    assert "ab" in practice.index and isinstance(practice.index, BigramIndex)
+    passage = practice.passage([("ab", 3.0), ("qx", 2.0), ("th", 1.0)], 1500, lambda: "the")
+    assert len(passage) >= 1500 and "ab" in passage
@@ -0,0 +1,49 @@
+import random
+from alignment import DELETION, INSERTION, MATCH, MAX_MISSES, SUBSTITUTION, align, common_run
+
+TARGET = "the quick brown fox"
+
+def test_exact_prefix_scores_only_the_attempted_span():
+    result = align(TARGET, "the quick")
+    assert result.accuracy == 100, "Stopping early is not an error"
+    assert result.attempted == 9 and result.errors == 0
+
+def test_skipped_and_extra_characters_cost_one_edit():
+    result = align(TARGET, "te quick brown fox")
+    assert (result.deletions, result.insertions, result.substitutions) == (1, 0, 0)
+    assert list(result.target_marks()[:3]) == [MATCH, DELETION, MATCH]
+    result = align(TARGET, "thhe quick brown fox")
+    assert (result.deletions, result.insertions, result.substitutions) == (0, 1, 0)
+    assert list(result.typed_marks()[:4]) == [MATCH, MATCH, INSERTION, MATCH]
+    assert result.accuracy == 95
+
+def test_mixed_edits_and_text_past_the_end():
+    result = align(TARGET, "the quack brwn fx")
+    assert (result.substitutions, result.deletions, result.matches) == (1, 2, 16)
+    assert result.target_marks()[6] == SUBSTITUTION and result.target_marks()[17] == DELETION
+    result = align("fox", "foxes")
+    assert result.insertions == 2 and result.attempted == 3
+    assert align("abc", "xyz").substitutions == 3
+    assert align(TARGET, "").accuracy == 0
+
+def test_runs_and_random_edits_on_a_long_passage():
+    rng = random.Random(0)
+    target = " ".join(rng.choice(["alpha", "beta", "gamma", "delta"]) for _ in range(20000))
+    assert common_run(target, target, 0, 0) == len(target)
+    assert common_run(target, target[:500] + "#" + target[501:], 0, 0) == 500
+    typed = list(target)
+    for index in sorted(rng.sample(range(len(typed)), 100), reverse=True):
+        typed[index] = "#"
+    result = align(target, "".join(typed))
+    assert result.substitutions == 100 and result.errors == 100
+
+def test_unrelated_text_is_compared_by_position():
+    rng = random.Random(1)
+    target = "".join(rng.choice("abcdefghij ") for _ in range(20000))
+    mashed = "".join(rng.choice("abcdefghij ") for _ in range(20000))
+    result = align(target, target[:100] + mashed)
+    same = sum(a == b for a, b in zip(target[100:], mashed))
+    assert result.attempted == len(target) and result.insertions == 100
+    assert result.matches >= 100 + same - MAX_MISSES, "Past the misses every position is compared once"
+    assert result.matches + result.substitutions + result.deletions == len(target)
+    assert len(result.typed_marks()) == 20100 and len(result.target_marks()) == 20000
@@ -0,0 +1,64 @@
+import sqlite3
+from datetime import date
+import numpy as np
+from analytics import History, load_history, records, rolling_consistency, series, summary, to_columns, trend
+from database import insert_progress, migrate
+
+ROWS = [(1, "2025-02-10", 40, 90.0, 30), (2, "2025-02-10", 50, 95.0, 60),
+        (3, "2025-02-12", 45, 100.0, 60), (4, "2025-02-17", 60, 85.0, 30)]
+
+def test_history_is_read_once_and_extended_in_date_order():
+    db_conn = sqlite3.connect(":memory:")
+    migrate(db_conn)
+    for _, day, wpm, accuracy, duration in ROWS:
+        insert_progress(db_conn, 1, wpm, accuracy, day, duration=duration)
+    insert_progress(db_conn, 2, 99, 99.0, "2025-02-11")
+    history = History(load_history(db_conn, 1))
+    assert list(history["wpm"]) == [40, 50, 45, 60] and history.last_id == 4
+    history.append(6, "2025-02-18", 70, 90.0, 30)
+    history.append(4, "2025-02-17", 60, 85.0, 30)
+    assert len(history) == 5, "Rows already loaded are not added twice"
+    history.append(7, "2025-02-11", 30, 80.0, 30)
+    assert list(history["id"]) == [1, 2, 7, 3, 4, 6], "An older result is sorted into place"
+    assert history.span(date(2025, 2, 11), date(2025, 2, 17)) == (2, 5)
+
+def test_history_grows_without_copying_every_append():
+    history = History()
+    capacities = set()
+    for index in range(1000):
+        history.append(index + 1, "2025-02-10", 50, 95.0)
+        capacities.add(len(history.data["wpm"]))
+    assert len(history) == 1000 and len(capacities) <= 6
+
+def test_minutes_count_the_time_typed():
+    db_conn = sqlite3.connect(":memory:")
+    migrate(db_conn)
+    insert_progress(db_conn, 1, 50, 95.0, "2025-02-10", "Timed Test", "Easy", 60)
+    insert_progress(db_conn, 1, 55, 90.0, "2025-02-11", "Timed Test", "Easy", 60, 24.5)
+    history = History(load_history(db_conn, 1))
+    assert list(history["elapsed"]) == [60, 24.5], "Results without a measured time count their set duration"
+    history.append(3, "2025-02-12", 60, 95.0, 15.5)
+    assert summary(history)["minutes"] == 100 / 60
+
+def test_summary_figures():
+    history = History(to_columns(ROWS))
+    stats = summary(history)
+    assert stats["tests"] == 4 and stats["minutes"] == 3
+    assert stats["best_wpm"] == 60 and stats["p50"] == 47.5
+    assert stats["records"] == 3, "40, 50 and 60 each beat everything before"
+    assert summary(history, date(2025, 2, 12))["records"] == 1
+    assert summary(history, date(2025, 3, 1)) == {"tests": 0}
+    assert trend(np.array(["2025-02-01", "2025-02-03"], dtype="datetime64[D]"), np.array([40.0, 50.0])) == 5.0
+    assert list(records(np.array([5.0, 3.0, 5.0, 6.0]))) == [0, 3]
+    assert rolling_consistency(np.array([50.0, 50.0, 50.0]))[-1] == 1.0
+
+def test_series_match_the_chart_queries():
+    history = History(to_columns(ROWS))
+    dates, columns = series(history, date(2025, 2, 1), date(2025, 2, 28), "day")
+    assert list(dates.astype("datetime64[D]").astype(str)) == ["2025-02-10", "2025-02-12", "2025-02-17"]
+    assert list(columns[0]) == [45, 45, 60] and list(columns[1]) == [92.5, 100, 85]
+    dates, columns = series(history, None, None, "week")
+    assert list(dates.astype("datetime64[D]").astype(str)) == ["2025-02-10", "2025-02-17"], "Weeks start on Monday"
+    assert list(columns[0]) == [45, 60]
+    dates, columns = series(history, date(2025, 2, 10), date(2025, 2, 10), "test")
+    assert len(dates) == 2 and dates[0] < dates[1]
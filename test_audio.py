@@ -0,0 +1,46 @@
+import os
+import time
+import pytest
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+from audio import NullAudioEngine, create_audio_engine
+
+@pytest.fixture
+def engine():
+    engine = create_audio_engine(click_channels=2, max_click_rate=10)
+    if not engine.enabled:
+        pytest.skip("No audio backend available")
+    engine.load("key", "key_press.mp3")
+    yield engine
+    engine.close()
+
+def test_null_engine_is_silent():
+    engine = NullAudioEngine()
+    assert engine.load("key", "key_press.mp3") is None
+    assert not engine.click()
+    assert engine.latency_report() is None
+
+def test_missing_file_is_not_loaded(engine):
+    assert engine.load("missing", "missing.mp3") is None
+
+def test_clicks_above_rate_limit_are_coalesced(engine):
+    assert engine.click()
+    assert not engine.click(), "A second click within the rate limit should be merged"
+    assert engine.coalesced == 1
+    engine.last_click -= 1
+    assert engine.click()
+
+def test_clicks_rotate_through_reserved_channels(engine):
+    engine.min_click_interval = 0
+    used = []
+    for _ in range(3):
+        used.append(engine.next_channel)
+        engine.click()
+    assert used == [0, 1, 0]
+
+def test_latency_report(engine):
+    engine.min_click_interval = 0
+    for _ in range(4):
+        engine.click(pressed_at=time.perf_counter())
+    report = engine.latency_report()
+    assert report["samples"] == 4
+    assert report["p50_ms"] >= engine.buffer_latency * 1000
@@ -0,0 +1,40 @@
+from datetime import date, datetime
+import numpy as np
+from chartdata import choose_resolution, lttb, moving_average, prepare, rolling_percentiles, to_datetimes
+
+def test_resolution_follows_range():
+    assert choose_resolution(date(2025, 2, 1), date(2025, 2, 8)) == "test"
+    assert choose_resolution(date(2025, 1, 1), date(2025, 3, 1)) == "day"
+    assert choose_resolution(date(2024, 1, 1), date(2025, 3, 1)) == "week"
+
+def test_tests_on_one_day_are_spread_across_it():
+    times = to_datetimes([datetime(2025, 2, 14), "2025-02-14", "2025-02-15"], spread_within_day=True)
+    assert list(times.astype(str)) == ["2025-02-14T06:00:00", "2025-02-14T18:00:00", "2025-02-15T12:00:00"]
+
+def test_moving_average_and_band():
+    values = np.array([10.0, 20.0, 30.0, 40.0])
+    assert list(moving_average(values, 2)) == [10.0, 15.0, 25.0, 35.0]
+    low, high = rolling_percentiles(values, 3, (0, 100))
+    assert list(low) == [10.0, 10.0, 10.0, 20.0]
+    assert list(high) == [10.0, 20.0, 30.0, 40.0]
+
+def test_lttb_keeps_ends_and_peaks():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[500] = 100.0
+    picked = lttb(x, y, 50)
+    assert len(picked) == 50
+    assert picked[0] == 0 and picked[-1] == 999
+    assert 500 in picked, "A spike should survive downsampling"
+    assert list(lttb(x[:10], y[:10], 50)) == list(range(10))
+
+def test_prepare_bounds_points_by_width():
+    rows = [(f"2025-02-{1 + i % 28:02d}", 40 + i % 7, 90.0) for i in range(20000)]
+    dates, series = prepare(rows, "test", panels=2, width=600)
+    assert len(dates) == 300
+    assert len(series) == 2 and all(len(panel["values"]) == 300 for panel in series)
+    assert np.all(series[0]["low"] <= series[0]["high"])
+
+def test_prepare_without_rows():
+    dates, series = prepare([], "day", panels=1)
+    assert len(dates) == 0 and len(series[0]["values"]) == 0
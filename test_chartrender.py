@@ -0,0 +1,38 @@
+import threading
+import pytest
+from chartrender import ChartRenderer
+
+PANELS = [('WPM', 'Words Per Minute', 'blue')]
+ROWS = [("2025-02-14", 40.0), ("2025-02-15", 50.0), ("2025-02-16", 45.0)]
+
+@pytest.fixture
+def renderer():
+    renderer = ChartRenderer(cache_size=2)
+    yield renderer
+    renderer.close()
+
+def test_renders_ppm_off_the_calling_thread(renderer):
+    threads = []
+    original = renderer.draw
+    def draw(*args):
+        threads.append(threading.current_thread())
+        return original(*args)
+    renderer.draw = draw
+    image = renderer.render((1, "progress", 1), "progress", PANELS, ROWS, "day", 400, 200).result()
+    assert image.startswith(b"P6 400 200 255\n")
+    assert len(image) == len(b"P6 400 200 255\n") + 400 * 200 * 3
+    assert threads and threads[0] is not threading.current_thread()
+
+def test_lines_are_drawn_into_the_image(renderer):
+    empty = renderer.render((1, "progress", 0), "progress", PANELS, [], "day", 400, 200).result()
+    drawn = renderer.render((1, "progress", 1), "progress", PANELS, ROWS, "day", 400, 200).result()
+    assert empty != drawn, "Animated lines must be part of the off-screen image"
+
+def test_cache_is_lru_and_per_user(renderer):
+    for key in [(1, "progress", 1), (2, "progress", 1)]:
+        renderer.render(key, "progress", PANELS, ROWS, "day", 400, 200).result()
+    assert renderer.cached((1, "progress", 1)) is not None
+    renderer.render((1, "history", 1), "progress", PANELS, ROWS, "day", 400, 200).result()
+    assert renderer.cached((2, "progress", 1)) is None, "The least recently used image is evicted"
+    renderer.invalidate(1)
+    assert renderer.cache == {}
@@ -0,0 +1,51 @@
+from datetime import datetime
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from charts import LineChart
+
+def offscreen_chart(panels):
+    chart = LineChart(panels)
+    chart.attach_offscreen()
+    return chart
+
+def test_chart_is_not_registered_with_pyplot():
+    LineChart([('WPM Progress', 'Words Per Minute', 'blue')])
+    assert plt.get_fignums() == [], "Charts should not accumulate in pyplot's figure manager"
+
+def test_update_reuses_lines():
+    chart = offscreen_chart([('WPM', 'Words Per Minute', 'blue'), ('Accuracy', 'Accuracy (%)', 'green')])
+    dates = [datetime(2025, 2, 14), datetime(2025, 2, 15)]
+    chart.update(dates, [40, 50], [90.0, 95.0])
+    lines = list(chart.lines)
+    chart.update(dates, [45, 48], [91.0, 94.0])
+    assert chart.lines == lines
+    assert all(len(ax.lines) == 2 for ax in chart.figure.axes), "Each panel keeps one data line and one average line"
+    assert list(chart.lines[0].get_ydata()) == [45, 48]
+
+def test_update_blits_when_limits_are_unchanged():
+    chart = offscreen_chart([('WPM', 'Words Per Minute', 'blue')])
+    dates = [datetime(2025, 2, 14), datetime(2025, 2, 15)]
+    chart.update(dates, [40, 50])
+    background = chart.background
+    assert background is not None
+    chart.update(dates, [40, 50])
+    assert chart.background is background, "Same limits should blit over the cached background"
+    chart.update(dates, [40, 80])
+    assert chart.background is not background, "New limits need a full redraw"
+
+def test_single_day_gets_a_visible_range():
+    xlim, ylim = LineChart.data_limits([10.0], [50])
+    assert xlim == (9.5, 10.5)
+    assert ylim[0] < 50 < ylim[1]
+
+def test_bands_follow_the_data():
+    chart = offscreen_chart([('WPM', 'Words Per Minute', 'blue')])
+    dates = np.array(["2025-02-14", "2025-02-15", "2025-02-16"], dtype="datetime64[s]")
+    average, low, high = np.array([40.0, 45.0, 50.0]), np.array([38.0, 40.0, 44.0]), np.array([42.0, 50.0, 56.0])
+    chart.update(dates, [40, 50, 60], bands=[(average, low, high)])
+    assert list(chart.averages[0].get_ydata()) == [40.0, 45.0, 50.0]
+    assert len(chart.bands[0].get_paths()[0].vertices) >= 6
+    chart.update(dates, [40, 50, 60])
+    assert len(chart.averages[0].get_ydata()) == 0, "Without bands the overlay is cleared"
@@ -0,0 +1,66 @@
+import pytest
+from clock import SessionClock, Ticker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+class FakeWidget:
+    def __init__(self):
+        self.jobs = {}
+        self.next_id = 0
+
+    def after(self, interval, callback):
+        self.next_id += 1
+        self.jobs[self.next_id] = callback
+        return self.next_id
+
+    def after_cancel(self, job):
+        del self.jobs[job]
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+def test_elapsed_excludes_pauses(fake_clock):
+    clock = SessionClock(fake_clock)
+    clock.start(30)
+    fake_clock.now += 10
+    assert clock.toggle_pause()
+    fake_clock.now += 50
+    assert clock.elapsed == 10, "Paused time should not count"
+    assert not clock.toggle_pause()
+    fake_clock.now += 5
+    assert clock.elapsed == 15
+    assert clock.remaining == 15
+
+def test_expiry_and_stop(fake_clock):
+    clock = SessionClock(fake_clock)
+    clock.start(30)
+    fake_clock.now += 31
+    assert clock.is_expired
+    clock.stop()
+    fake_clock.now += 100
+    assert clock.elapsed == 31, "A stopped clock keeps its final time"
+    assert not clock.is_running
+
+def test_ticker_restart_keeps_a_single_chain():
+    widget = FakeWidget()
+    ticks = []
+    ticker = Ticker(widget, 100, lambda: ticks.append(1))
+    ticker.start()
+    ticker.start()
+    assert len(widget.jobs) == 1, "Restarting should replace the pending tick"
+    widget.jobs.pop(ticker.job)()
+    assert ticks == [1] and len(widget.jobs) == 1
+
+def test_ticker_stops_when_callback_returns_false():
+    widget = FakeWidget()
+    ticker = Ticker(widget, 100, lambda: False)
+    ticker.start()
+    widget.jobs.pop(ticker.job)()
+    assert not ticker.is_active
+    assert widget.jobs == {}
@@ -0,0 +1,47 @@
+import random
+from collections import Counter
+import pytest
+from corpus import AliasTable, Corpus, TextIndex, text_features
+
+@pytest.fixture
+def corpus(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text("\n".join(["a", "the", "cat", "dog", "house", "window", "quiz", "jazzy", "xylophone"]))
+    sentences = tmp_path / "sentences.txt"
+    sentences.write_text("\n".join([
+        "the cat sat.", "a dog ran.", "we can go.",
+        "Houses have windows and doors.", "Rivers flow into the sea.", "Birds fly south in winter.",
+        "Quartz jukeboxes vex zebras!", "Order #42 costs $9.99 (2x).", "Jazzy wizards quiz, Jim.",
+    ]))
+    return Corpus(str(words), str(sentences), cache_dir=str(tmp_path / "cache"), rng=random.Random(1))
+
+def test_features_measure_difficulty():
+    word_length, rare, symbols = text_features("Jazz, quiz!")
+    assert word_length == 4.0
+    assert rare == pytest.approx(5 / 8)
+    assert symbols == pytest.approx(3 / 11), "Punctuation and capitals count as symbols"
+
+def test_alias_table_follows_weights():
+    table = AliasTable([1, 2, 7])
+    rng = random.Random(0)
+    counts = Counter(table.sample(rng) for _ in range(20000))
+    assert counts[2] / 20000 == pytest.approx(0.7, abs=0.02)
+    assert counts[0] / 20000 == pytest.approx(0.1, abs=0.02)
+
+def test_buckets_split_by_difficulty(corpus):
+    assert {corpus.sentence("Easy") for _ in range(50)} <= {"the cat sat.", "a dog ran.", "we can go."}
+    assert corpus.word("Hard") in {"quiz", "jazzy", "xylophone"}
+
+def test_passage_is_sized_to_duration(corpus):
+    short = corpus.passage("Medium", duration=30)
+    long = corpus.passage("Medium", duration=300)
+    assert len(short) >= 300 and len(long) >= 3000
+    sentences = short.split(". ")
+    assert all(first != second for first, second in zip(sentences, sentences[1:])), "The same sentence should not repeat back to back"
+
+def test_features_are_cached(corpus, tmp_path):
+    index = corpus.sentences
+    cache_path = tmp_path / "cache" / "sentences.txt.features"
+    assert cache_path.exists()
+    reloaded = TextIndex(index.path, cache_dir=str(tmp_path / "cache"))
+    assert reloaded.load_features() == index.features
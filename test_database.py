@@ -0,0 +1,186 @@
+import multiprocessing
+import sqlite3
+import pytest
+from database import (DatabaseWorker, MIGRATIONS, migrate, insert_progress, history_page, leaderboard_page,
+                      rebuild_daily_stats, rebuild_leaderboard, connect, retry_locked)
+
+@pytest.fixture
+def db(tmp_path):
+    worker = DatabaseWorker(str(tmp_path / "typing_data.db"))
+    worker.submit(migrate, write=True).result()
+    yield worker
+    worker.close()
+
+def test_writes_are_visible_to_later_queries(db):
+    user_id = db.execute('INSERT INTO users (username, password, email) VALUES (?, ?, ?)', ("alice", "pw", "")).result()
+    assert db.query_one('SELECT username FROM users WHERE id=?', (user_id,)).result() == ("alice",)
+
+def test_database_uses_wal(db):
+    assert db.query_one('PRAGMA journal_mode').result() == ("wal",)
+
+def test_failed_write_does_not_roll_back_its_group(db):
+    db.execute('INSERT INTO users (username) VALUES (?)', ("bob",)).result()
+    futures = [db.execute('INSERT INTO users (username) VALUES (?)', (name,)) for name in ("carol", "bob", "dave")]
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[1].result()
+    assert futures[0].result() and futures[2].result()
+    assert db.query_one('SELECT COUNT(*) FROM users').result() == (3,)
+
+def test_close_flushes_pending_writes(tmp_path):
+    path = str(tmp_path / "typing_data.db")
+    worker = DatabaseWorker(path)
+    worker.submit(migrate, write=True)
+    for i in range(100):
+        worker.execute('INSERT INTO progress (user_id, wpm, accuracy) VALUES (?, ?, ?)', (1, i, 100.0))
+    worker.close()
+    assert sqlite3.connect(path).execute('SELECT COUNT(*) FROM progress').fetchone() == (100,)
+
+def test_unopenable_database_fails_every_request(tmp_path):
+    worker = DatabaseWorker(str(tmp_path / "missing" / "typing_data.db"))
+    pending = worker.submit(migrate, write=True)
+    with pytest.raises(sqlite3.OperationalError):
+        pending.result(timeout=5)
+    worker.join(timeout=5)
+    # Requests made after the worker stopped fail too, instead of waiting forever
+    with pytest.raises(sqlite3.OperationalError):
+        worker.query_one('SELECT 1').result(timeout=5)
+    worker.close()
+
+def save_result(db_conn, user_id, wpm):
+    # Reads before writing, as the achievement stats do
+    db_conn.execute('SELECT COUNT(*) FROM progress WHERE user_id=?', (user_id,)).fetchone()
+    return insert_progress(db_conn, user_id, wpm, 95.0, "2025-02-16", "Timed Test", "Easy", 30)
+
+def save_results(path, user_id, count):
+    # One copy of the app saving results one at a time, as after each test
+    worker = DatabaseWorker(path)
+    failed = 0
+    for index in range(count):
+        try:
+            worker.submit(save_result, user_id, 40 + index, write=True).result()
+        except sqlite3.OperationalError:
+            failed += 1
+    worker.close()
+    return failed
+
+def test_concurrent_processes_lose_no_writes(tmp_path):
+    path = str(tmp_path / "shared.db")
+    worker = DatabaseWorker(path)
+    worker.submit(migrate, write=True).result()
+    worker.close()
+    processes, count = 24, 20
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        failed = pool.starmap(save_results, [(path, user_id, count) for user_id in range(1, processes + 1)])
+    assert sum(failed) == 0, "No write should give up while others hold the lock"
+    db_conn = connect(path)
+    assert db_conn.execute('SELECT COUNT(*), COUNT(DISTINCT user_id) FROM progress').fetchone() == (processes * count, processes)
+    assert db_conn.execute('SELECT SUM(tests) FROM daily_stats').fetchone() == (processes * count,)
+
+def test_connections_wait_and_retry_on_locks(tmp_path):
+    path = str(tmp_path / "typing_data.db")
+    db_conn = connect(path)
+    assert db_conn.execute('PRAGMA busy_timeout').fetchone() == (5000,)
+    assert db_conn.execute('PRAGMA synchronous').fetchone() == (1,), "NORMAL"
+    attempts = []
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        return "done"
+    assert retry_locked(flaky, delay=0.001) == "done" and len(attempts) == 3
+    attempts.clear()
+    with pytest.raises(sqlite3.OperationalError):
+        retry_locked(flaky, retries=1, delay=0.001)
+    with pytest.raises(sqlite3.OperationalError):
+        retry_locked(db_conn.execute, 'SELECT * FROM missing_table')
+
+def test_migrate_backfills_daily_stats(tmp_path):
+    db_conn = sqlite3.connect(str(tmp_path / "old.db"))
+    MIGRATIONS[0](db_conn)
+    db_conn.executemany('INSERT INTO progress (user_id, wpm, accuracy, date) VALUES (?, ?, ?, ?)',
+                        [(1, 40, 90.0, "2025-02-14"), (1, 60, 100.0, "2025-02-14"), (1, 50, 80.0, "2025-02-15")])
+    migrate(db_conn)
+    migrate(db_conn)
+    assert db_conn.execute('PRAGMA user_version').fetchone() == (len(MIGRATIONS),)
+    rows = db_conn.execute('SELECT day, tests, best_wpm, total_wpm / tests, total_accuracy / tests FROM daily_stats ORDER BY day').fetchall()
+    assert rows == [("2025-02-14", 2, 60, 50, 95.0), ("2025-02-15", 1, 50, 50, 80.0)]
+    assert db_conn.execute('SELECT COUNT(*) FROM leaderboard').fetchone() == (0,), "Results without a mode are not ranked"
+
+def test_insert_progress_updates_daily_stats(db):
+    for wpm, accuracy in ((30, 90.0), (70, 100.0)):
+        db.submit(insert_progress, 1, wpm, accuracy, "2025-02-16", write=True)
+    row = db.query_one('SELECT tests, best_wpm, total_wpm, total_accuracy FROM daily_stats WHERE user_id=1').result()
+    assert row == (2, 70, 100, 190.0)
+
+def test_history_query_uses_covering_index(db):
+    plan = db.query('EXPLAIN QUERY PLAN SELECT date, wpm, accuracy FROM progress WHERE user_id=? AND date BETWEEN ? AND ? ORDER BY date',
+                    (1, "2025-01-01", "2025-12-31")).result()
+    assert "COVERING INDEX idx_progress_user_date" in plan[0][3]
+
+def test_leaderboard_keeps_each_users_personal_best(db):
+    for name in ("alice", "bob"):
+        db.execute('INSERT INTO users (username) VALUES (?)', (name,))
+    results = [(1, 80, 90.0, "Easy", 30), (1, 60, 100.0, "Easy", 60), (2, 80, 95.0, "Hard", 30), (2, 40, 99.0, "Hard", 30)]
+    for user_id, wpm, accuracy, difficulty, duration in results:
+        db.submit(insert_progress, user_id, wpm, accuracy, "2025-02-16", "Timed Test", difficulty, duration, write=True)
+    for mode in ("Practice Mode", "Custom Text", "Word Rain"):
+        db.submit(insert_progress, 1, 150, 100.0, "2025-02-16", mode, "Easy", 30, write=True)
+    board = lambda difficulty, duration: [row[:3] for row in db.submit(leaderboard_page, difficulty, duration).result()[0]]
+    assert board("All", 0) == [("bob", 80, 95.0), ("alice", 80, 90.0)]
+    assert board("Easy", 60) == [("alice", 60, 100.0)]
+    assert board("All", 30) == [("bob", 80, 95.0), ("alice", 80, 90.0)]
+    assert board("Medium", 0) == []
+    assert db.query_one('SELECT MAX(wpm) FROM leaderboard').result() == (80,), "Only timed modes are ranked"
+
+def test_rebuilt_rollups_match_incremental_updates():
+    db_conn = sqlite3.connect(":memory:")
+    migrate(db_conn)
+    results = [(1, 80, 90.0, "Easy", 30, "Timed Test"), (1, 80, 90.0, "Easy", 30, "Adaptive"), (1, 70, 95.0, None, 60, "Timed Test"),
+               (2, 50, 99.0, "Hard", None, "Timed Test"), (2, 50, 100.0, "", 30, "Adaptive"), (2, 65, 90.0, "Hard", 60, "Timed Test"),
+               (2, 90, 100.0, "Hard", 60, "Word Rain"), (1, 99, 100.0, None, None, None)]
+    for day, (user_id, wpm, accuracy, difficulty, duration, mode) in enumerate(results):
+        insert_progress(db_conn, user_id, wpm, accuracy, f"2025-02-1{day % 3}", mode, difficulty, duration)
+    queries = ['SELECT * FROM leaderboard ORDER BY 1, 2, 3', 'SELECT * FROM daily_stats ORDER BY 1, 2']
+    incremental = [db_conn.execute(query).fetchall() for query in queries]
+    rebuild_leaderboard(db_conn)
+    rebuild_daily_stats(db_conn)
+    assert [db_conn.execute(query).fetchall() for query in queries] == incremental, "Ties go to the earlier result"
+
+def test_leaderboard_read_uses_rank_index(db):
+    plan = db.query('EXPLAIN QUERY PLAN SELECT * FROM leaderboard WHERE difficulty=? AND duration=? ORDER BY wpm DESC, accuracy DESC LIMIT 10',
+                    ("All", 0)).result()
+    assert "idx_leaderboard_wpm" in plan[0][3]
+    assert not any("TEMP B-TREE" in row[3] for row in plan), "Ranking should not need a sort"
+
+def test_history_pages_follow_sort_keys(db):
+    # Many tests share a day and a WPM, so the id has to break ties
+    for i in range(25):
+        db.submit(insert_progress, 1, 40 + i % 3, 90.0, f"2025-02-{10 + i % 2}", write=True)
+    db.submit(insert_progress, 2, 99, 99.0, "2025-02-12", write=True)
+    for sort in ("date", "wpm", "accuracy"):
+        rows, keys, after = [], [], None
+        while True:
+            page, page_keys = db.submit(history_page, 1, sort, after, None, 7).result()
+            rows += page
+            keys += page_keys
+            if len(page) < 7:
+                break
+            after = page_keys[-1]
+        assert len(rows) == 25 and len(set(keys)) == 25, f"Paging by {sort} should visit every test once"
+        assert keys == sorted(keys, reverse=True)
+        previous, previous_keys = db.submit(history_page, 1, sort, None, keys[10], 7).result()
+        assert previous_keys == keys[3:10], "Paging backwards returns the rows just before the key"
+
+def test_leaderboard_pages(db):
+    for i in range(5):
+        user_id = db.execute('INSERT INTO users (username) VALUES (?)', (f"user{i}",)).result()
+        db.submit(insert_progress, user_id, 50 + i, 90.0, "2025-02-16", "Timed Test", write=True)
+    first, keys = db.submit(leaderboard_page, "All", 0, "wpm", None, None, 2).result()
+    rest, _ = db.submit(leaderboard_page, "All", 0, "wpm", keys[-1], None, 10).result()
+    assert [row[0] for row in first + rest] == ["user4", "user3", "user2", "user1", "user0"]
+
+def test_paged_queries_do_not_sort(db):
+    for sort in ("date", "wpm", "accuracy"):
+        plan = db.query('EXPLAIN QUERY PLAN SELECT id FROM progress WHERE user_id = ? AND (' + sort + ', id) < (?, ?) ORDER BY ' + sort + ' DESC, id DESC LIMIT 100',
+                        (1, 50, 1)).result()
+        assert not any("TEMP B-TREE" in row[3] for row in plan), f"Sorting by {sort} should walk an index"
@@ -18,20 +18,20 @@ def test_create_account(app):
     app.new_password_entry.insert(0, "password")
     app.email_entry.insert(0, "test@example.com")
     app.create_account()
-    app.db_cursor.execute('SELECT * FROM users WHERE username=?', ("testuser",))
-    user = app.db_cursor.fetchone()
+    app.db_callbacks.drain()
+    user = app.db.query_one('SELECT * FROM users WHERE username=?', ("testuser",)).result()
     assert user is not None, "User should be created in the database"
 
 def test_login(app):
     app.username_entry.insert(0, "testuser")
     app.password_entry.insert(0, "password")
     app.login()
+    app.db_callbacks.drain()
     assert app.current_user == 1, "User should be logged in with correct credentials"
 
 def test_save_progress(app):
-    app.save_progress(50, 90.0)
-    app.db_cursor.execute('SELECT * FROM progress WHERE user_id=? ORDER BY date DESC', (app.current_user,))
-    progress = app.db_cursor.fetchone()
+    app.save_progress(50, 90.0).result()
+    progress = app.db.query_one('SELECT * FROM progress WHERE user_id=? ORDER BY date DESC', (app.current_user,)).result()
     assert progress is not None, "Progress should be saved in the database"
 
 def test_check_achievements(app):
@@ -40,9 +40,8 @@ def test_check_achievements(app):
     assert app.achievements[2]["achieved"], "Accuracy Master achievement should be achieved"
 
 def test_update_profile(app):
-    app.save_profile("newuser", "newpassword", "new@example.com")
-    app.db_cursor.execute('SELECT * FROM users WHERE id=?', (app.current_user,))
-    user = app.db_cursor.fetchone()
+    app.save_profile("newuser", "newpassword", "new@example.com").result()
+    user = app.db.query_one('SELECT * FROM users WHERE id=?', (app.current_user,)).result()
     assert user is not None, "User should exist in the database"
     assert user[1] == "newuser", "Username should be updated"
     assert user[2] == "newpassword", "Password should be updated"
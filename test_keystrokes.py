@@ -0,0 +1,40 @@
+import sqlite3
+import pytest
+from keystrokes import KeystrokeLog, BACKSPACE, save_keystrokes
+
+@pytest.fixture
+def db_conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('''CREATE TABLE keystrokes (
+        id INTEGER PRIMARY KEY, user_id INTEGER, progress_id INTEGER, mode TEXT, seq INTEGER,
+        elapsed_ns INTEGER, expected TEXT, typed TEXT, correct INTEGER
+    )''')
+    return conn
+
+def test_record_ignored_when_inactive():
+    log = KeystrokeLog()
+    log.record("a", "a", True)
+    assert len(log) == 0, "Keys outside a test should not be recorded"
+
+def test_ring_buffer_overwrites_oldest():
+    log = KeystrokeLog(capacity=3)
+    log.begin()
+    for char in "abcde":
+        log.record(char, char, True, timestamp=log.start_ns + ord(char))
+    events = list(log.events())
+    assert [event[2] for event in events] == ["c", "d", "e"]
+    assert log.dropped == 2
+    assert events[0][0] == ord("c"), "Timestamps are stored relative to the start of the test"
+
+def test_events_are_saved_in_one_batch(db_conn):
+    log = KeystrokeLog()
+    log.begin()
+    log.record("h", "h", True)
+    log.record("i", "o", False)
+    log.record("", BACKSPACE, False)
+    events = log.take_events()
+    assert len(log) == 0 and not log.active, "Taking the events should empty and stop the log"
+    with db_conn:
+        assert save_keystrokes(db_conn, 1, 7, "Timed Test", events) == 3
+    rows = db_conn.execute('SELECT seq, expected, typed, correct, progress_id FROM keystrokes ORDER BY seq').fetchall()
+    assert rows == [(0, "h", "h", 1, 7), (1, "i", "o", 0, 7), (2, "", BACKSPACE, 0, 7)]
@@ -0,0 +1,37 @@
+import codecs
+import pytest
+from passages import PassageFile
+
+@pytest.fixture
+def write_file(tmp_path):
+    opened = []
+    def write(content, name="passages.txt"):
+        path = tmp_path / name
+        path.write_bytes(content)
+        opened.append(PassageFile(str(path)))
+        return opened[-1]
+    yield write
+    for passage_file in opened:
+        passage_file.close()
+
+def test_blank_lines_are_skipped(write_file):
+    passage_file = write_file(b"first line\n\n  \nsecond line\r\nthird")
+    assert list(passage_file.passages()) == ["first line", "second line", "third"]
+
+def test_empty_file(write_file):
+    assert list(write_file(b"").passages()) == []
+
+def test_utf16_with_bom(write_file):
+    passage_file = write_file(codecs.BOM_UTF16_LE + "café\nĀbc\n".encode("utf-16-le"))
+    assert passage_file.encoding == "utf-16-le"
+    assert list(passage_file.passages()) == ["café", "Ābc"]
+
+def test_invalid_bytes_are_replaced(write_file):
+    assert list(write_file(b"ok \xff here\n").passages()) == ["ok � here"]
+
+def test_long_lines_are_split_at_word_boundaries(write_file):
+    passage_file = write_file(b"word " * 30)
+    passage_file.max_length = 20
+    passages = list(passage_file.passages())
+    assert all(len(passage) <= 20 for passage in passages)
+    assert " ".join(passages).split() == ["word"] * 30
@@ -0,0 +1,59 @@
+import csv
+import json
+import pytest
+from profiling import Histogram, LagMonitor, Profiler, enabled_from_env
+
+class Handlers:
+    def on_text_change(self, event=None):
+        return "changed"
+
+class FakeWidget:
+    def __init__(self):
+        self.jobs = []
+
+    def after(self, delay, callback):
+        self.jobs.append(callback)
+        return len(self.jobs)
+
+    def after_cancel(self, job):
+        pass
+
+def test_histogram_percentiles():
+    histogram = Histogram("handler")
+    for micros in range(1, 1001):
+        histogram.record(micros * 1000)
+    assert histogram.count == 1000
+    assert histogram.percentile(0.5) == pytest.approx(0.5, rel=0.2)
+    assert histogram.percentile(0.99) == pytest.approx(0.99, rel=0.2)
+    assert histogram.percentile(1.0) == 1.0, "Percentiles never exceed the largest sample"
+
+def test_disabled_profiler_leaves_methods_alone():
+    handlers = Handlers()
+    Profiler(enabled=False).instrument(handlers)
+    assert "on_text_change" not in vars(handlers), "Disabled profiling should not wrap anything"
+
+def test_enabled_profiler_times_handlers(tmp_path):
+    handlers = Handlers()
+    profiler = Profiler(enabled=True)
+    profiler.instrument(handlers)
+    assert handlers.on_text_change() == "changed"
+    assert profiler.histograms["on_text_change"].count == 1
+    profiler.export_json(tmp_path / "profile.json")
+    profiler.export_csv(tmp_path / "profile.csv")
+    assert json.loads((tmp_path / "profile.json").read_text())[0]["name"] == "on_text_change"
+    with open(tmp_path / "profile.csv", newline="") as exported:
+        assert next(csv.DictReader(exported))["count"] == "1"
+
+def test_lag_monitor_reschedules_itself():
+    widget = FakeWidget()
+    histogram = Histogram("event loop lag")
+    monitor = LagMonitor(widget, histogram, interval=0)
+    monitor.start()
+    widget.jobs.pop()()
+    assert histogram.count == 1 and len(widget.jobs) == 1
+
+def test_enabled_from_env(monkeypatch):
+    monkeypatch.setenv("DIGITYPE_PROFILE", "1")
+    assert enabled_from_env()
+    monkeypatch.setenv("DIGITYPE_PROFILE", "0")
+    assert not enabled_from_env()
@@ -0,0 +1,49 @@
+import pytest
+from scoring import ScoringEngine
+
+@pytest.fixture
+def engine():
+    return ScoringEngine("the cat")
+
+def type_text(engine, text):
+    for char in text:
+        engine.type_char(char)
+
+def test_type_correct_text(engine):
+    type_text(engine, "the c")
+    assert engine.position == 5
+    assert engine.correct_chars == 5
+    assert engine.errors == 0
+    assert engine.first_error is None
+    assert engine.word_count == 2
+
+def test_errors_and_backspace(engine):
+    type_text(engine, "thx")
+    assert engine.errors == 1
+    assert engine.first_error == 2
+    engine.backspace()
+    assert engine.errors == 0, "Deleting the only error should clear it"
+    assert engine.first_error is None
+    assert engine.total_errors == 1, "Corrected errors still count towards the total"
+    type_text(engine, "e cat")
+    assert engine.is_complete
+    assert engine.correct_chars == len(engine.target_text)
+
+def test_insert_and_delete_in_middle(engine):
+    type_text(engine, "th cat")
+    assert engine.first_error == 2
+    engine.insert(2, "e")
+    assert engine.is_complete, "Inserting the missing character should realign the suffix"
+    engine.delete(0, 4)
+    assert "".join(engine.typed) == "cat"
+    assert engine.word_count == 1
+
+def test_sync_matches_fresh_engine(engine):
+    type_text(engine, "the dog")
+    engine.sync("the cart")
+    fresh = ScoringEngine("the cat")
+    type_text(fresh, "the cart")
+    assert engine.position == fresh.position
+    assert engine.correct_chars == fresh.correct_chars
+    assert engine.errors == fresh.errors
+    assert engine.first_error == fresh.first_error
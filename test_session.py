@@ -0,0 +1,69 @@
+import pytest
+from clock import SessionClock
+from alignment import align
+from keystrokes import BACKSPACE
+from session import TypingSession, WordRainSession
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def test_typing_session_scores_edits(clock):
+    session = TypingSession(SessionClock(clock))
+    session.set_target("the cat sat")
+    session.start(60)
+    session.insert(0, "the cx")
+    session.delete(5, 1)
+    session.insert(5, "at sat")
+    assert session.is_complete and session.is_correct
+    clock.now = 6.0
+    wpm, accuracy, events, elapsed = session.finish()
+    assert wpm == 30 and elapsed == 6.0, "Three words in six seconds"
+    assert accuracy == 100, "Corrected mistakes are not in the final text"
+    assert [typed for _, _, typed, _ in events].count(BACKSPACE) == 1
+    assert len(events) == 13
+
+def test_skipped_character_costs_one_edit(clock):
+    session = TypingSession(SessionClock(clock))
+    session.set_target("the cat sat")
+    session.start(60)
+    session.insert(0, "the ct sat")
+    clock.now = 6.0
+    _, accuracy, _, _ = session.finish()
+    assert accuracy == align("the cat sat", "the ct sat").accuracy == pytest.approx(1000 / 11), \
+        "The rest of the line still lines up after the missing letter"
+
+def test_typing_session_serves_passages(clock):
+    session = TypingSession(SessionClock(clock))
+    session.set_passages(["first", "second"])
+    session.set_target(session.next_passage())
+    assert session.scoring.target_text == "first"
+    assert session.next_passage() == "second"
+    assert session.next_passage() is None
+
+def test_pause_only_applies_to_running_test(clock):
+    session = TypingSession(SessionClock(clock))
+    assert session.toggle_pause() is False, "Nothing to pause before the test starts"
+    session.start(30)
+    assert session.toggle_pause() is True
+    assert session.toggle_pause() is False
+
+def test_word_rain_session_scores_matches(clock):
+    rain = WordRainSession(clock=SessionClock(clock))
+    rain.start(30)
+    rain.engine.spawn(1, "fig", 0.0)
+    for typed in ("f", "fi", "fo"):
+        rain.key(typed[-1], typed)
+    rain.key(BACKSPACE, "f")
+    assert rain.submit("fig") == 1 and rain.submit("fig") is None
+    clock.now = 30.0
+    wpm, accuracy, events, elapsed = rain.finish()
+    assert (wpm, accuracy, rain.score, elapsed) == (2, 100, 1, 30.0)
+    assert [correct for _, _, _, correct in events] == [1, 1, 0, 0]
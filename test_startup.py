@@ -0,0 +1,19 @@
+import sys
+import startup
+from startup import LazyModule
+
+def test_lazy_module_imports_on_first_use():
+    sys.modules.pop("colorsys", None)
+    colorsys = LazyModule("colorsys")
+    assert not colorsys.is_loaded
+    assert "colorsys" not in sys.modules, "Creating the placeholder should not import the module"
+    assert colorsys.rgb_to_hsv(1, 0, 0) == (0, 1, 1)
+    assert colorsys.is_loaded
+    assert any(label == "import colorsys" for label, *_ in startup.marks())
+
+def test_report_lists_marks_in_order():
+    startup.mark("first phase")
+    startup.mark("second phase")
+    lines = startup.report().splitlines()
+    labels = [line.split()[0] + " " + line.split()[1] for line in lines[1:]]
+    assert labels.index("first phase") < labels.index("second phase")
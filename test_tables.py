@@ -0,0 +1,69 @@
+import tkinter as tk
+from concurrent.futures import Future
+import pytest
+from tables import PagedTable
+
+ROWS = [(i, f"row {i}") for i in range(1000, 0, -1)]
+
+class ImmediateDispatcher:
+    def then(self, future, callback=None, errback=None):
+        if future.exception() is None:
+            callback(future.result())
+        else:
+            errback(future.exception())
+        return future
+
+def fetch(sort, after, before, limit):
+    # ROWS is sorted by its key, descending; keys are the first column
+    if before is not None:
+        rows = [row for row in ROWS if row[0] > before[0]][-limit:]
+    else:
+        rows = [row for row in ROWS if after is None or row[0] < after[0]][:limit]
+    future = Future()
+    future.set_result((rows, [(row[0],) for row in rows]))
+    return future
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("No display available")
+    yield root
+    root.destroy()
+
+@pytest.fixture
+def table(root):
+    table = PagedTable(root, [("id", "Id", 60), ("text", "Text", 100)], fetch, ImmediateDispatcher(), {"id"}, "id", page_size=50)
+    table.pack()
+    root.update()
+    return table
+
+def test_first_pages_are_loaded(table):
+    table.reload()
+    items = table.tree.get_children()
+    assert 50 <= len(items) <= table.max_rows
+    assert table.tree.item(items[0])["values"][0] == 1000
+
+def test_window_stays_bounded_while_scrolling(table):
+    table.reload()
+    for _ in range(30):
+        table.load(below=True)
+    items = table.tree.get_children()
+    assert len(items) == table.max_rows, "Old pages should be dropped"
+    assert table.more_above
+    first = table.keys[items[0]]
+    table.load(below=False)
+    assert table.keys[table.tree.get_children()[0]] == (first[0] + 50,), "Scrolling back fetches the rows before the window"
+
+def test_failed_fetch_does_not_block_loading(root):
+    failing = Future()
+    failing.set_exception(OSError("disk I/O error"))
+    fetches = [lambda *args: failing, fetch]
+    table = PagedTable(root, [("id", "Id", 60), ("text", "Text", 100)], lambda *args: fetches.pop(0)(*args),
+                       ImmediateDispatcher(), {"id"}, "id")
+    with pytest.raises(OSError):
+        table.reload()
+    assert not table.loading
+    table.load(below=True)
+    assert len(table.tree.get_children()) == 100, "The page is fetched again"
@@ -0,0 +1,44 @@
+import tkinter as tk
+import pytest
+from scoring import ScoringEngine
+from targetview import CORRECT, INCORRECT, UNTYPED, TargetView, changed_runs, target_states, wrap_lines
+
+def test_lines_break_at_spaces_only():
+    text = "aaaa bbbb cccc dddd\neeeeeeeeeeeeee ff"
+    starts = wrap_lines(text, columns=9)
+    assert list(starts) == [0, 10, 20, 35]
+    assert [text[start - 1] for start in starts[1:]] == [" ", "\n", " "], "The breaking character is replaced by the newline"
+
+def test_only_changed_characters_are_retagged():
+    engine = ScoringEngine("the cat")
+    for char in "thx":
+        engine.type_char(char)
+    states = target_states(engine.matches, engine.position, 0, 7)
+    assert list(states) == [CORRECT, CORRECT, INCORRECT, UNTYPED, UNTYPED, UNTYPED, UNTYPED]
+    engine.backspace()
+    engine.type_char("e")
+    after = target_states(engine.matches, engine.position, 0, 7)
+    assert changed_runs(states, after) == [(2, 3, CORRECT)]
+    assert changed_runs(bytes(4), bytes([1, 1, 2, 0]), 10) == [(10, 12, CORRECT), (12, 13, INCORRECT)]
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("No display available")
+    yield root
+    root.destroy()
+
+def test_long_passages_keep_a_window_of_lines(root):
+    text = " ".join(["word"] * 2000)
+    engine = ScoringEngine(text)
+    view = TargetView(root, engine, columns=20, lines=3)
+    view.set_text(text)
+    for index in range(500):
+        engine.type_char(text[index])
+        view.touch(index)
+    view.redraw()
+    assert int(view.index("end - 1 chars").split(".")[0]) == 3, "Only the visible lines are in the widget"
+    assert view.tag_ranges("cursor") and view.get("cursor.first") == text[500]
+    assert view.job is None
@@ -0,0 +1,76 @@
+import gzip
+import json
+import sqlite3
+import pytest
+from database import connect, connect_readonly, insert_progress, migrate
+from transfer import export_table, file_format, import_table
+
+RESULTS = [(1, 80, 90.0, "2025-02-14", "Easy", 30), (2, 60, 100.0, "2025-02-14", None, None),
+           (1, 95, 92.5, "2025-02-15", "Hard", 60)]
+
+def fresh(path):
+    db_conn = connect(str(path))
+    migrate(db_conn)
+    return db_conn
+
+@pytest.fixture
+def source(tmp_path):
+    db_conn = fresh(tmp_path / "source.db")
+    for name in ("alice", "bob, \"the\" typist"):
+        db_conn.execute('INSERT INTO users (username, password) VALUES (?, ?)', (name, "secret"))
+    for user_id, wpm, accuracy, date, difficulty, duration in RESULTS:
+        insert_progress(db_conn, user_id, wpm, accuracy, date, "Timed Test", difficulty, duration)
+    yield db_conn
+    db_conn.close()
+
+@pytest.mark.parametrize("extension", [".csv", ".csv.gz", ".jsonl", ".jsonl.gz"])
+def test_round_trip_keeps_rows_and_rebuilds_rollups(source, tmp_path, extension):
+    target = fresh(tmp_path / "target.db")
+    for table in ("users", "progress"):
+        path = str(tmp_path / f"{table}{extension}")
+        assert export_table(source, table, path, batch_size=2) == len(source.execute(f'SELECT * FROM {table}').fetchall())
+        import_table(target, table, path, batch_size=2, transaction_rows=2)
+    for query in ['SELECT * FROM users', 'SELECT * FROM progress', 'SELECT * FROM leaderboard ORDER BY 1, 2, 3',
+                  'SELECT * FROM daily_stats ORDER BY 1, 2',
+                  "SELECT name FROM sqlite_master WHERE type = 'index' ORDER BY name"]:
+        assert target.execute(query).fetchall() == source.execute(query).fetchall(), query
+    assert target.execute("SELECT value FROM user_stats WHERE user_id = 1 AND stat = 'best_wpm'").fetchone() == (95,), \
+        "Achievement stats are replayed from the imported results"
+    if extension.endswith(".gz"):
+        with gzip.open(tmp_path / f"users{extension}") as compressed:
+            assert compressed.read(1)
+
+def test_seed_rows_without_ids(tmp_path):
+    db_conn = fresh(tmp_path / "seed.db")
+    path = tmp_path / "seed.jsonl"
+    path.write_text("\n".join(json.dumps({"user_id": 1, "wpm": 40 + index, "accuracy": 95.0, "date": "2025-02-16"})
+                              for index in range(5)) + "\n")
+    assert import_table(db_conn, "progress", str(path)) == 5
+    assert db_conn.execute('SELECT MIN(id), MAX(id), MAX(wpm) FROM progress').fetchone() == (1, 5, 44)
+    assert db_conn.execute('SELECT tests FROM daily_stats').fetchone() == (5,)
+
+def test_failed_import_leaves_the_database_as_it_was(source, tmp_path):
+    path = str(tmp_path / "progress.csv")
+    export_table(source, "progress", path)
+    with pytest.raises(sqlite3.IntegrityError):
+        import_table(source, "progress", path)
+    assert source.execute('SELECT COUNT(*) FROM progress').fetchone() == (3,)
+    assert source.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'idx_progress_user_wpm'").fetchone() == (1,)
+    assert import_table(source, "progress", path, replace=True) == 3
+    with pytest.raises(ValueError):
+        file_format("progress.txt")
+
+def test_export_leaves_the_source_as_it_was(tmp_path):
+    path = tmp_path / "old #1.db"
+    db_conn = sqlite3.connect(str(path))
+    migrate(db_conn)
+    db_conn.commit()
+    db_conn.close()
+    db_conn = connect_readonly(str(path))
+    assert export_table(db_conn, "users", str(tmp_path / "users.csv")) == 0
+    assert db_conn.execute('PRAGMA journal_mode').fetchone() == ("delete",)
+    db_conn.close()
+    assert sorted(item.name for item in tmp_path.iterdir()) == ["old #1.db", "users.csv"], "No -wal or -shm files"
+    with pytest.raises(sqlite3.OperationalError):
+        connect_readonly(str(tmp_path / "typo.db"))
+    assert not (tmp_path / "typo.db").exists()
@@ -0,0 +1,84 @@
+import tkinter as tk
+from views import ViewRegistry, restyle
+
+class FakeWidget:
+    def __init__(self, children=(), **options):
+        self.options = options
+        self.children = list(children)
+        self.packed = False
+        self.destroyed = False
+
+    def cget(self, option):
+        if option not in self.options:
+            raise tk.TclError(f'unknown option "-{option}"')
+        return self.options[option]
+
+    def configure(self, options):
+        self.options.update(options)
+
+    def winfo_children(self):
+        return self.children
+
+    def pack(self, **kwargs):
+        self.packed = True
+
+    def pack_forget(self):
+        self.packed = False
+
+    def tkraise(self):
+        pass
+
+    def destroy(self):
+        self.destroyed = True
+
+def registry(calls):
+    views = ViewRegistry(None)
+    for name in ("home", "history"):
+        views.register(name, lambda parent, name=name: calls.append(("build", name)) or FakeWidget(),
+                       refresh=lambda name=name: calls.append(("refresh", name)),
+                       on_hide=lambda name=name: calls.append(("hide", name)))
+    return views
+
+def test_views_are_built_once_and_swapped():
+    calls = []
+    views = registry(calls)
+    home = views.show("home")
+    history = views.show("history")
+    assert views.show("home") is home and not history.packed and home.packed
+    views.show("history")
+    assert calls.count(("build", "home")) == 1 and calls.count(("build", "history")) == 1, "Navigating back must not rebuild"
+    assert calls.count(("refresh", "home")) == 1, "Data is only reloaded on first show unless invalidated"
+    assert calls[-1] == ("hide", "home")
+
+def test_invalidate_refreshes_visible_views_now_and_hidden_ones_on_show():
+    calls = []
+    views = registry(calls)
+    views.show("home")
+    views.invalidate("home", "history")
+    assert calls[-1] == ("refresh", "home")
+    assert ("build", "history") not in calls, "Unbuilt views are left alone"
+    views.show("history")
+    views.show("home")
+    views.invalidate("history")
+    calls.clear()
+    views.show("history")
+    assert calls == [("hide", "home"), ("refresh", "history")]
+
+def test_destroyed_views_are_rebuilt():
+    calls = []
+    views = registry(calls)
+    home = views.show("home")
+    views.destroy("home")
+    assert home.destroyed and views.current is None and ("hide", "home") in calls
+    assert views.show("home") is not home
+
+def test_restyle_only_touches_themed_options():
+    label = FakeWidget(background="white", foreground="black", font=("Arial", 14))
+    typed = FakeWidget(background="white", foreground="red", font="Arial 14")
+    button = FakeWidget(background="#3498db", foreground="white", font="Arial 14")
+    frame = FakeWidget([label, typed, FakeWidget([button], background="#333")], background="white")
+    restyle(frame, "white", {"background": ("white", "black"), "foreground": ("black", "white"), "font": ("Arial 14", ("Arial", 18))})
+    assert frame.options == {"background": "black"}
+    assert label.options == {"background": "black", "foreground": "white", "font": ("Arial", 18)}
+    assert typed.options["foreground"] == "red", "Colours set by the app itself are kept"
+    assert button.options == {"background": "#3498db", "foreground": "white", "font": "Arial 14"}
@@ -0,0 +1,42 @@
+import pytest
+from wordrain import WordRainEngine
+
+@pytest.fixture
+def engine():
+    engine = WordRainEngine(speed=100, height=600)
+    for item_id, (text, spawned) in enumerate([("apple", 0.0), ("apricot", 1.0), ("fig", 2.0), ("apple", 3.0)], start=1):
+        engine.spawn(item_id, text, spawned)
+    return engine
+
+def test_match_removes_oldest_copy(engine):
+    assert engine.match("apple") == 1
+    assert engine.match("apple") == 4
+    assert engine.match("apple") is None
+    assert len(engine) == 2
+
+def test_expected_char_uses_prefix_index(engine):
+    assert engine.expected_char("apr") == "i"
+    assert engine.expected_char("f") == "i"
+    assert engine.expected_char("x") == ""
+    engine.match("fig")
+    assert engine.expected_char("f") == "", "Removed words should leave the prefix index"
+
+def test_expire_removes_words_past_the_bottom_in_order(engine):
+    assert engine.expire(6.5) == [1]
+    engine.match("apricot")
+    assert engine.expire(8.5) == [3], "Words matched earlier should not be expired again"
+    assert len(engine) == 1
+
+def test_compaction_keeps_lookups_valid():
+    engine = WordRainEngine(speed=100, height=100)
+    for item_id in range(1, 201):
+        engine.spawn(item_id, f"w{item_id}", item_id * 0.1)
+    assert len(engine.expire(15.05)) == 140
+    assert engine.head < 140, "Expired slots should have been compacted away"
+    assert engine.match("w180") == 180
+    assert engine.spawned[engine.slots[200]] == pytest.approx(20.0)
+
+def test_clear_returns_live_items(engine):
+    engine.match("fig")
+    assert sorted(engine.clear()) == [1, 2, 4]
+    assert len(engine) == 0
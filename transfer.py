@@ -0,0 +1,143 @@
+import csv
+import gzip
+import json
+from itertools import islice
+
+from achievements import backfill_achievements
+from database import begin, rebuild_daily_stats, rebuild_leaderboard
+
+# Tables that can be moved in and out, with the columns written per row
+TABLES = {
+    "users": ("id", "username", "password", "email"),
+    "progress": ("id", "user_id", "wpm", "accuracy", "date", "mode", "difficulty", "duration", "elapsed"),
+}
+
+FORMATS = (".csv", ".jsonl")
+
+# zlib's default; 9 is several times slower for files a few percent smaller
+GZIP_LEVEL = 6
+
+# Rows read per fetchmany on export and written per executemany on import
+BATCH_SIZE = 10000
+
+# Rows imported per transaction; the journal stays bounded on huge files
+TRANSACTION_ROWS = 500000
+
+
+def file_format(path):
+    # .csv or .jsonl, optionally followed by .gz
+    name = path[:-3] if path.endswith(".gz") else path
+    for extension in FORMATS:
+        if name.endswith(extension):
+            return extension[1:]
+    raise ValueError(f"{path} is not a .csv or .jsonl file (optionally .gz)")
+
+
+def open_file(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", compresslevel=GZIP_LEVEL, encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def batches(rows, size=BATCH_SIZE):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def export_table(db_conn, table, path, batch_size=BATCH_SIZE):
+    # Streams the table in id order; only one batch is held at a time
+    columns = TABLES[table]
+    output_format = file_format(path)
+    selected = ", ".join(f"CAST({column} AS TEXT)" if column == "date" else column for column in columns)
+    cursor = db_conn.execute(f'SELECT {selected} FROM {table} ORDER BY id')
+    count = 0
+    with open_file(path, "w") as out:
+        if output_format == "csv":
+            writer = csv.writer(out)
+            writer.writerow(columns)
+            write = writer.writerows
+        else:
+            write = lambda rows: out.writelines(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            write(rows)
+            count += len(rows)
+    return count
+
+
+def read_rows(path, columns):
+    # Yields one tuple per line in the order of columns. Missing columns and
+    # empty CSV fields are NULL; a missing id is assigned on insert. The
+    # column affinities turn CSV text back into numbers.
+    with open_file(path, "r") as source:
+        if file_format(path) == "csv":
+            reader = csv.reader(source)
+            header = next(reader, [])
+            positions = [header.index(column) if column in header else None for column in columns]
+            if all(position is None for position in positions):
+                raise ValueError(f"{path} has none of the columns {', '.join(columns)}")
+            for line in reader:
+                yield tuple(line[position] or None if position is not None and position < len(line) else None
+                            for position in positions)
+        else:
+            for line in source:
+                if line.strip():
+                    record = json.loads(line)
+                    yield tuple(record.get(column) for column in columns)
+
+
+def import_table(db_conn, table, path, replace=False, batch_size=BATCH_SIZE, transaction_rows=TRANSACTION_ROWS):
+    # Indexes on the table are dropped for the import and rebuilt once at the
+    # end, which is much cheaper than updating them row by row, and the
+    # tables kept from progress are recomputed. db_conn must be in autocommit
+    # mode (isolation_level=None), as database.connect opens it.
+    columns = TABLES[table]
+    file_format(path)
+    insert = (f'INSERT {"OR REPLACE " if replace else ""}INTO {table} ({", ".join(columns)}) '
+              f'VALUES ({", ".join("?" * len(columns))})')
+    indexes = db_conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                              (table,)).fetchall()
+    count = 0
+    committed = False
+    begin(db_conn)
+    try:
+        for name, _ in indexes:
+            db_conn.execute(f'DROP INDEX {name}')
+        for batch in batches(read_rows(path, columns), batch_size):
+            db_conn.executemany(insert, batch)
+            count += len(batch)
+            if count % transaction_rows < len(batch):
+                db_conn.execute('COMMIT')
+                committed = True
+                begin(db_conn)
+        db_conn.execute('COMMIT')
+        committed = True
+    except BaseException:
+        if db_conn.in_transaction:
+            db_conn.execute('ROLLBACK')
+        raise
+    finally:
+        # A failure after the first transaction leaves its rows committed
+        if committed:
+            rebuild_after_import(db_conn, table, indexes)
+    return count
+
+
+def rebuild_after_import(db_conn, table, indexes):
+    begin(db_conn)
+    existing = {name for (name,) in db_conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    for name, sql in indexes:
+        if name not in existing:
+            db_conn.execute(sql)
+    if table == "progress":
+        rebuild_daily_stats(db_conn)
+        rebuild_leaderboard(db_conn)
+        db_conn.execute('DELETE FROM user_stats')
+        backfill_achievements(db_conn)
+    db_conn.execute('COMMIT')
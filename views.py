@@ -0,0 +1,97 @@
+import tkinter as tk
+
+
+# Holds the app's screens inside one container. Each view is built the
+# first time it is shown and afterwards only packed and unpacked, so
+# navigating never creates or destroys widgets. Hooks: refresh runs on the
+# first show and on the next show after invalidate() (at once if the view is
+# visible), on_show runs on every show and on_hide whenever the view is left.
+class ViewRegistry:
+    def __init__(self, container):
+        self.container = container
+        self.views = {}
+        self.frames = {}
+        self.stale = set()
+        self.current = None
+
+    def register(self, name, build, refresh=None, on_show=None, on_hide=None, **pack):
+        self.views[name] = (build, refresh, on_show, on_hide, pack)
+
+    def is_built(self, name):
+        return name in self.frames
+
+    def frame(self, name):
+        frame = self.frames.get(name)
+        if frame is None:
+            frame = self.frames[name] = self.views[name][0](self.container)
+            self.stale.add(name)
+        return frame
+
+    def show(self, name):
+        frame = self.frame(name)
+        if name == self.current:
+            return frame
+        self.hide()
+        build, refresh, on_show, on_hide, pack = self.views[name]
+        frame.pack(fill=tk.BOTH, expand=True, **pack)
+        frame.tkraise()
+        self.current = name
+        if on_show:
+            on_show()
+        self.refresh(name)
+        return frame
+
+    def hide(self):
+        if self.current is None:
+            return
+        name, self.current = self.current, None
+        self.frames[name].pack_forget()
+        on_hide = self.views[name][3]
+        if on_hide:
+            on_hide()
+
+    def refresh(self, name):
+        if name in self.stale:
+            self.stale.discard(name)
+            refresh = self.views[name][1]
+            if refresh:
+                refresh()
+
+    def invalidate(self, *names):
+        # Views that have not been built yet load fresh data when they are
+        for name in names:
+            if name in self.frames:
+                self.stale.add(name)
+        if self.current in names:
+            self.refresh(self.current)
+
+    def destroy(self, *names):
+        for name in names:
+            if name == self.current:
+                self.hide()
+            frame = self.frames.pop(name, None)
+            if frame is not None:
+                frame.destroy()
+            self.stale.discard(name)
+
+
+def widget_option(widget, option):
+    try:
+        value = widget.cget(option)
+    except tk.TclError:
+        return None
+    # Tk can hand lists such as fonts back as tuples
+    return " ".join(map(str, value)) if isinstance(value, tuple) else str(value)
+
+
+def restyle(widget, background, changes):
+    # Applies a theme change in one pass over the widget tree. changes maps
+    # an option to (old, new); only widgets drawn on the theme background
+    # are themed, so buttons and bars with colours of their own keep them,
+    # and an option is only replaced where it still has the old value.
+    if widget_option(widget, "background") == background:
+        for option, (old, new) in changes.items():
+            if widget_option(widget, option) == str(old):
+                widget.configure({option: new})
+    for child in widget.winfo_children():
+        restyle(child, background, changes)
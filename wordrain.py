@@ -0,0 +1,97 @@
+from array import array
+
+
+# Bookkeeping for the falling words, kept outside Tk. Words are looked up by
+# their text (and by every prefix, for the expected next character), and
+# spawn times live in parallel arrays: every word falls at the same speed,
+# so the canvas moves them all together and the oldest words are always the
+# first to leave the screen.
+class WordRainEngine:
+    def __init__(self, speed=100, height=600):
+        self.speed = speed
+        self.height = height
+        self.reset()
+
+    def reset(self):
+        self.ids = []
+        self.texts = []
+        self.spawned = array("d")
+        self.head = 0
+        self.slots = {}
+        self.by_text = {}
+        self.prefixes = {}
+
+    def clear(self):
+        removed = list(self.slots)
+        self.reset()
+        return removed
+
+    def __len__(self):
+        return len(self.slots)
+
+    def spawn(self, item_id, text, now):
+        self.slots[item_id] = len(self.ids)
+        self.ids.append(item_id)
+        self.texts.append(text)
+        self.spawned.append(now)
+        self.by_text.setdefault(text, []).append(item_id)
+        for end in range(len(text) + 1):
+            words = self.prefixes.setdefault(text[:end], {})
+            words[text] = words.get(text, 0) + 1
+
+    def expected_char(self, typed_prefix):
+        words = self.prefixes.get(typed_prefix)
+        if not words:
+            return ""
+        for text in words:
+            if len(text) > len(typed_prefix):
+                return text[len(typed_prefix)]
+        return ""
+
+    def match(self, typed_text):
+        item_ids = self.by_text.get(typed_text)
+        if not item_ids:
+            return None
+        # The oldest copy of a word is the one closest to the bottom
+        item_id = item_ids[0]
+        self.remove(item_id)
+        return item_id
+
+    def remove(self, item_id):
+        slot = self.slots.pop(item_id)
+        text = self.texts[slot]
+        self.ids[slot] = 0
+        item_ids = self.by_text[text]
+        item_ids.remove(item_id)
+        if not item_ids:
+            del self.by_text[text]
+        for end in range(len(text) + 1):
+            prefix = text[:end]
+            words = self.prefixes[prefix]
+            words[text] -= 1
+            if not words[text]:
+                del words[text]
+                if not words:
+                    del self.prefixes[prefix]
+
+    def expire(self, now):
+        # Words that fell past the bottom are a run at the front of the arrays
+        cutoff = now - self.height / self.speed
+        expired = []
+        while self.head < len(self.ids) and self.spawned[self.head] < cutoff:
+            item_id = self.ids[self.head]
+            if item_id:
+                self.remove(item_id)
+                expired.append(item_id)
+            self.head += 1
+        if self.head > 64 and self.head * 2 > len(self.ids):
+            self.compact()
+        return expired
+
+    def compact(self):
+        head = self.head
+        self.ids = self.ids[head:]
+        self.texts = self.texts[head:]
+        self.spawned = self.spawned[head:]
+        self.head = 0
+        self.slots = {item_id: slot for slot, item_id in enumerate(self.ids) if item_id}